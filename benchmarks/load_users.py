@@ -0,0 +1,88 @@
+"""
+Measure the time and memory taken to load users from the database.
+
+Users are loaded as FlexUser instances and, for comparison, as instances of a proxy model which mixes in
+dirtyfields.DirtyFieldsMixin (i.e. which tracks the state of every field, as FlexUser once did). The benchmark runs
+against a test database which is created and destroyed by the script.
+
+Usage (from the root of the repository):
+
+    python benchmarks/load_users.py [--users 100000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+from dirtyfields import DirtyFieldsMixin  # noqa: E402
+
+from django_flex_user.models.user import FlexUser  # noqa: E402
+
+
+class DirtyFieldsFlexUser(DirtyFieldsMixin, FlexUser):
+    class Meta:
+        proxy = True
+        app_label = 'django_flex_user'
+
+
+def create_users(count):
+    users = []
+    for i in range(count):
+        user = FlexUser(username=f'user{i}', email=f'user{i}@example.com', phone=f'+1202{i:07d}')
+        user.set_unusable_password()
+        users.append(user)
+    FlexUser.objects.bulk_create(users, batch_size=500)
+
+
+def load(model):
+    start = time.perf_counter()
+    users = list(model.objects.all())
+    elapsed = time.perf_counter() - start
+    assert len(users)
+    return elapsed
+
+
+def measure_memory(model):
+    # Tracing allocations slows loading down considerably, so memory is measured separately from time
+    tracemalloc.start()
+    users = list(model.objects.all())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(users)
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000, help='The number of users to load. Defaults to 100000.')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of times to load them. Defaults to 3.')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        create_users(args.users)
+        for model in (FlexUser, DirtyFieldsFlexUser):
+            elapsed = min(load(model) for _ in range(args.repeat))
+            peak = measure_memory(model)
+            print('{name}: {elapsed:.2f}s, {peak:.1f} MiB peak ({per_user:.0f} bytes per user)'.format(
+                name=model.__name__, elapsed=elapsed, peak=peak / 2 ** 20, per_user=peak / args.users
+            ))
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Measure the time taken to classify and normalize user identifiers (i.e. to work out whether a sign-in or search term
+is a username, an email address or a phone number).
+
+Identifiers are resolved by the inline logic which the views and forms once used, by an IdentifierResolver with its
+cache disabled and by an IdentifierResolver with its default cache. The workload is a mix of ASCII and Unicode
+usernames, email addresses and phone numbers in which identifiers recur, as they do in real traffic. Note that the
+inline logic doesn't convert phone numbers to E.164, which accounts for most of the cost of a cache miss, so the
+cached resolver only wins while the distinct identifiers fit in its cache (see FLEX_USER_IDENTIFIER_CACHE_SIZE).
+
+Usage (from the root of the repository):
+
+    python benchmarks/resolve_identifiers.py [--identifiers 100000] [--distinct 1000] [--repeat 3]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_project.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.exceptions import ValidationError  # noqa: E402
+
+from django_flex_user.identifiers import IdentifierResolver  # noqa: E402
+from django_flex_user.validators import FlexUserUnicodeUsernameValidator  # noqa: E402
+
+UserModel = get_user_model()
+
+
+def resolve_inline(value):
+    try:
+        FlexUserUnicodeUsernameValidator()(value)
+    except ValidationError:
+        if '@' in value:
+            return 'email', UserModel.objects.normalize_email(value)
+        return 'phone', value
+    return 'username', UserModel.normalize_username(value)
+
+
+def make_identifiers(count, distinct):
+    rng = random.Random(0)
+    pool = []
+    for i in range(distinct):
+        kind = i % 5
+        if kind == 0:
+            pool.append(f'user{i}')
+        elif kind == 1:
+            pool.append(f'üser{i}')
+        elif kind == 2:
+            pool.append(f'user{i}@EXAMPLE.com')
+        elif kind == 3:
+            pool.append(f'+1202{i:07d}')
+        else:
+            pool.append(f'(202) {i % 1000:03d}-{i % 10000:04d}')
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def measure(resolve, identifiers):
+    start = time.perf_counter()
+    for value in identifiers:
+        resolve(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--identifiers', type=int, default=100000,
+                        help='The number of identifiers to resolve. Defaults to 100000.')
+    parser.add_argument('--distinct', type=int, default=1000,
+                        help='The number of distinct identifiers among them. Defaults to 1000.')
+    parser.add_argument('--repeat', type=int, default=3, help='The number of times to resolve them. Defaults to 3.')
+    args = parser.parse_args()
+
+    identifiers = make_identifiers(args.identifiers, args.distinct)
+    # Each repetition gets a fresh resolver, so that every repetition starts with an empty cache
+    candidates = (
+        ('inline', lambda: resolve_inline),
+        ('IdentifierResolver (no cache)', lambda: IdentifierResolver(cache_size=0).resolve),
+        ('IdentifierResolver', lambda: IdentifierResolver().resolve),
+    )
+    for name, make_resolve in candidates:
+        elapsed = min(measure(make_resolve(), identifiers) for _ in range(args.repeat))
+        print('{name}: {elapsed:.3f}s ({per_identifier:.2f} us per identifier)'.format(
+            name=name, elapsed=elapsed, per_identifier=elapsed / args.identifiers * 1e6
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,13 @@
 from django.apps import AppConfig
+from django.core import checks
 
 
 class DjangoFlexUserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'django_flex_user'
     verbose_name = "Django Flex User"
+
+    def ready(self):
+        from django_flex_user.checks import check_delivery_settings
+
+        checks.register(check_delivery_settings)
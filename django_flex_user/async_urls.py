@@ -0,0 +1,23 @@
+from django.urls import path
+
+from rest_framework.urlpatterns import format_suffix_patterns
+
+from django_flex_user import views, async_views
+
+# The same endpoints as django_flex_user.urls, served by asynchronous views where it matters under ASGI
+
+urlpatterns = [
+    path('csrf-tokens/', views.get_csrf_token),
+    path('users/', async_views.FlexUsers.as_view()),
+    path('users/user/', async_views.FlexUser.as_view()),
+    path('users/export/', views.FlexUsersExport.as_view()),
+    path('users/user/oauth-providers/', views.OAuthProviders.as_view()),
+    path('sessions/', async_views.Sessions.as_view()),
+
+    path('otp-tokens/', views.OTPTokens.as_view()),
+    path('otp-tokens/email/<str:pk>', async_views.EmailToken.as_view(), name='email-token'),
+    path('otp-tokens/phone/<str:pk>', async_views.PhoneToken.as_view(), name='phone-token'),
+]
+
+# djangorestframework
+urlpatterns = format_suffix_patterns(urlpatterns)
@@ -0,0 +1,182 @@
+import asyncio
+
+from django.contrib.auth import login, logout
+
+from asgiref.sync import sync_to_async
+
+from rest_framework import status, generics
+from rest_framework.response import Response
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from django_flex_user.models.otp import EmailToken, PhoneToken, TransmissionError, TimeoutError
+from django_flex_user.delivery import is_delivery_queued, queue_new_password
+from django_flex_user.ratelimit import RateLimitExceeded, check_otp_generation
+from django_flex_user.serializers import FlexUserSerializer, AuthenticationSerializer, OTPSerializer
+
+try:
+    from asgiref.sync import markcoroutinefunction
+except ImportError:  # asgiref < 3.6
+    def markcoroutinefunction(func):
+        func._is_coroutine = asyncio.coroutines._is_coroutine
+        return func
+
+
+# These views are asynchronous counterparts of the views in django_flex_user.views. They're intended for projects served
+# by an ASGI server. See django_flex_user.async_urls.
+
+class AsyncAPIView(APIView):
+    """
+    An implementation of rest_framework.views.APIView whose handlers may be coroutines.
+
+    Authentication, permission and throttling checks run in a thread via asgiref.sync.sync_to_async because they may
+    query the database. Handlers are responsible for doing the same for any blocking work they perform.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # APIView.as_view wraps the view in a synchronous function (csrf_exempt) so we must mark it as a coroutine
+        # function ourselves. Otherwise Django won't await it.
+        return markcoroutinefunction(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            # Get the appropriate handler method
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncGenericAPIView(AsyncAPIView, generics.GenericAPIView):
+    pass
+
+
+class FlexUsers(AsyncGenericAPIView):
+    serializer_class = FlexUserSerializer
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    async def post(self, request):
+        # Equivalent to decorating this method with csrf_protect, which doesn't support coroutines
+        SessionAuthentication().enforce_csrf(request)
+
+        serializer = self.get_serializer(data=request.data)
+        if await sync_to_async(serializer.is_valid)():
+            user = await serializer.asave()
+            await sync_to_async(login)(request, user, backend='django_flex_user.backends.FlexUserModelBackend')
+            return Response(await sync_to_async(lambda: serializer.data)(), status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class FlexUser(AsyncGenericAPIView):
+    serializer_class = FlexUserSerializer
+    authentication_classes = [SessionAuthentication, JWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self):
+        return self.request.user
+
+    async def get(self, request):
+        user = self.get_object()
+        serializer = self.get_serializer(user)
+        return Response(await sync_to_async(lambda: serializer.data)())
+
+    async def patch(self, request):
+        user = self.get_object()
+        serializer = self.get_serializer(user, data=request.data, partial=True)
+        if await sync_to_async(serializer.is_valid)():
+            await serializer.asave()
+            return Response(await sync_to_async(lambda: serializer.data)(), status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class Sessions(AsyncGenericAPIView):
+    serializer_class = AuthenticationSerializer
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    async def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        if await serializer.ais_valid():
+            user = serializer.save()
+            await sync_to_async(login)(request, user)
+            return Response(await sync_to_async(lambda: serializer.data)(), status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    async def delete(request):
+        await sync_to_async(logout)(request)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class EmailToken(AsyncGenericAPIView):
+    queryset = EmailToken.objects.all()
+    serializer_class = OTPSerializer
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [AllowAny]
+
+    async def get(self, request, pk):
+        otp_token = await sync_to_async(self.get_object)()
+        try:
+            await sync_to_async(check_otp_generation)(request, otp_token)
+        except RateLimitExceeded as e:
+            return Response(status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+
+        if is_delivery_queued():
+            # Leave delivery to the flexuser_delivery_worker management command
+            await sync_to_async(queue_new_password)(otp_token)
+            return Response(status=status.HTTP_202_ACCEPTED)
+
+        await sync_to_async(otp_token.generate_password)()
+        try:
+            # The delivery function may block on network I/O. It doesn't need to share a thread with the ORM.
+            await sync_to_async(otp_token.send_password, thread_sensitive=False)()
+        except (TransmissionError, NotImplementedError):
+            return Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        else:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+    async def post(self, request, pk):
+        otp_token = await sync_to_async(self.get_object)()
+        serializer = self.get_serializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                success = await sync_to_async(otp_token.check_password)(serializer.validated_data['password'])
+            except TimeoutError as e:
+                return Response(status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+            else:
+                if success:
+                    jwt = await sync_to_async(lambda: RefreshToken.for_user(otp_token.user))()
+                    return Response({'refresh': str(jwt), 'access': str(jwt.access_token)}, status=status.HTTP_200_OK)
+                else:
+                    return Response(status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class PhoneToken(EmailToken):
+    queryset = PhoneToken.objects.all()
+    serializer_class = OTPSerializer
@@ -1,23 +1,170 @@
-from django.contrib.auth import get_user_model
+import inspect
+import re
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, load_backend
 from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, identify_hasher
+from django.contrib.auth.signals import user_login_failed
+from django.core.exceptions import PermissionDenied
+
+from asgiref.sync import sync_to_async
 
 from social_core.backends.facebook import FacebookOAuth2
 from social_core.backends.google import GoogleOAuth2
 
+from django_flex_user.cache import resolve_identity
+from django_flex_user.hashers import acheck_password, amake_password
+
 # Reference: https://docs.djangoproject.com/en/3.0/topics/auth/customizing/
 
 UserModel = get_user_model()
 
+_SENSITIVE_CREDENTIALS = re.compile('api|token|key|secret|password|signature', re.I)
+_CLEANSED_SUBSTITUTE = '********************'
+
+
+def _clean_credentials(credentials):
+    # Scrub the credentials sent with user_login_failed the same way django.contrib.auth.authenticate does
+    return {
+        key: _CLEANSED_SUBSTITUTE if _SENSITIVE_CREDENTIALS.search(key) else value
+        for key, value in credentials.items()
+    }
+
+
+async def aauthenticate(request=None, **credentials):
+    """
+    Asynchronous counterpart of :func:`django.contrib.auth.authenticate`.
+
+    Backends which implement ``aauthenticate`` (e.g. :class:`FlexUserModelBackend`) are awaited directly, other backends
+    are run in a thread.
+
+    :param request: HTTP Request object, defaults to None.
+    :type request: :class:`~django.http.HttpRequest`, optional
+    :param credentials: The credentials to authenticate.
+    :type credentials: dict
+    :return: A user object if the credentials are valid for any backend, None otherwise.
+    """
+    for backend_path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(backend_path)
+        try:
+            inspect.signature(backend.authenticate).bind(request, **credentials)
+        except TypeError:
+            # This backend doesn't accept these credentials as arguments. Try the next one.
+            continue
+
+        if hasattr(backend, 'aauthenticate'):
+            backend_authenticate = backend.aauthenticate
+        else:
+            backend_authenticate = sync_to_async(backend.authenticate)
+
+        try:
+            user = await backend_authenticate(request, **credentials)
+        except PermissionDenied:
+            # This backend says to stop in our tracks - this user should not be allowed in at all.
+            break
+        if user is None:
+            continue
+        # Annotate the user object with the path of the backend.
+        user.backend = backend_path
+        return user
+
+    # The credentials supplied are invalid to all backends, fire signal
+    await sync_to_async(user_login_failed.send)(
+        sender=__name__, credentials=_clean_credentials(credentials), request=request
+    )
+
+
+def _get_backends(request, user, password, credentials):
+    # Yield each backend along with the keyword arguments to authenticate with. FlexUserModelBackend is handed the user
+    # the caller has already fetched, other backends get the credentials the client supplied (as they would from
+    # django.contrib.auth.authenticate) if they accept them.
+    for backend_path in settings.AUTHENTICATION_BACKENDS:
+        backend = load_backend(backend_path)
+        if isinstance(backend, FlexUserModelBackend):
+            yield backend_path, backend, {'user': user, 'password': password}
+            continue
+
+        backend_credentials = {**credentials, 'password': password}
+        try:
+            inspect.signature(backend.authenticate).bind(request, **backend_credentials)
+        except TypeError:
+            # This backend doesn't accept these credentials as arguments. Try the next one.
+            continue
+        yield backend_path, backend, backend_credentials
+
+
+def authenticate_user(request, user, password, **credentials):
+    """
+    Check the password of a user whom the caller has already fetched (e.g. to report that no user has the supplied
+    identifier).
+
+    Like :func:`django.contrib.auth.authenticate`, each of ``AUTHENTICATION_BACKENDS`` is tried in turn, the user is
+    annotated with the path of the backend that accepted the password and ``user_login_failed`` is sent if none did.
+    :class:`FlexUserModelBackend` checks the password of the given user rather than fetching them again. Other
+    backends are passed the credentials. The user object isn't included in the signal's credentials.
+
+    :param request: HTTP Request object.
+    :type request: :class:`~django.http.HttpRequest`
+    :param user: The user whose password to check.
+    :type user: ~django_flex_user.models.user.FlexUser
+    :param password: The password.
+    :type password: str
+    :param credentials: The rest of the credentials supplied by the client (e.g. the user's username).
+    :type credentials: dict
+    :return: The user if the password is valid, None otherwise.
+    :rtype: None, ~django_flex_user.models.user.FlexUser
+    """
+    for backend_path, backend, backend_credentials in _get_backends(request, user, password, credentials):
+        try:
+            authenticated_user = backend.authenticate(request, **backend_credentials)
+        except PermissionDenied:
+            break
+        if authenticated_user is not None:
+            authenticated_user.backend = backend_path
+            return authenticated_user
+
+    user_login_failed.send(
+        sender=__name__, credentials=_clean_credentials({**credentials, 'password': password}), request=request
+    )
+
+
+async def aauthenticate_user(request, user, password, **credentials):
+    """
+    Asynchronous counterpart of :func:`authenticate_user`.
+    """
+    for backend_path, backend, backend_credentials in _get_backends(request, user, password, credentials):
+        if hasattr(backend, 'aauthenticate'):
+            backend_authenticate = backend.aauthenticate
+        else:
+            backend_authenticate = sync_to_async(backend.authenticate)
+
+        try:
+            authenticated_user = await backend_authenticate(request, **backend_credentials)
+        except PermissionDenied:
+            break
+        if authenticated_user is not None:
+            authenticated_user.backend = backend_path
+            return authenticated_user
+
+    await sync_to_async(user_login_failed.send)(
+        sender=__name__, credentials=_clean_credentials({**credentials, 'password': password}), request=request
+    )
+
 
 class FlexUserModelBackend(ModelBackend):
     """
     Our implementation of django.contrib.auth.backends.ModelBackend.
     """
 
-    def authenticate(self, request, username=None, email=None, phone=None, password=None):
+    def authenticate(self, request, username=None, email=None, phone=None, password=None, user=None):
         """
         If the given credentials are valid, return a user object.
 
+        Callers which have already fetched the user (e.g. to report that no user has the supplied identifier) may pass
+        it as ``user`` to save this method from fetching it again. In that case ``username``, ``email`` and ``phone``
+        are ignored.
+
         :param request: HTTP Request object
         :type request: :class:`~django.http.HttpRequest`
         :param username: The user's username, defaults to None.
@@ -28,19 +175,95 @@ class FlexUserModelBackend(ModelBackend):
         :type phone: str, optional
         :param password: The user's password, defaults to None.
         :type password: str, optional
+        :param user: The user whose password to check, defaults to None.
+        :type user: ~django_flex_user.models.user.FlexUser, optional
         :return: A user object if the credentials are valid, None otherwise.
         :rtype: None, ~django_flex_user.models.user.FlexUser
         """
 
-        try:
-            user = UserModel._default_manager.get_by_natural_key(username, email, phone)
-        except UserModel.DoesNotExist:
+        if user is not None:
+            if user.has_usable_password():
+                if user.check_password(password) and self.user_can_authenticate(user):
+                    return user
+            else:
+                # Run the default password hasher once to reduce the timing difference between a user with and without
+                # a usable password
+                UserModel().set_password(password)
+            return None
+
+        identity = self._get_identity(username, email, phone)
+
+        if identity:
+            # Load the rest of the user only once we know the password is correct
+            if check_password(password, identity.password) and self.user_can_authenticate(identity):
+                return self._get_user(identity, password)
+        else:
             # Run the default password hasher once to reduce the timing
             # difference between an existing and a nonexistent user (#20760).
             UserModel().set_password(password)
+
+    async def aauthenticate(self, request, username=None, email=None, phone=None, password=None, user=None):
+        """
+        Asynchronous counterpart of :meth:`authenticate`.
+
+        Database queries run in a thread via :func:`~asgiref.sync.sync_to_async` while the password is hashed on the
+        executor returned by :func:`django_flex_user.hashers.get_executor`.
+
+        :param request: HTTP Request object
+        :type request: :class:`~django.http.HttpRequest`
+        :param username: The user's username, defaults to None.
+        :type username: str, optional
+        :param email: The user's email address, defaults to None.
+        :type email: str, optional
+        :param phone: The user's phone number, defaults to None.
+        :type phone: str, optional
+        :param password: The user's password, defaults to None.
+        :type password: str, optional
+        :param user: The user whose password to check, defaults to None.
+        :type user: ~django_flex_user.models.user.FlexUser, optional
+        :return: A user object if the credentials are valid, None otherwise.
+        :rtype: None, ~django_flex_user.models.user.FlexUser
+        """
+
+        if user is not None:
+            if user.has_usable_password():
+                if await acheck_password(password, user.password) and self.user_can_authenticate(user):
+                    await sync_to_async(self._upgrade_password)(user, password)
+                    return user
+            else:
+                await amake_password(password)
+            return None
+
+        identity = await sync_to_async(self._get_identity)(username, email, phone)
+
+        if identity:
+            if await acheck_password(password, identity.password) and self.user_can_authenticate(identity):
+                return await sync_to_async(self._get_user)(identity, password)
         else:
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
+            await amake_password(password)
+
+    @staticmethod
+    def _get_identity(username, email, phone):
+        return resolve_identity(username, email, phone)
+
+    def _get_user(self, identity, password):
+        user = UserModel._default_manager.filter(pk=identity.pk).first()
+
+        # The user may have been modified since we read their identity, or the identity may have come from a stale cache
+        # entry (e.g. if the user was modified by QuerySet.update, which doesn't send signals). Either way we fail
+        # closed.
+        if user is None or user.password != identity.password or not self.user_can_authenticate(user):
+            return None
+
+        self._upgrade_password(user, password)
+        return user
+
+    @staticmethod
+    def _upgrade_password(user, password):
+        if identify_hasher(user.password).must_update(user.password):
+            # Upgrade the user's password hash the same way AbstractBaseUser.check_password would
+            user.set_password(password)
+            user.save(update_fields=['password'])
 
 
 class FlexUserFacebookOAuth2(FacebookOAuth2):
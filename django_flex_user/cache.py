@@ -0,0 +1,138 @@
+import hashlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+
+from django_flex_user.identifiers import to_e164
+
+# Bump this whenever the layout of cached entries changes so that entries written by older code are never read back
+IDENTITY_CACHE_VERSION = 2
+
+IDENTITY_FIELDS = ('username', 'email', 'phone')
+
+# A cache entry for a user that exists. It holds just enough state to check a password without touching the database,
+# which includes the user's password hash, so the cache must be as private as the user table.
+Identity = namedtuple('Identity', ['pk', 'password', 'is_active'])
+
+# A cache entry for an identifier which doesn't belong to any user (i.e. a negative entry)
+_MISSING = 0
+
+
+def get_identity_cache():
+    """
+    Return the cache configured by ``FLEX_USER_IDENTITY_CACHE``, or None if the identity cache is disabled.
+
+    :return: The identity cache.
+    :rtype: None, ~django.core.cache.backends.base.BaseCache
+    """
+    alias = getattr(settings, 'FLEX_USER_IDENTITY_CACHE', None)
+    return caches[alias] if alias is not None else None
+
+
+def _normalize_identifier(field_name, value):
+    if field_name == 'username':
+        # Username lookups are case-insensitive
+        return get_user_model()._meta.get_field('username').fold_case(value)
+    if field_name == 'phone':
+        # Phone numbers are compared by their database representation (i.e. E.164)
+        return to_e164(value) or str(get_user_model()._meta.get_field('phone').get_prep_value(value))
+    return value
+
+
+def _make_key(field_name, value):
+    value = _normalize_identifier(field_name, value)
+    digest = hashlib.sha256(value.encode('utf-8')).hexdigest()
+    return f'flex_user:identity:{field_name}:{digest}'
+
+
+def _get_identifier(username=None, email=None, phone=None):
+    """
+    Return the single identifier supplied by the caller as a tuple of field name and value, or None if the caller
+    supplied any other number of identifiers. Lookups by a combination of identifiers are not cached.
+    """
+    identifiers = [(k, v) for k, v in (('username', username), ('email', email), ('phone', phone)) if v is not None]
+    return identifiers[0] if len(identifiers) == 1 else None
+
+
+def get_identity(username=None, email=None, phone=None):
+    """
+    Look up a user's identity in the identity cache.
+
+    :return: An :class:`Identity` if the user is cached, False if the identifier is cached as belonging to no user, or
+        None if the identifier isn't cached (or can't be cached).
+    :rtype: None, bool, Identity
+    """
+    cache = get_identity_cache()
+    identifier = _get_identifier(username, email, phone)
+    if cache is None or identifier is None:
+        return None
+
+    entry = cache.get(_make_key(*identifier), version=IDENTITY_CACHE_VERSION)
+    if entry is None:
+        return None
+    if entry == _MISSING:
+        return False
+    return Identity(*entry)
+
+
+def set_identity(identity, username=None, email=None, phone=None):
+    """
+    Store a user's identity in the identity cache. If ``identity`` is None, store a negative entry instead.
+    """
+    cache = get_identity_cache()
+    identifier = _get_identifier(username, email, phone)
+    if cache is None or identifier is None:
+        return
+
+    if identity is None:
+        value, timeout = _MISSING, getattr(settings, 'FLEX_USER_IDENTITY_CACHE_MISS_TIMEOUT', 60)
+    else:
+        value, timeout = tuple(identity), getattr(settings, 'FLEX_USER_IDENTITY_CACHE_TIMEOUT', 300)
+
+    cache.set(_make_key(*identifier), value, timeout, version=IDENTITY_CACHE_VERSION)
+
+
+def resolve_identity(username=None, email=None, phone=None):
+    """
+    Look up a user's identity in the identity cache, or in the database if it isn't cached. Identities (and the absence
+    of one) read from the database are added to the cache.
+
+    :return: An :class:`Identity`, or False if no user has the given identifier.
+    :rtype: bool, Identity
+    """
+    identity = get_identity(username, email, phone)
+
+    if identity is None:
+        # The identity cache is disabled or doesn't know about this user, so we consult the database
+        user_model = get_user_model()
+        try:
+            identity = user_model._default_manager.get_identity_by_natural_key(username, email, phone)
+        except user_model.DoesNotExist:
+            identity = False
+        set_identity(identity or None, username, email, phone)
+
+    return identity
+
+
+def invalidate_identifiers(identifiers):
+    """
+    Remove cache entries for the supplied identifiers.
+
+    The entries are removed immediately and then once more when the current transaction commits. The second pass
+    discards entries that a concurrent request repopulated from the database before our changes became visible to it.
+
+    :param identifiers: An iterable of (field name, value) tuples. Tuples whose value is None are ignored.
+    """
+    cache = get_identity_cache()
+    if cache is None:
+        return
+
+    keys = {_make_key(k, v) for k, v in identifiers if v is not None}
+    if not keys:
+        return
+
+    cache.delete_many(keys, version=IDENTITY_CACHE_VERSION)
+    transaction.on_commit(lambda: cache.delete_many(keys, version=IDENTITY_CACHE_VERSION))
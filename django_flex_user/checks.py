@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.checks import Warning
+
+from django_flex_user.delivery_backends import CHANNEL_SETTINGS
+
+
+def check_delivery_settings(app_configs, **kwargs):
+    """
+    Warn about delivery channels which are configured by both a backend setting and a function setting, because the
+    function setting is ignored.
+    """
+    errors = []
+    for backend_setting, _options_setting, function_setting in CHANNEL_SETTINGS.values():
+        if getattr(settings, backend_setting, None) is not None and getattr(settings, function_setting, None) is not None:
+            errors.append(Warning(
+                '{backend_setting} and {function_setting} are both set.'.format(
+                    backend_setting=backend_setting, function_setting=function_setting
+                ),
+                hint='{function_setting} is ignored. Remove one of them.'.format(function_setting=function_setting),
+                id='django_flex_user.W001',
+            ))
+    return errors
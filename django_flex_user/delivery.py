@@ -0,0 +1,157 @@
+import math
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from django_flex_user.delivery_backends import get_delivery_backend
+from django_flex_user.models.outbox import OutboxMessage
+
+
+def is_delivery_queued():
+    """
+    Return True if the one-time password views should queue passwords for delivery by the ``flexuser_delivery_worker``
+    management command rather than sending them during the request (i.e. if ``FLEX_USER_OTP_DELIVERY_QUEUE`` is set).
+
+    :rtype: bool
+    """
+    return getattr(settings, 'FLEX_USER_OTP_DELIVERY_QUEUE', False)
+
+
+def queue_new_password(token, priority=OutboxMessage.PRIORITY_HIGH):
+    """
+    Generate a new password for the token and queue it for delivery, in a single transaction.
+
+    :param token: The token.
+    :type token: ~django_flex_user.models.otp.SideChannelToken
+    :param priority: The priority of the message, defaults to
+        :attr:`~django_flex_user.models.outbox.OutboxMessage.PRIORITY_HIGH` because someone is usually waiting for it.
+    :type priority: int, optional
+    :return: The queued message.
+    :rtype: ~django_flex_user.models.outbox.OutboxMessage
+    """
+    with transaction.atomic(using=token._state.db):
+        token.generate_password()
+        return token.queue_password(priority=priority)
+
+
+def claim_messages(batch_size=100, lease=timedelta(minutes=5), priorities=None, using=DEFAULT_DB_ALIAS):
+    """
+    Claim up to ``batch_size`` pending messages for delivery, most urgent first.
+
+    Claimed messages are hidden from other workers for the duration of the lease. If the worker dies before recording
+    the outcome, the messages become available again once the lease expires (i.e. delivery is at least once).
+
+    :param batch_size: The maximum number of messages to claim, defaults to 100.
+    :type batch_size: int, optional
+    :param lease: How long to hold the messages for, defaults to 5 minutes.
+    :type lease: ~datetime.timedelta, optional
+    :param priorities: The priorities (i.e. lanes) to claim messages from, defaults to None (i.e. all of them).
+    :type priorities: list, optional
+    :param using: The database, defaults to the default database.
+    :type using: str, optional
+    :return: The claimed messages.
+    :rtype: list
+    """
+    now = timezone.now()
+    queryset = OutboxMessage.objects.using(using).filter(status=OutboxMessage.STATUS_PENDING, available_at__lte=now)
+    if priorities:
+        queryset = queryset.filter(priority__in=priorities)
+
+    pks = list(queryset.order_by('priority', 'available_at', 'pk').values_list('pk', flat=True)[:batch_size])
+    if not pks:
+        return []
+
+    # Repeating the lookup makes the claim conditional, so a message claimed by a concurrent worker isn't claimed again
+    claim = uuid.uuid4()
+    queryset.filter(pk__in=pks).update(claim=claim, available_at=now + lease, attempts=F('attempts') + 1)
+
+    return list(
+        OutboxMessage.objects.using(using).filter(claim=claim, pk__in=pks)
+        .select_related('email_token__user', 'phone_token__user')
+        .order_by('priority', 'available_at', 'pk')
+    )
+
+
+def _send_many(channel, messages):
+    backend = get_delivery_backend(channel)
+    if backend is None:
+        return [NotImplementedError()] * len(messages)
+    try:
+        return backend.send_many([(message.token, message.kwargs) for message in messages])
+    except Exception as e:
+        return [e] * len(messages)
+
+
+def deliver_messages(messages, concurrency=4, max_attempts=None):
+    """
+    Deliver claimed messages using a pool of ``concurrency`` threads and record the outcome of each. The messages of
+    each delivery channel are split into at most ``concurrency`` batches, each of which is sent using a single call to
+    :meth:`~django_flex_user.delivery_backends.BaseDeliveryBackend.send_many`.
+
+    A message whose token no longer exists or no longer holds an unexpired password is skipped. A message whose
+    delivery fails is retried after :meth:`~django_flex_user.models.outbox.OutboxMessage.get_retry_delay`, unless it
+    has been attempted ``max_attempts`` times or no delivery backend is configured, in which case it's dead-lettered.
+
+    :param messages: Messages returned by :func:`claim_messages`.
+    :type messages: list
+    :param concurrency: The number of messages to deliver at once, defaults to 4.
+    :type concurrency: int, optional
+    :param max_attempts: The number of attempts after which to give up on a message, defaults to
+        ``FLEX_USER_OTP_DELIVERY_MAX_ATTEMPTS`` (5).
+    :type max_attempts: int, optional
+    :return: A dict which maps each status to the number of messages which ended up in it.
+    :rtype: dict
+    """
+    if max_attempts is None:
+        max_attempts = getattr(settings, 'FLEX_USER_OTP_DELIVERY_MAX_ATTEMPTS', 5)
+
+    counts = dict.fromkeys((k for k, _ in OutboxMessage.STATUS_CHOICES), 0)
+    now = timezone.now()
+
+    sendable = []
+    for message in messages:
+        token = message.token
+        if token is None or token.password is None or (token.expiration is not None and token.expiration <= now):
+            message.status = OutboxMessage.STATUS_SKIPPED
+            message.save(update_fields=['status'])
+            counts[message.status] += 1
+        else:
+            sendable.append(message)
+
+    # Messages are sent in batches, one per channel and thread, so that each batch can be sent over a single
+    # connection or using the provider's bulk API (see BaseDeliveryBackend.send_many)
+    batches = []
+    for channel in sorted({message.token.delivery_channel for message in sendable}):
+        channel_messages = [message for message in sendable if message.token.delivery_channel == channel]
+        size = math.ceil(len(channel_messages) / concurrency)
+        batches.extend((channel, channel_messages[i:i + size]) for i in range(0, len(channel_messages), size))
+
+    # Only the delivery backends run on the pool. The messages were fetched along with their tokens and users, and
+    # their outcomes are saved from this thread.
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda batch: _send_many(*batch), batches))
+
+    outcomes = [
+        (message, error) for (_, batch), errors in zip(batches, results) for message, error in zip(batch, errors)
+    ]
+    for message, error in outcomes:
+        now = timezone.now()
+        if error is None:
+            message.status = OutboxMessage.STATUS_SENT
+            message.sent_at = now
+            message.last_error = ''
+        else:
+            message.last_error = '{type}: {error}'.format(type=type(error).__name__, error=error)
+            if isinstance(error, NotImplementedError) or message.attempts >= max_attempts:
+                message.status = OutboxMessage.STATUS_DEAD
+            else:
+                message.available_at = now + message.get_retry_delay()
+        message.save(update_fields=['status', 'sent_at', 'last_error', 'available_at'])
+        counts[message.status] += 1
+
+    return counts
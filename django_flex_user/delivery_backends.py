@@ -0,0 +1,387 @@
+import importlib
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# The settings which configure the backend of each delivery channel, in order of precedence
+CHANNEL_SETTINGS = {
+    'email': ('FLEX_USER_OTP_EMAIL_BACKEND', 'FLEX_USER_OTP_EMAIL_BACKEND_OPTIONS', 'FLEX_USER_OTP_EMAIL_FUNCTION'),
+    'sms': ('FLEX_USER_OTP_SMS_BACKEND', 'FLEX_USER_OTP_SMS_BACKEND_OPTIONS', 'FLEX_USER_OTP_SMS_FUNCTION'),
+}
+
+# Backends are created the first time they're used and reused for the lifetime of the process
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _import_string(name):
+    module_name, member_name = name.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), member_name)
+
+
+def get_delivery_backend(channel):
+    """
+    Return the delivery backend of a channel, or None if the channel isn't configured.
+
+    The backend is configured by ``FLEX_USER_OTP_EMAIL_BACKEND`` (or ``FLEX_USER_OTP_SMS_BACKEND``) and the keyword
+    arguments in ``FLEX_USER_OTP_EMAIL_BACKEND_OPTIONS`` (or ``FLEX_USER_OTP_SMS_BACKEND_OPTIONS``). If no backend is
+    configured, the function named by ``FLEX_USER_OTP_EMAIL_FUNCTION`` (or ``FLEX_USER_OTP_SMS_FUNCTION``) is wrapped in
+    a :class:`FunctionDeliveryBackend`. The backend is created once per process.
+
+    :param channel: Either ``'email'`` or ``'sms'``.
+    :type channel: str
+    :rtype: None, BaseDeliveryBackend
+    """
+    try:
+        return _backends[channel]
+    except KeyError:
+        pass
+
+    with _backends_lock:
+        if channel not in _backends:
+            backend_setting, options_setting, function_setting = CHANNEL_SETTINGS[channel]
+            backend_name = getattr(settings, backend_setting, None)
+            function_name = getattr(settings, function_setting, None)
+            if backend_name is not None:
+                backend = _import_string(backend_name)(**getattr(settings, options_setting, {}))
+            elif function_name is not None:
+                backend = FunctionDeliveryBackend(_import_string(function_name))
+            else:
+                backend = None
+            _backends[channel] = backend
+        return _backends[channel]
+
+
+def close_delivery_backends():
+    """
+    Close the delivery backends created by :func:`get_delivery_backend` along with their connections. They're created
+    again the next time they're used.
+    """
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        if backend is not None:
+            backend.close()
+
+
+@receiver(setting_changed)
+def _reset_delivery_backends(setting, **kwargs):
+    if any(setting in names for names in CHANNEL_SETTINGS.values()):
+        close_delivery_backends()
+
+
+class BaseDeliveryBackend:
+    """
+    Sends one-time passwords over a side channel (e.g. email or SMS).
+
+    A single instance of each configured backend serves the whole process, so :meth:`send` may be called by several
+    threads at once.
+    """
+
+    def send(self, token, **kwargs):
+        """
+        Send the token's password.
+
+        :param token: The token.
+        :type token: ~django_flex_user.models.otp.SideChannelToken
+        :param kwargs: The keyword arguments passed to
+            :meth:`~django_flex_user.models.otp.SideChannelToken.send_password`.
+        :raises ~django_flex_user.models.otp.TransmissionError: If the password fails to send.
+        """
+        raise NotImplementedError
+
+    def send_many(self, items):
+        """
+        Send the passwords of several tokens. Backends which can send several passwords more cheaply than one at a time
+        (e.g. over one connection or using a provider's bulk API) override this method. By default, each password is
+        sent using :meth:`send`.
+
+        :param items: A list of (token, kwargs) tuples, where kwargs is a dict of the keyword arguments for the token.
+        :type items: list
+        :return: A list which holds, for each item, None if its password was sent or the exception raised trying to
+            send it.
+        :rtype: list
+        """
+        errors = []
+        for token, kwargs in items:
+            try:
+                self.send(token, **kwargs)
+            except Exception as e:
+                errors.append(e)
+            else:
+                errors.append(None)
+        return errors
+
+    def close(self):
+        """
+        Release the resources (e.g. connections) held by the backend.
+        """
+        pass
+
+
+class FunctionDeliveryBackend(BaseDeliveryBackend):
+    """
+    Sends one-time passwords by calling a function with the signature of ``FLEX_USER_OTP_EMAIL_FUNCTION`` (or
+    ``FLEX_USER_OTP_SMS_FUNCTION``).
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def send(self, token, **kwargs):
+        self.function(token, **kwargs)
+
+
+class PooledDeliveryBackend(BaseDeliveryBackend):
+    """
+    A backend which reuses its connections across sends. Each send borrows a connection from a pool of up to
+    ``pool_size`` idle connections, opening a new one if the pool is empty, and returns it afterwards. A connection is
+    discarded rather than returned if the send fails.
+    """
+
+    def __init__(self, pool_size=10, timeout=10):
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def open_connection(self):
+        """
+        Open and return a new connection.
+        """
+        raise NotImplementedError
+
+    def close_connection(self, connection):
+        """
+        Close a connection, ignoring any errors.
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self._pool.get_nowait()
+        except queue.Empty:
+            connection = self.open_connection()
+
+        try:
+            yield connection
+        except BaseException:
+            self.close_connection(connection)
+            raise
+
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            self.close_connection(connection)
+
+    def close(self):
+        while True:
+            try:
+                connection = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            self.close_connection(connection)
+
+
+class SMTPDeliveryBackend(PooledDeliveryBackend):
+    """
+    Sends one-time passwords by email over pooled connections to the mail server configured by
+    :setting:`EMAIL_BACKEND`. Connections are kept open between messages and reopened if the server drops them.
+
+    Override :meth:`get_message` to customize the message.
+    """
+
+    subject = 'Your verification code'
+
+    def __init__(self, from_email=None, pool_size=10, timeout=10, **connection_options):
+        super().__init__(pool_size=pool_size, timeout=timeout)
+        self.from_email = from_email
+        # Keyword arguments for django.core.mail.get_connection (e.g. host, port, username, password or use_tls)
+        self.connection_options = connection_options
+
+    def get_message(self, token, **kwargs):
+        """
+        Return the email message which delivers the token's password.
+
+        :rtype: ~django.core.mail.EmailMessage
+        """
+        return EmailMessage(
+            self.subject, f'Your verification code is {token.password}', self.from_email, [token.email]
+        )
+
+    def open_connection(self):
+        connection = get_connection(fail_silently=False, timeout=self.timeout, **self.connection_options)
+        connection.open()
+        return connection
+
+    def close_connection(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def send(self, token, **kwargs):
+        error, = self.send_many([(token, kwargs)])
+        if error is not None:
+            raise error
+
+    def send_many(self, items):
+        # All of the messages are sent over one connection (i.e. like django.core.mail.send_mass_mail), but one at a
+        # time so that a rejected message doesn't stop the rest
+        errors = []
+        with self.connection() as connection:
+            for token, kwargs in items:
+                try:
+                    self._send_message(connection, self.get_message(token, **kwargs))
+                except (smtplib.SMTPException, OSError, ValueError) as e:
+                    if isinstance(e, OSError) and not isinstance(e, smtplib.SMTPResponseException):
+                        # The connection is broken, the next message reopens it
+                        connection.close()
+                    errors.append(_make_transmission_error(e))
+                else:
+                    errors.append(None)
+        return errors
+
+    @staticmethod
+    def _send_message(connection, message):
+        # Opening a connection which is already open does nothing
+        connection.open()
+        try:
+            connection.send_messages([message])
+        except smtplib.SMTPServerDisconnected:
+            # The server closed the connection while it was idle in the pool
+            connection.close()
+            connection.open()
+            connection.send_messages([message])
+
+
+class HTTPDeliveryBackend(PooledDeliveryBackend):
+    """
+    Sends one-time passwords using an HTTP API (e.g. an SMS provider's) over pooled keep-alive connections. Requires
+    `requests <https://requests.readthedocs.io/>`_.
+
+    Override :meth:`get_request` to describe the request and :meth:`check_response` to interpret the response. If the
+    provider can send several messages per request, also set :attr:`bulk_size` and override :meth:`get_bulk_request`
+    and :meth:`check_bulk_response`.
+    """
+
+    # The maximum number of passwords to send per request. Passwords are sent one per request unless it's over 1.
+    bulk_size = 1
+
+    def __init__(self, pool_size=10, timeout=10, headers=None):
+        super().__init__(pool_size=pool_size, timeout=timeout)
+        self.headers = headers or {}
+
+    def get_request(self, token, **kwargs):
+        """
+        Return the keyword arguments of the request which delivers the token's password (e.g. ``method``, ``url`` and
+        ``data``), see :meth:`requests.Session.request`.
+
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+    def check_response(self, response):
+        """
+        Raise :class:`~django_flex_user.models.otp.TransmissionError` if the response indicates that the password
+        failed to send. By default, responses with an error status code are rejected.
+
+        :param response: The response.
+        :type response: ~requests.Response
+        """
+        from django_flex_user.models.otp import TransmissionError
+
+        if not response.ok:
+            raise TransmissionError(f'{response.status_code} {response.reason}')
+
+    def get_bulk_request(self, items):
+        """
+        Return the keyword arguments of the request which delivers the passwords of up to :attr:`bulk_size` tokens.
+
+        :param items: A list of (token, kwargs) tuples, see :meth:`~BaseDeliveryBackend.send_many`.
+        :type items: list
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+    def check_bulk_response(self, response, items):
+        """
+        Map the response to a request returned by :meth:`get_bulk_request` back to its items. By default, every item
+        fails if the response has an error status code and succeeds otherwise.
+
+        :param response: The response.
+        :type response: ~requests.Response
+        :param items: The items which were sent.
+        :type items: list
+        :return: A list which holds, for each item, None if its password was sent or an exception (e.g.
+            :class:`~django_flex_user.models.otp.TransmissionError`) if it wasn't.
+        :rtype: list
+        """
+        try:
+            self.check_response(response)
+        except Exception as e:
+            return [e] * len(items)
+        return [None] * len(items)
+
+    def open_connection(self):
+        import requests
+
+        session = requests.Session()
+        session.headers.update(self.headers)
+        # Each session is used by one thread at a time, so it needs only one connection per host
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close_connection(self, connection):
+        connection.close()
+
+    def send(self, token, **kwargs):
+        error, = self.send_many([(token, kwargs)])
+        if error is not None:
+            raise error
+
+    def send_many(self, items):
+        import requests
+
+        errors = []
+        with self.connection() as session:
+            if self.bulk_size > 1:
+                for i in range(0, len(items), self.bulk_size):
+                    chunk = items[i:i + self.bulk_size]
+                    try:
+                        response = self._request(session, self.get_bulk_request(chunk))
+                    except requests.RequestException as e:
+                        errors.extend([_make_transmission_error(e)] * len(chunk))
+                    else:
+                        errors.extend(self.check_bulk_response(response, chunk))
+            else:
+                for token, kwargs in items:
+                    try:
+                        self.check_response(self._request(session, self.get_request(token, **kwargs)))
+                    except requests.RequestException as e:
+                        errors.append(_make_transmission_error(e))
+                    except Exception as e:
+                        errors.append(e)
+                    else:
+                        errors.append(None)
+        return errors
+
+    def _request(self, session, request):
+        request.setdefault('timeout', self.timeout)
+        return session.request(**request)
+
+
+def _make_transmission_error(cause):
+    from django_flex_user.models.otp import TransmissionError
+
+    error = TransmissionError(str(cause))
+    error.__cause__ = cause
+    return error
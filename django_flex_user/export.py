@@ -0,0 +1,111 @@
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+
+EXPORT_FIELDS = (
+    'id', 'username', 'email', 'email_verified', 'phone', 'phone_verified', 'is_active', 'is_staff', 'date_joined'
+)
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/jsonl; charset=utf-8',
+}
+
+
+def iter_users(queryset=None, chunk_size=2000):
+    """
+    Iterate over users along with the verification status of their email address and phone number.
+
+    Users are fetched in order of primary key, one page of ``chunk_size`` users at a time. Each page is fetched using a
+    single query and read using a server-side cursor where the database supports them. Each page begins after the last
+    primary key of the previous page (i.e. keyset pagination), so the cost of fetching a page doesn't grow with its
+    position and memory use is bounded by ``chunk_size``.
+
+    :param queryset: The users to export, defaults to all users.
+    :type queryset: ~django.db.models.query.QuerySet, optional
+    :param chunk_size: The number of users to fetch per query, defaults to 2000.
+    :type chunk_size: int, optional
+    :return: An iterator of dicts whose keys are :data:`EXPORT_FIELDS`. ``email_verified`` and ``phone_verified`` are
+        None for users without an email address or phone number respectively.
+    :rtype: ~collections.abc.Iterator
+    """
+    if queryset is None:
+        queryset = get_user_model().objects.all()
+
+    queryset = queryset.order_by('pk').values_list(*EXPORT_FIELDS)
+
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        count = 0
+        for row in page[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            last_pk = row[0]
+            yield dict(zip(EXPORT_FIELDS, row))
+        if count < chunk_size:
+            return
+
+
+def _serialize(user):
+    # Convert values to their JSON representation
+    user = dict(user)
+    if user['phone'] is not None:
+        user['phone'] = str(user['phone'])
+    user['date_joined'] = user['date_joined'].isoformat()
+    return user
+
+
+class _Echo:
+    # A file-like object whose write method returns its argument, for use with csv.writer. See
+    # https://docs.djangoproject.com/en/4.0/howto/outputting-csv/#streaming-large-csv-files
+    @staticmethod
+    def write(value):
+        return value
+
+
+def iter_csv(users):
+    """
+    Encode users returned by :func:`iter_users` as CSV, including a header row.
+
+    :param users: The users to encode.
+    :type users: iterable
+    :return: An iterator of CSV rows.
+    :rtype: ~collections.abc.Iterator
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for user in users:
+        user = _serialize(user)
+        yield writer.writerow(['' if user[k] is None else user[k] for k in EXPORT_FIELDS])
+
+
+def iter_jsonl(users):
+    """
+    Encode users returned by :func:`iter_users` as JSONL (i.e. one JSON object per line).
+
+    :param users: The users to encode.
+    :type users: iterable
+    :return: An iterator of lines.
+    :rtype: ~collections.abc.Iterator
+    """
+    for user in users:
+        yield json.dumps(_serialize(user)) + '\n'
+
+
+def iter_export(export_format, queryset=None, chunk_size=2000):
+    """
+    Export users in the given format. See :func:`iter_users`.
+
+    :param export_format: One of :data:`EXPORT_FORMATS`.
+    :type export_format: str
+    :return: An iterator of encoded rows.
+    :rtype: ~collections.abc.Iterator
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError('Unknown export format: {export_format}'.format(export_format=export_format))
+
+    users = iter_users(queryset, chunk_size)
+    return iter_csv(users) if export_format == 'csv' else iter_jsonl(users)
@@ -10,13 +10,56 @@ try:
     if connection.vendor != 'postgresql':
         raise RuntimeError
 
-
     class CICharField(PGCICharField):
-        pass
+        @staticmethod
+        def fold_case(value):
+            """
+            Fold the case of a value the way the database compares values of this field (citext compares their
+            lowercase forms).
+            """
+            return value.lower()
 
 except (ModuleNotFoundError, RuntimeError):
-    from django.db import models
+    import string
+
+    from django.db import connection, models
+    from django.db.models.lookups import Exact, IExact, In
+
+    _ASCII_UPPER = str.maketrans(string.ascii_lowercase, string.ascii_uppercase)
+
+    class CaseInsensitiveExact(Exact):
+        """
+        Case-insensitive implementation of the "exact" lookup which compares ``UPPER(column)`` to ``UPPER(value)``.
+
+        Unlike "iexact", which is a ``LIKE`` comparison on SQLite, it can be answered by an index on ``UPPER(column)``
+        (see ``FlexUser.Meta.constraints``). Backends which don't support expression indexes use "iexact" instead.
+        """
+
+        lookup_name = 'ciexact'
 
+        def as_sql(self, compiler, connection):
+            if not connection.features.supports_expression_indexes:
+                return IExact(self.lhs, self.rhs).as_sql(compiler, connection)
+            lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+            rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+            return f'UPPER({lhs_sql}) = UPPER({rhs_sql})', (*lhs_params, *rhs_params)
+
+    class CaseInsensitiveIn(In):
+        """
+        Case-insensitive implementation of the "in" lookup. Django doesn't provide one.
+        """
+
+        lookup_name = 'iin'
+
+        def process_lhs(self, compiler, connection, lhs=None):
+            lhs_sql, params = super().process_lhs(compiler, connection, lhs)
+            if self.rhs_is_direct_value():
+                lhs_sql = f'UPPER({lhs_sql})'
+            return lhs_sql, params
+
+        def batch_process_rhs(self, compiler, connection, rhs=None):
+            sqls, params = super().batch_process_rhs(compiler, connection, rhs)
+            return [f'UPPER({sql})' for sql in sqls], params
 
     class CaseInsensitiveFieldMixin:
         """
@@ -24,17 +67,29 @@ except (ModuleNotFoundError, RuntimeError):
         """
 
         LOOKUP_CONVERSIONS = {
-            'exact': 'iexact',
+            'exact': 'ciexact',
             'contains': 'icontains',
             'startswith': 'istartswith',
             'endswith': 'iendswith',
             'regex': 'iregex',
+            'in': 'iin',
         }
 
         def get_lookup(self, lookup_name):
             converted = self.LOOKUP_CONVERSIONS.get(lookup_name, lookup_name)
             return super().get_lookup(converted)
 
-
     class CICharField(CaseInsensitiveFieldMixin, models.CharField):
-        pass
+        @staticmethod
+        def fold_case(value):
+            """
+            Fold the case of a value the way the database compares values of this field (i.e. the way its UPPER()
+            function does), so that uniqueness checks made in Python agree with the database's unique index.
+            """
+            if connection.vendor == 'sqlite':
+                # SQLite's UPPER() only folds ASCII letters
+                return value.translate(_ASCII_UPPER)
+            return value.upper()
+
+    CICharField.register_lookup(CaseInsensitiveExact)
+    CICharField.register_lookup(CaseInsensitiveIn)
@@ -1,10 +1,10 @@
 from django import forms
-from django.core.exceptions import ValidationError
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.views import LoginView
 from django.contrib.auth.forms import AuthenticationForm
 from django.utils.text import capfirst
 
+from django_flex_user.identifiers import resolve_identifier
 from django_flex_user.validators import FlexUserUnicodeUsernameValidator
 
 UserModel = get_user_model()
@@ -49,20 +49,7 @@ class FlexUserAuthenticationForm(AuthenticationForm):
         return self.cleaned_data
 
     def infer_and_normalize_user_identifier(self, value):
-        d = {}
-        try:
-            # See if value is a username
-            self.usernameValidator(value)
-        except ValidationError:
-            # See if value is an email address or phone number
-            if '@' in value:
-                d = {'email': UserModel.objects.normalize_email(value)}
-            else:
-                d = {'phone': value}
-        else:
-            d = {'username': UserModel.normalize_username(value)}
-        finally:
-            return d
+        return dict([resolve_identifier(value)])
 
     def get_invalid_login_error(self, user_identifier_type):
         return forms.ValidationError(
@@ -0,0 +1,152 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX, UNUSABLE_PASSWORD_SUFFIX_LENGTH, check_password, get_hasher, make_password
+)
+from django.utils.crypto import get_random_string
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_process_executor = None
+_process_executor_workers = None
+_process_executor_lock = threading.Lock()
+
+# The number of passwords sent to a worker process at a time. Hashing a password takes tens of milliseconds, so a small
+# chunk is enough to make the cost of sending it to a worker process negligible.
+HASHING_CHUNK_SIZE = 8
+
+
+def get_executor():
+    """
+    Return the executor on which asynchronous code hashes passwords.
+
+    Password hashers are CPU bound and, for the most part, release the GIL while they work (e.g.
+    :func:`hashlib.pbkdf2_hmac`). Running them on a bounded pool of threads keeps them from blocking the event loop
+    while capping the number of hashes in progress at once. The pool size is controlled by ``FLEX_USER_HASHING_THREADS``
+    which defaults to the number of CPUs.
+
+    :return: The hashing executor.
+    :rtype: ~concurrent.futures.ThreadPoolExecutor
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = getattr(settings, 'FLEX_USER_HASHING_THREADS', None) or os.cpu_count()
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='flex_user_hashing')
+    return _executor
+
+
+async def amake_password(password, salt=None, hasher='default'):
+    """
+    Asynchronous counterpart of :func:`django.contrib.auth.hashers.make_password`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), make_password, password, salt, hasher)
+
+
+async def acheck_password(password, encoded):
+    """
+    Asynchronous counterpart of :func:`django.contrib.auth.hashers.check_password`.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), check_password, password, encoded)
+
+
+async def aset_password(user, raw_password):
+    """
+    Asynchronous counterpart of :meth:`django.contrib.auth.base_user.AbstractBaseUser.set_password`.
+    """
+    user.password = await amake_password(raw_password)
+    user._password = raw_password
+
+
+def get_process_executor():
+    """
+    Return the executor on which bulk operations hash passwords, or None if hashing in worker processes is disabled.
+
+    Password hashers which are implemented in Python hold the GIL while they work, so threads can't hash passwords in
+    parallel. Bulk operations (e.g. :meth:`~django_flex_user.models.user.FlexUserManager.bulk_create_users`) instead
+    spread hashing over a pool of worker processes. The pool size is controlled by ``FLEX_USER_HASHING_PROCESSES`` which
+    defaults to the number of CPUs. Set it to 0 to hash passwords in the calling process.
+
+    :return: The hashing executor.
+    :rtype: None, ~concurrent.futures.ProcessPoolExecutor
+    """
+    global _process_executor, _process_executor_workers
+
+    max_workers = getattr(settings, 'FLEX_USER_HASHING_PROCESSES', None)
+    if max_workers is None:
+        max_workers = os.cpu_count()
+    if max_workers < 1:
+        return None
+
+    if _process_executor is None:
+        with _process_executor_lock:
+            if _process_executor is None:
+                _process_executor = ProcessPoolExecutor(max_workers=max_workers)
+                _process_executor_workers = max_workers
+    return _process_executor
+
+
+def _encode_passwords(hasher, passwords):
+    # This function runs in a worker process. It receives the hasher instance rather than its name so that it doesn't
+    # depend on the worker process having configured Django's settings.
+    encoded = []
+    for password in passwords:
+        if password is None:
+            encoded.append(UNUSABLE_PASSWORD_PREFIX + get_random_string(UNUSABLE_PASSWORD_SUFFIX_LENGTH))
+        elif not isinstance(password, (bytes, str)):
+            raise TypeError(
+                'Password must be a string or bytes, got {type}.'.format(type=type(password).__qualname__)
+            )
+        else:
+            encoded.append(hasher.encode(password, hasher.salt()))
+    return encoded
+
+
+def make_passwords(passwords, hasher='default', max_pending=None):
+    """
+    Bulk counterpart of :func:`django.contrib.auth.hashers.make_password`.
+
+    Passwords are hashed in chunks on the executor returned by :func:`get_process_executor`. To bound memory use when
+    ``passwords`` is a long (or lazy) iterable, no more than ``max_pending`` chunks are in flight at a time.
+
+    :param passwords: The raw passwords to hash. If a password is None, an unusable password is returned in its place.
+    :type passwords: iterable
+    :param hasher: The name of the hasher to use, defaults to the first of :setting:`PASSWORD_HASHERS`.
+    :type hasher: str, optional
+    :param max_pending: The maximum number of chunks in flight, defaults to twice the number of worker processes.
+    :type max_pending: int, optional
+    :return: The hashed passwords, in the same order as ``passwords``.
+    :rtype: ~collections.abc.Iterator
+    """
+    hasher = get_hasher(hasher)
+    chunks = iter(lambda it=iter(passwords): list(islice(it, HASHING_CHUNK_SIZE)), [])
+
+    executor = get_process_executor()
+    first_chunks = list(islice(chunks, 2))
+    if executor is None or len(first_chunks) < 2:
+        # Starting a worker process costs more than hashing a single chunk
+        for chunk in chain(first_chunks, chunks):
+            yield from _encode_passwords(hasher, chunk)
+        return
+
+    if max_pending is None:
+        max_pending = _process_executor_workers * 2
+
+    pending = deque()
+    for chunk in chain(first_chunks, chunks):
+        pending.append(executor.submit(_encode_passwords, hasher, chunk))
+        if len(pending) >= max_pending:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
@@ -0,0 +1,195 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import phonenumbers
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.signals import setting_changed
+from django.db.models import CharField, Value
+from django.dispatch import receiver
+
+from django_flex_user.validators import FlexUserUnicodeUsernameValidator
+
+# A user identifier classified by IdentifierResolver. field_name is the name of the user model field it belongs to
+# (i.e. 'username', 'email' or 'phone') and value is its normalized value. Since it's a pair, dict([identifier]) turns
+# it into lookup keyword arguments.
+Identifier = namedtuple('Identifier', ['field_name', 'value'])
+
+# FlexUserUnicodeUsernameValidator.regex restricted to ASCII. An ASCII letter is the only ASCII character of the
+# categories a username may begin with, and ASCII letters, digits and ./-/_ are the only ASCII characters it may
+# contain.
+_ASCII_USERNAME_RE = re.compile(r'^[A-Za-z][A-Za-z0-9._-]*$')
+
+# Identifiers longer than any username, email address or phone number can be are resolved but not cached, so that the
+# size of the cache is bounded by its number of entries
+MAX_CACHED_LENGTH = 254
+
+
+class IdentifierResolver:
+    """
+    Works out whether a user identifier (e.g. the value a user types into a sign-in or forgot-password form) is a
+    username, an email address or a phone number, and normalizes it.
+
+    An identifier which passes :class:`~django_flex_user.validators.FlexUserUnicodeUsernameValidator` is a username.
+    Otherwise it's an email address if it contains "@" and a phone number if it doesn't. Phone numbers are converted to
+    E.164 (parsed in ``PHONENUMBER_DEFAULT_REGION`` if they have no country code) where they're valid.
+
+    ASCII identifiers, the common case, are classified using a plain regular expression rather than the Unicode-aware
+    validator. Results are kept in a least recently used cache of ``cache_size`` entries.
+    """
+
+    def __init__(self, cache_size=1024):
+        self.username_validator = FlexUserUnicodeUsernameValidator()
+        self._resolve_cached = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def resolve(self, value):
+        """
+        Classify and normalize an identifier.
+
+        :param value: The identifier.
+        :type value: str
+        :rtype: Identifier
+        """
+        if len(value) > MAX_CACHED_LENGTH:
+            return self._resolve(value)
+        return self._resolve_cached(value)
+
+    def clear_cache(self):
+        self._resolve_cached.cache_clear()
+
+    def cache_info(self):
+        return self._resolve_cached.cache_info()
+
+    def is_username(self, value):
+        if value.isascii():
+            return _ASCII_USERNAME_RE.match(value) is not None
+        try:
+            self.username_validator(value)
+        except ValidationError:
+            return False
+        return True
+
+    def _resolve(self, value):
+        user_model = get_user_model()
+        if self.is_username(value):
+            # NFKC leaves ASCII strings unchanged
+            return Identifier('username', value if value.isascii() else user_model.normalize_username(value))
+        if '@' in value:
+            return Identifier('email', user_model.objects.normalize_email(value))
+        return Identifier('phone', self.normalize_phone(value))
+
+    @staticmethod
+    def normalize_phone(value):
+        """
+        Return the phone number in E.164, or unchanged if it isn't a valid phone number.
+
+        :rtype: str
+        """
+        return to_e164(value) or value
+
+
+def _parse_phone(value, region):
+    try:
+        phone = phonenumbers.parse(value, region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_valid_number(phone):
+        return None
+    return phonenumbers.format_number(phone, phonenumbers.PhoneNumberFormat.E164)
+
+
+# The region is part of the key, so entries don't go stale when PHONENUMBER_DEFAULT_REGION changes
+_parse_phone_cached = lru_cache(maxsize=getattr(settings, 'FLEX_USER_PHONE_CACHE_SIZE', 1024))(_parse_phone)
+
+
+def to_e164(value, region=None):
+    """
+    Parse a phone number and return it in E.164. Results are kept in a least recently used cache, so repeated lookups
+    of the same phone number are parsed once.
+
+    :param value: The phone number, e.g. ``'(202) 555-1234'`` or ``'+1 202-555-1234'``.
+    :type value: str, ~phonenumbers.PhoneNumber
+    :param region: The region to parse phone numbers without a country code in, defaults to
+        ``PHONENUMBER_DEFAULT_REGION``.
+    :type region: str, optional
+    :return: The phone number in E.164, or None if it isn't a valid phone number.
+    :rtype: str, None
+    """
+    if isinstance(value, phonenumbers.PhoneNumber):
+        # e.g. the value of a PhoneNumberField, which has already been parsed
+        if not phonenumbers.is_valid_number(value):
+            return None
+        return phonenumbers.format_number(value, phonenumbers.PhoneNumberFormat.E164)
+
+    if region is None:
+        region = getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+    if len(value) > MAX_CACHED_LENGTH:
+        return _parse_phone(value, region)
+    return _parse_phone_cached(value, region)
+
+
+def parse_phones(values, region=None):
+    """
+    Parse many phone numbers (e.g. for a bulk import or a bulk lookup job) and return them in E.164.
+
+    Each distinct phone number is parsed once. The shared cache used by :func:`to_e164` is bypassed, so that a large
+    job doesn't evict the phone numbers which are being looked up by requests.
+
+    :param values: The phone numbers.
+    :type values: collections.abc.Iterable[str]
+    :param region: The region to parse phone numbers without a country code in, defaults to
+        ``PHONENUMBER_DEFAULT_REGION``.
+    :type region: str, optional
+    :return: The phone numbers in E.164, in the same order as ``values``. Invalid phone numbers are None.
+    :rtype: list
+    """
+    if region is None:
+        region = getattr(settings, 'PHONENUMBER_DEFAULT_REGION', None)
+    parsed = {}
+    results = []
+    for value in values:
+        if value not in parsed:
+            parsed[value] = _parse_phone(value, region)
+        results.append(parsed[value])
+    return results
+
+
+def phone_lookup_value(value):
+    """
+    Return a value to filter a phone number field by, e.g. ``FlexUser.objects.filter(phone=phone_lookup_value(value))``.
+
+    A valid phone number is converted to E.164 using :func:`to_e164` and wrapped in an expression, so that the field
+    doesn't parse it again when the query is built. Anything else is returned unchanged and prepared by the field as
+    usual.
+
+    :param value: The phone number.
+    :type value: str
+    :rtype: str, ~django.db.models.Value
+    """
+    e164 = to_e164(value)
+    if e164 is None or getattr(settings, 'PHONENUMBER_DB_FORMAT', 'E164') != 'E164':
+        # Phone numbers which aren't stored in E.164 are left for the field to format
+        return value
+    return Value(e164, output_field=CharField())
+
+
+identifier_resolver = IdentifierResolver(getattr(settings, 'FLEX_USER_IDENTIFIER_CACHE_SIZE', 1024))
+
+
+def resolve_identifier(value):
+    """
+    Classify and normalize an identifier using the shared :class:`IdentifierResolver`.
+
+    :param value: The identifier.
+    :type value: str
+    :rtype: Identifier
+    """
+    return identifier_resolver.resolve(value)
+
+
+@receiver(setting_changed)
+def _clear_identifier_cache(setting, **kwargs):
+    if setting in ('PHONENUMBER_DEFAULT_REGION', 'AUTH_USER_MODEL'):
+        identifier_resolver.clear_cache()
@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections
+
+from django_flex_user.delivery import claim_messages, deliver_messages
+from django_flex_user.delivery_backends import close_delivery_backends
+from django_flex_user.models.outbox import OutboxMessage
+
+PRIORITIES = {label: value for value, label in OutboxMessage.PRIORITY_CHOICES}
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver the one-time passwords queued in the outbox (see FLEX_USER_OTP_DELIVERY_QUEUE). Failed deliveries '
+        'are retried with exponential backoff and dead-lettered after FLEX_USER_OTP_DELIVERY_MAX_ATTEMPTS attempts. '
+        'Any number of workers may run at once.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='The number of messages to deliver at once. Defaults to 4.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='The number of messages to claim at a time. Defaults to 100.'
+        )
+        parser.add_argument(
+            '--batch-window', type=float, default=0.0,
+            help='The number of seconds to wait for more messages after claiming fewer than --batch-size, so that '
+                 'messages queued at about the same time are sent together (e.g. over one connection or using a '
+                 "provider's bulk API). Defaults to 0."
+        )
+        parser.add_argument(
+            '--priority', action='append', choices=list(PRIORITIES), dest='priorities',
+            help='Only deliver messages of this priority. May be given more than once. Defaults to all priorities, '
+                 'most urgent first.'
+        )
+        parser.add_argument(
+            '--lease', type=int, default=300,
+            help='The number of seconds for which claimed messages are hidden from other workers. Messages which '
+                 "haven't been delivered by then are delivered again. Defaults to 300."
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='The number of seconds to wait before checking for new messages when the outbox is empty. '
+                 'Defaults to 1.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit once the outbox is empty rather than waiting for new messages.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database holding the outbox. Defaults to the "default" database.'
+        )
+
+    def handle(self, *args, **options):
+        for option in ('concurrency', 'batch_size', 'lease'):
+            if options[option] < 1:
+                raise CommandError('--{option} must be a positive integer.'.format(option=option.replace('_', '-')))
+
+        if options['batch_window'] < 0:
+            raise CommandError('--batch-window must not be negative.')
+
+        priorities = [PRIORITIES[label] for label in options['priorities'] or ()]
+        totals = dict.fromkeys((k for k, _ in OutboxMessage.STATUS_CHOICES), 0)
+
+        try:
+            while True:
+                messages = self._claim_batch(priorities, options)
+                if messages:
+                    counts = deliver_messages(messages, concurrency=options['concurrency'])
+                    for k, v in counts.items():
+                        totals[k] += v
+                    self.stdout.write(
+                        'Sent {sent}, skipped {skipped}, retrying {pending} and dead-lettered {dead} messages.'.format(
+                            **counts
+                        )
+                    )
+                    continue
+
+                if options['once']:
+                    break
+                # Don't hold on to a connection the database may close while we're idle
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            close_delivery_backends()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Sent {sent}, skipped {skipped}, retrying {pending} and dead-lettered {dead} messages in total.'.format(
+                **totals
+            )
+        ))
+
+    @staticmethod
+    def _claim_batch(priorities, options):
+        def claim(batch_size):
+            return claim_messages(
+                batch_size=batch_size, lease=timedelta(seconds=options['lease']), priorities=priorities,
+                using=options['database']
+            )
+
+        messages = claim(options['batch_size'])
+        deadline = time.monotonic() + options['batch_window']
+        while messages and len(messages) < options['batch_size'] and time.monotonic() < deadline:
+            time.sleep(max(min(options['poll_interval'], deadline - time.monotonic()), 0))
+            messages += claim(options['batch_size'] - len(messages))
+        return messages
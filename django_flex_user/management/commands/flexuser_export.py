@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_flex_user.export import EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = (
+        'Export users, along with the verification status of their email address and phone number, as CSV or JSONL. '
+        'Users are streamed in order of primary key so memory use is constant.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=EXPORT_FORMATS, default='csv',
+            help='The format of the export. Defaults to csv.'
+        )
+        parser.add_argument(
+            '--output',
+            help='The file to write the export to. Defaults to standard output.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='The number of users to fetch per query. Defaults to 2000.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to export users from. Defaults to the "default" database.'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive integer.')
+
+        queryset = get_user_model().objects.using(options['database'])
+        rows = iter_export(options['format'], queryset, options['chunk_size'])
+
+        if options['output'] is None:
+            for row in rows:
+                self.stdout.write(row, ending='')
+        else:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as f:
+                f.writelines(rows)
@@ -0,0 +1,257 @@
+import csv
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+# The fields an import file may supply for each user. Unless --raw-passwords is given, password holds a password hash
+# (e.g. as exported from another Django project) rather than a raw password.
+FIELDS = ('username', 'email', 'phone', 'password')
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users from a CSV or JSONL file of username, email, phone and password records. The file is '
+        'streamed in batches, rows which fail validation are written to an errors file and progress is recorded in a '
+        'checkpoint file so that an interrupted import can be resumed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The file to import.')
+        parser.add_argument(
+            '--format', choices=('csv', 'jsonl'),
+            help='The format of the file to import. Inferred from the file extension by default.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='The number of users to validate and insert at a time. Defaults to 1000.'
+        )
+        parser.add_argument(
+            '--raw-passwords', action='store_true',
+            help='Treat passwords as raw passwords rather than password hashes. Raw passwords are hashed by a pool of '
+                 'worker processes (see FLEX_USER_HASHING_PROCESSES).'
+        )
+        parser.add_argument(
+            '--errors',
+            help='The file to which rows that fail validation are appended (as JSONL). Defaults to PATH.errors.jsonl.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='The file in which progress is recorded. Defaults to PATH.checkpoint.'
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore any existing checkpoint and import the file from the beginning.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to import users into. Defaults to the "default" database.'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError('Unable to infer the format of {path}. Use --format.'.format(path=path))
+
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+
+        errors_path = options['errors'] or path + '.errors.jsonl'
+        checkpoint_path = options['checkpoint'] or path + '.checkpoint'
+
+        checkpoint = None if options['restart'] else self._read_checkpoint(checkpoint_path)
+        # Rows up to this line may have been inserted by an interrupted import after it last recorded its progress
+        pending_line = checkpoint.get('pending', {}).get('line', 0) if checkpoint is not None else 0
+        if checkpoint is not None and checkpoint['offset'] is None:
+            # The import was interrupted during its first batch
+            checkpoint = None
+        if checkpoint is not None:
+            self.stdout.write('Resuming from line {line} of {path}.'.format(line=checkpoint['line'], path=path))
+
+        raw_passwords = options['raw_passwords']
+        manager = get_user_model().objects.db_manager(options['database'])
+        imported = failed = 0
+        start = time.monotonic()
+
+        with open(path, newline='', encoding='utf-8') as f, \
+                open(errors_path, 'a' if checkpoint is not None else 'w', encoding='utf-8') as errors_file:
+            records = self._read_csv(f, checkpoint) if file_format == 'csv' else self._read_jsonl(f, checkpoint)
+            progress = checkpoint or {'offset': None, 'line': 0}
+
+            batch = []
+            for record in records:
+                batch.append(record)
+                if len(batch) == batch_size:
+                    progress = self._write_pending_checkpoint(checkpoint_path, progress, f.tell(), batch[-1][0])
+                    batch_imported, batch_failed = self._import_batch(
+                        manager, batch, errors_file, raw_passwords, pending_line
+                    )
+                    imported += batch_imported
+                    failed += batch_failed
+                    self._write_checkpoint(checkpoint_path, **progress)
+                    batch = []
+
+            if batch:
+                progress = self._write_pending_checkpoint(checkpoint_path, progress, f.tell(), batch[-1][0])
+                batch_imported, batch_failed = self._import_batch(
+                    manager, batch, errors_file, raw_passwords, pending_line
+                )
+                imported += batch_imported
+                failed += batch_failed
+                self._write_checkpoint(checkpoint_path, **progress)
+
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            'Imported {imported} users in {elapsed:.1f}s ({rate:.0f} rows/s).'.format(
+                imported=imported, elapsed=elapsed, rate=(imported + failed) / elapsed if elapsed else 0
+            )
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                '{failed} rows failed validation. See {errors_path}.'.format(failed=failed, errors_path=errors_path)
+            ))
+
+    def _import_batch(self, manager, batch, errors_file, raw_passwords=False, pending_line=0):
+        """
+        Validate and insert a batch of records. Each record is a tuple of line number, raw record and a dict of the
+        record's fields (or a ValidationError if the record couldn't be parsed).
+
+        Records up to ``pending_line`` which fail validation only because they conflict with existing users are
+        assumed to have been inserted by an interrupted import, so they're counted as imported rather than failed.
+        """
+        errors = {}
+        users = []
+        for index, (line, raw, fields) in enumerate(batch):
+            if isinstance(fields, Exception):
+                errors[index] = fields
+                continue
+            if not raw_passwords and 'password' in fields:
+                fields = dict(fields)
+                fields['password_hash'] = fields.pop('password')
+            users.append((index, fields))
+
+        valid_users, validation_errors = manager.validate_users(fields for _, fields in users)
+        already_imported = 0
+        for user_index, error in validation_errors.items():
+            index = users[user_index][0]
+            if batch[index][0] <= pending_line and _is_unique_error(error):
+                already_imported += 1
+            else:
+                errors[index] = error
+
+        manager.bulk_insert_users(valid_users)
+
+        for index in sorted(errors):
+            line, raw, _ = batch[index]
+            errors_file.write(json.dumps({'line': line, 'record': raw, 'errors': _get_messages(errors[index])}) + '\n')
+        errors_file.flush()
+
+        return len(valid_users) + already_imported, len(errors)
+
+    @staticmethod
+    def _read_csv(f, checkpoint):
+        # Iterating over a file disables tell(), so we read it line by line instead. csv.reader consumes exactly the
+        # lines which make up each row (rows may span several lines if they contain quoted newlines), so the position
+        # of the file after each row is the position at which the next row begins.
+        lines = iter(f.readline, '')
+        reader = csv.reader(lines)
+
+        header = next(reader, None)
+        if header is None:
+            return
+        header = [column.strip() for column in header]
+        unknown_columns = set(header) - set(FIELDS)
+        if unknown_columns:
+            raise CommandError('Unknown columns: {columns}.'.format(columns=', '.join(sorted(unknown_columns))))
+
+        if checkpoint is not None:
+            f.seek(checkpoint['offset'])
+
+        # After seeking, reader.line_num continues to count from the header
+        line_offset = checkpoint['line'] - reader.line_num if checkpoint is not None else 0
+
+        for row in reader:
+            line = reader.line_num + line_offset
+            if not row:
+                continue
+            if len(row) != len(header):
+                yield line, row, ValidationError('Expected {expected} columns but found {found}.'.format(
+                    expected=len(header), found=len(row)
+                ))
+                continue
+            # Empty cells are treated as missing values
+            record = {column: value for column, value in zip(header, row) if value != ''}
+            yield line, record, record
+
+    @staticmethod
+    def _read_jsonl(f, checkpoint):
+        line = 0
+        if checkpoint is not None:
+            f.seek(checkpoint['offset'])
+            line = checkpoint['line']
+
+        for raw in iter(f.readline, ''):
+            line += 1
+            if not raw.strip():
+                continue
+            try:
+                record = json.loads(raw)
+            except ValueError as e:
+                yield line, raw.rstrip('\n'), ValidationError('Invalid JSON: {error}.'.format(error=e))
+                continue
+            if not isinstance(record, dict):
+                yield line, record, ValidationError('Expected a JSON object.')
+                continue
+            unknown_fields = set(record) - set(FIELDS)
+            if unknown_fields:
+                yield line, record, ValidationError('Unknown fields: {fields}.'.format(
+                    fields=', '.join(sorted(unknown_fields))
+                ))
+                continue
+            yield line, record, {k: v for k, v in record.items() if v is not None}
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_path):
+        try:
+            with open(checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def _write_pending_checkpoint(cls, checkpoint_path, progress, offset, line):
+        # The checkpoint can't be written in the same transaction as the batch it follows, so record that the batch is
+        # pending before inserting it. If the import is interrupted before the batch's progress is recorded, resuming it
+        # treats the batch's rows which conflict with existing users as already imported (see _import_batch).
+        pending = {'offset': offset, 'line': line}
+        cls._write_checkpoint(checkpoint_path, progress['offset'], progress['line'], pending=pending)
+        return pending
+
+    @staticmethod
+    def _write_checkpoint(checkpoint_path, offset, line, pending=None):
+        # Write the checkpoint to a temporary file and move it into place so that it's never left half-written
+        checkpoint = {'offset': offset, 'line': line}
+        if pending is not None:
+            checkpoint['pending'] = pending
+        temp_path = checkpoint_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, checkpoint_path)
+
+
+def _is_unique_error(error):
+    return hasattr(error, 'error_dict') and all(
+        e.code == 'unique' for field_errors in error.error_dict.values() for e in field_errors
+    )
+
+
+def _get_messages(error):
+    if hasattr(error, 'error_dict'):
+        return error.message_dict
+    return error.messages
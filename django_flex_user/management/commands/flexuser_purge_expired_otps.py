@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from django_flex_user.models.otp import purge_expired_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Clear the expired one-time passwords and elapsed verification timeouts of email and phone tokens. Run it '
+        'periodically (e.g. from cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report the number of expired passwords and elapsed timeouts but don't clear them."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='The number of tokens to update per query. Defaults to 1000.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to purge. Defaults to the "default" database.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+
+        passwords, timeouts = purge_expired_tokens(
+            using=options['database'], batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+
+        if options['dry_run']:
+            self.stdout.write('Found {passwords} expired passwords and {timeouts} elapsed timeouts.'.format(
+                passwords=passwords, timeouts=timeouts
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                'Cleared {passwords} expired passwords and {timeouts} elapsed timeouts.'.format(
+                    passwords=passwords, timeouts=timeouts
+                )
+            ))
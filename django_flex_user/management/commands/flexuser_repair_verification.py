@@ -0,0 +1,46 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Find users whose email_verified and phone_verified fields disagree with the verified flags of their email and "
+        "phone tokens, and copy the tokens' flags to them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report the number of inconsistent users but don't repair them."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='The number of users to repair per query. Defaults to 1000.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='The database to repair. Defaults to the "default" database.'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+
+        queryset = get_user_model().objects.db_manager(options['database']).all()
+        pks = queryset.with_inconsistent_verification().order_by('pk').values_list('pk', flat=True)
+
+        if options['dry_run']:
+            self.stdout.write('Found {count} inconsistent users.'.format(count=pks.count()))
+            return
+
+        repaired = 0
+        last_pk = None
+        while True:
+            chunk = list((pks if last_pk is None else pks.filter(pk__gt=last_pk))[:options['batch_size']])
+            if not chunk:
+                break
+            repaired += queryset.filter(pk__in=chunk).sync_verification()
+            last_pk = chunk[-1]
+
+        self.stdout.write(self.style.SUCCESS('Repaired {repaired} inconsistent users.'.format(repaired=repaired)))
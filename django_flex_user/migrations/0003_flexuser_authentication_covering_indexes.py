@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Covering indexes which allow FlexUserManager.get_identity_by_natural_key to be answered by an index-only scan. Only
+# PostgreSQL (11 and later) supports covering indexes, so on other databases this migration does nothing.
+
+INDEXES = (
+    ('django_flex_user_flexuser_username_auth_idx', 'username'),
+    ('django_flex_user_flexuser_email_auth_idx', 'email'),
+    ('django_flex_user_flexuser_phone_auth_idx', 'phone'),
+)
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    table = apps.get_model('django_flex_user', 'FlexUser')._meta.db_table
+    for name, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {schema_editor.quote_name(name)} ON {schema_editor.quote_name(table)} '
+            f'({schema_editor.quote_name(column)}) INCLUDE ("id", "password", "is_active")'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for name, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_flex_user', '0002_emailtoken_phonetoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.0.10 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+def populate_verified(apps, schema_editor):
+    FlexUser = apps.get_model('django_flex_user', 'FlexUser')
+    EmailToken = apps.get_model('django_flex_user', 'EmailToken')
+    PhoneToken = apps.get_model('django_flex_user', 'PhoneToken')
+
+    FlexUser.objects.using(schema_editor.connection.alias).update(
+        email_verified=models.Subquery(
+            EmailToken.objects.filter(user=models.OuterRef('pk')).order_by('pk').values('verified')[:1]
+        ),
+        phone_verified=models.Subquery(
+            PhoneToken.objects.filter(user=models.OuterRef('pk')).order_by('pk').values('verified')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_flex_user', '0003_flexuser_authentication_covering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flexuser',
+            name='email_verified',
+            field=models.BooleanField(editable=False, null=True, verbose_name='email address verified'),
+        ),
+        migrations.AddField(
+            model_name='flexuser',
+            name='phone_verified',
+            field=models.BooleanField(editable=False, null=True, verbose_name='phone number verified'),
+        ),
+        migrations.RunPython(populate_verified, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_flex_user', '0004_flexuser_email_verified_phone_verified'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailtoken',
+            index=models.Index(condition=models.Q(('expiration__isnull', False)), fields=['expiration'], name='flexuser_etoken_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailtoken',
+            index=models.Index(condition=models.Q(('timeout__isnull', False)), fields=['timeout'], name='flexuser_etoken_timeout_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phonetoken',
+            index=models.Index(condition=models.Q(('expiration__isnull', False)), fields=['expiration'], name='flexuser_ptoken_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='phonetoken',
+            index=models.Index(condition=models.Q(('timeout__isnull', False)), fields=['timeout'], name='flexuser_ptoken_timeout_idx'),
+        ),
+    ]
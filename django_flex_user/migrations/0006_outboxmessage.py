@@ -0,0 +1,44 @@
+# Generated by Django 4.0.10 on 2026-10-18 12:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_flex_user', '0005_token_expiration_timeout_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='delivery function keyword arguments')),
+                ('priority', models.PositiveSmallIntegerField(choices=[(0, 'high'), (1, 'normal'), (2, 'low')], default=1, verbose_name='priority')),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('sent', 'sent'), ('skipped', 'skipped'), ('dead', 'dead')], default='pending', max_length=16, verbose_name='status')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='delivery attempts')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='available at')),
+                ('claim', models.UUIDField(blank=True, editable=False, null=True, verbose_name='claim')),
+                ('last_error', models.TextField(blank=True, verbose_name='last error')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='created at')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='sent at')),
+                ('email_token', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='django_flex_user.emailtoken')),
+                ('phone_token', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, to='django_flex_user.phonetoken')),
+            ],
+            options={
+                'verbose_name': 'outbox message',
+                'verbose_name_plural': 'outbox messages',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outboxmessage',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['priority', 'available_at'], name='flexuser_outbox_pending_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='outboxmessage',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(('email_token__isnull', False), ('phone_token__isnull', True)), models.Q(('email_token__isnull', True), ('phone_token__isnull', False)), _connector='OR'), name='flexuser_outbox_one_token'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+import django
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Upper
+
+# A unique index on UPPER(username), which enforces case-insensitive uniqueness of usernames and answers the
+# case-insensitive username lookups of django_flex_user.fields.CICharField (e.g. sign-in and uniqueness checks) without
+# scanning the table. On Django 4.0 and later it's declared in FlexUser.Meta.constraints. Django 3.2 can't declare a
+# constraint on an expression, so there it's created using SQL, with the same name so that the database ends up the
+# same either way. Databases which don't support expression indexes (e.g. MySQL before 8.0.13) skip it and fall back
+# to their case-insensitive collations.
+
+INDEX_NAME = 'django_flex_user_flexuser_username_upper_uniq'
+
+# The number of conflicting usernames to list when the index can't be created
+MAX_REPORTED_DUPLICATES = 20
+
+
+def check_duplicate_usernames(apps, schema_editor):
+    # Creating the index fails if usernames which differ only by case exist. Check first, so that we can say which.
+    FlexUser = apps.get_model('django_flex_user', 'FlexUser')
+    queryset = FlexUser._default_manager.using(schema_editor.connection.alias).exclude(username=None)
+    folded = (
+        queryset.annotate(folded=Upper('username')).values('folded').annotate(count=Count('pk')).filter(count__gt=1)
+        .values_list('folded', flat=True)[:MAX_REPORTED_DUPLICATES]
+    )
+    folded = list(folded)
+    if not folded:
+        return
+
+    users = queryset.annotate(folded=Upper('username')).filter(folded__in=folded).order_by('folded', 'pk')
+    raise RuntimeError(
+        "Usernames must be unique regardless of case, but these users' usernames differ only by case: {users}. Change "
+        "their usernames, then run this migration again.".format(
+            users=', '.join(f'{username!r} (id {pk})' for pk, username in users.values_list('pk', 'username'))
+        )
+    )
+
+
+def create_index(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+
+    table = apps.get_model('django_flex_user', 'FlexUser')._meta.db_table
+    schema_editor.execute(
+        f'CREATE UNIQUE INDEX {schema_editor.quote_name(INDEX_NAME)} ON {schema_editor.quote_name(table)} '
+        f'((UPPER({schema_editor.quote_name("username")})))'
+    )
+
+
+def drop_index(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+
+    table = apps.get_model('django_flex_user', 'FlexUser')._meta.db_table
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute(
+            f'DROP INDEX {schema_editor.quote_name(INDEX_NAME)} ON {schema_editor.quote_name(table)}'
+        )
+    else:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(INDEX_NAME)}')
+
+
+if django.VERSION >= (4, 0):
+    create_index_operation = migrations.AddConstraint(
+        model_name='flexuser',
+        constraint=models.UniqueConstraint(Upper('username'), name=INDEX_NAME),
+    )
+else:
+    create_index_operation = migrations.RunPython(create_index, drop_index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_flex_user', '0006_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_usernames, migrations.RunPython.noop),
+        create_index_operation,
+    ]
@@ -1,2 +1,3 @@
 from .user import FlexUser
 from .otp import EmailToken, PhoneToken
+from .outbox import OutboxMessage
@@ -1,14 +1,21 @@
-import string, random, importlib
+import string, random, importlib, math
+from contextlib import contextmanager
 from datetime import timedelta
 from functools import wraps
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction, DEFAULT_DB_ALIAS
+from django.db.models import Case, Q, Value, When
+from django.utils.crypto import constant_time_compare
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from asgiref.local import Local
 from phonenumber_field.modelfields import PhoneNumberField
 
+from django_flex_user.delivery_backends import get_delivery_backend
+from django_flex_user.models.outbox import OutboxMessage
+from django_flex_user.throttling import get_throttle_store
 from django_flex_user.util import obscure_email, obscure_phone
 
 
@@ -26,6 +33,15 @@ class TimeoutError(Exception):
         self.message = message
         super().__init__(self.message)
 
+    @property
+    def retry_after(self):
+        """
+        The number of whole seconds until the timeout ends, suitable for use as the value of a ``Retry-After`` header.
+
+        :rtype: int
+        """
+        return max(1, math.ceil((self.verification_timeout - timezone.now()).total_seconds()))
+
 
 class TransmissionError(Exception):
     pass
@@ -38,10 +54,6 @@ class Token(models.Model):
     timeout = models.DateTimeField(_('verification timeout'), null=True, blank=True)
     failure_count = models.PositiveIntegerField(_('verification failure count'), default=0)
 
-    def _set_timeout(self):
-        self.timeout = timezone.now() + timedelta(seconds=2 ** self.failure_count)
-        self.failure_count += 1
-
     def _reset_timeout(self):
         self.timeout = None
         self.failure_count = 0
@@ -55,24 +67,46 @@ class Token(models.Model):
         @wraps(fun)  # Copies docstring from "fun" to "inner"
         def inner(self):
             fun(self)
-            self._reset_timeout()
+            get_throttle_store().reset(self)
             self.save()
 
         return inner
 
-    def throttle(fun):
-        @wraps(fun)  # Copies docstring from "fun" to "inner"
-        def inner(self, password):
-            self._is_timed_out()
-            success = fun(self, password)
-            if success:
-                self._reset_timeout()
-            else:
-                self._set_timeout()
-            self.save()
-            return success
-
-        return inner
+    # The name of the field on the user model which holds a denormalized copy of verified
+    user_verified_field = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the saved value of verified so that save can tell whether it changed
+        instance._saved_verified = instance.__dict__.get('verified')
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if (
+            self.user_verified_field is None
+            or self.verified == getattr(self, '_saved_verified', False)
+            or (update_fields is not None and 'verified' not in update_fields)
+        ):
+            super().save(*args, **kwargs)
+            return
+
+        # Update the user's copy of verified in the same transaction
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            self._sync_user_verified()
+        self._saved_verified = self.verified
+
+    def _sync_user_verified(self):
+        if self.user_verified_field is None:
+            return
+
+        type(self).user.field.related_model._default_manager.using(self._state.db).filter(pk=self.user_id).update(
+            **{self.user_verified_field: self.verified}
+        )
+        if type(self).user.is_cached(self):
+            setattr(self.user, self.user_verified_field, self.verified)
 
     def check_password(self, password):
         raise NotImplementedError
@@ -102,6 +136,9 @@ class SideChannelToken(Token):
     def password_alphabet(self):
         raise NotImplementedError
 
+    # The channel of the delivery backend which sends the token's password (see get_delivery_backend)
+    delivery_channel = None
+
     @Token.throttle_reset
     def generate_password(self):
         self.password = ''.join(
@@ -109,34 +146,81 @@ class SideChannelToken(Token):
         )
         self.expiration = timezone.now() + getattr(settings, 'FLEX_USER_OTP_TTL', timedelta(minutes=15))
 
-    @Token.throttle
     def check_password(self, password):
         """
         Checks one-time password.
 
+        The token is marked as verified using a single conditional ``UPDATE`` which only succeeds if, at that moment,
+        the password is still current, it hasn't expired and the token isn't timed out. A failed attempt is recorded
+        by the throttle store (see :class:`~django_flex_user.throttling.DatabaseThrottleStore`). Therefore concurrent
+        attempts, even ones made against different servers, can't slip past the timeout or overwrite each other.
+
         :param password: The one-time password.
         :type password: str
         :raises ~django_flex_user.models.otp.TimeoutError: If this method is called too many times.
         :return: True if the one-time password is valid, False otherwise
         :rtype: bool
         """
+        store = get_throttle_store()
+        store.check(self)
+
+        now = timezone.now()
+        success = (
+            self.password is not None and password is not None
+            and (self.expiration is None or now < self.expiration)
+            and constant_time_compare(self.password, password)
+            and self._mark_verified(now)
+        )
 
-        # Check whether the password has expired
-        if self.expiration and self.expiration <= timezone.now():
-            return False
-
-        # Check the password
-        success = False if self.password is None else self.password == password
         if success:
-            self.verified = True
-            self.password = None
-            self.expiration = None
+            store.reset(self)
+        else:
+            store.record_failure(self)
 
         return success
 
+    def _mark_verified(self, now):
+        values = {'verified': True, 'password': None, 'expiration': None, 'timeout': None, 'failure_count': 0}
+        queryset = type(self)._base_manager.using(self._state.db).filter(
+            Q(expiration__isnull=True) | Q(expiration__gt=now),
+            Q(timeout__isnull=True) | Q(timeout__lte=now),
+            pk=self.pk, password=self.password
+        )
+        with transaction.atomic(using=self._state.db):
+            if not queryset.update(**values):
+                # The password was changed, or the token was timed out, by a concurrent request
+                return False
+            for field_name, value in values.items():
+                setattr(self, field_name, value)
+            self._sync_user_verified()
+        self._saved_verified = True
+        return True
+
     def send_password(self, **kwargs):
         raise NotImplementedError
 
+    def queue_password(self, priority=OutboxMessage.PRIORITY_NORMAL, **kwargs):
+        """
+        Queue the token's password for delivery by the ``flexuser_delivery_worker`` management command instead of
+        sending it now (see :meth:`send_password`).
+
+        Call it in the same transaction as :meth:`generate_password` so that a password is queued if, and only if, it's
+        saved. Messages queued earlier for the token which are still pending are skipped.
+
+        :param priority: The priority (i.e. lane) of the message, defaults to
+            :attr:`~django_flex_user.models.outbox.OutboxMessage.PRIORITY_NORMAL`.
+        :type priority: int, optional
+        :param kwargs: Keyword arguments for the delivery function. They must be serializable as JSON.
+        :return: The queued message.
+        :rtype: ~django_flex_user.models.outbox.OutboxMessage
+        """
+        messages = OutboxMessage.objects.using(self._state.db)
+        # Messages queued earlier would deliver the same password again
+        messages.filter(**{self.outbox_field: self}, status=OutboxMessage.STATUS_PENDING).update(
+            status=OutboxMessage.STATUS_SKIPPED
+        )
+        return messages.create(**{self.outbox_field: self}, priority=priority, kwargs=kwargs)
+
     class Meta:
         abstract = True
 
@@ -144,6 +228,10 @@ class SideChannelToken(Token):
 class EmailToken(SideChannelToken):
     email = models.EmailField(_('email address'))
 
+    user_verified_field = 'email_verified'
+    outbox_field = 'email_token'
+    delivery_channel = 'email'
+
     password_length = getattr(settings, 'FLEX_USER_OTP_LENGTH_FOR_EMAIL_TOKEN', 64)
     password_alphabet = getattr(settings, 'FLEX_USER_OTP_ALPHABET_FOR_EMAIL_TOKEN', string.printable)
 
@@ -154,17 +242,28 @@ class EmailToken(SideChannelToken):
         return obscure_email(self.email)
 
     def send_password(self, **kwargs):
-        flex_user_email_function = getattr(settings, 'FLEX_USER_OTP_EMAIL_FUNCTION', None)
-        if flex_user_email_function is None:
+        backend = get_delivery_backend(self.delivery_channel)
+        if backend is None:
             raise NotImplementedError
 
-        fun = get_module_member(flex_user_email_function)
-        fun(self, **kwargs)
+        backend.send(self, **kwargs)
+
+    class Meta:
+        # Partial indexes which let purge_expired_tokens find expired passwords and elapsed timeouts without scanning
+        # the table
+        indexes = [
+            models.Index(fields=['expiration'], name='flexuser_etoken_exp_idx', condition=Q(expiration__isnull=False)),
+            models.Index(fields=['timeout'], name='flexuser_etoken_timeout_idx', condition=Q(timeout__isnull=False)),
+        ]
 
 
 class PhoneToken(SideChannelToken):
     phone = PhoneNumberField(_('phone number'))
 
+    user_verified_field = 'phone_verified'
+    outbox_field = 'phone_token'
+    delivery_channel = 'sms'
+
     password_length = getattr(settings, 'FLEX_USER_OTP_LENGTH_FOR_PHONE_TOKEN', 6)
     password_alphabet = getattr(settings, 'FLEX_USER_OTP_ALPHABET_FOR_PHONE_TOKEN', string.digits)
 
@@ -175,9 +274,196 @@ class PhoneToken(SideChannelToken):
         return obscure_phone(self.phone)
 
     def send_password(self, **kwargs):
-        flex_user_sms_function = getattr(settings, 'FLEX_USER_OTP_SMS_FUNCTION', None)
-        if flex_user_sms_function is None:
+        backend = get_delivery_backend(self.delivery_channel)
+        if backend is None:
             raise NotImplementedError
 
-        fun = get_module_member(flex_user_sms_function)
-        fun(self, **kwargs)
+        backend.send(self, **kwargs)
+
+    class Meta:
+        # Partial indexes which let purge_expired_tokens find expired passwords and elapsed timeouts without scanning
+        # the table
+        indexes = [
+            models.Index(fields=['expiration'], name='flexuser_ptoken_exp_idx', condition=Q(expiration__isnull=False)),
+            models.Index(fields=['timeout'], name='flexuser_ptoken_timeout_idx', condition=Q(timeout__isnull=False)),
+        ]
+
+
+# Token fields which are reset when the email address or phone number they belong to changes
+_TOKEN_RESET_VALUES = {'verified': False, 'password': None, 'expiration': None}
+
+# Token changes collected by coalesce_token_sync, by database alias. Each maps (user_id, field_name) to a list of the
+# field's saved and current values.
+_pending_token_changes = Local()
+
+
+def _get_token_models():
+    return {'email': EmailToken, 'phone': PhoneToken}
+
+
+def sync_tokens(changes, using=DEFAULT_DB_ALIAS, batch_size=None):
+    """
+    Bring the :class:`EmailToken` and :class:`PhoneToken` objects of users whose email address or phone number changed
+    in line with them.
+
+    A token is deleted if its identifier was removed, created if its identifier was added and otherwise updated and
+    reset (or created if it's missing). Each kind of change is applied to every user at once, so the number of queries
+    made doesn't depend on the number of users.
+
+    :param changes: Tuples of user ID, field name (i.e. ``email`` or ``phone``), saved value and current value. The
+        saved value of a new user's fields is None.
+    :type changes: iterable
+    :param using: The database to sync, defaults to the default database.
+    :type using: str, optional
+    :param batch_size: The number of tokens to create per query, defaults to None (i.e. as many as possible).
+    :type batch_size: int, optional
+    """
+    changes = list(changes)
+
+    for field_name, model in _get_token_models().items():
+        deleted = []
+        created = {}
+        updated = {}
+        for user_id, name, saved, current in changes:
+            if name != field_name or saved == current:
+                continue
+            if current is None:
+                deleted.append(user_id)
+            elif saved is None:
+                created[user_id] = current
+            else:
+                updated[user_id] = current
+
+        queryset = model._default_manager.using(using)
+
+        if deleted:
+            queryset.filter(user_id__in=deleted).delete()
+
+        if updated:
+            if len(updated) == 1:
+                value = next(iter(updated.values()))
+            else:
+                value = Case(
+                    *[When(user_id=user_id, then=Value(value)) for user_id, value in updated.items()],
+                    output_field=model._meta.get_field(field_name)
+                )
+            count = queryset.filter(user_id__in=updated).update(**{field_name: value}, **_TOKEN_RESET_VALUES)
+            if count < len(updated):
+                # Some of the users were missing a token, so create one for them instead (i.e. upsert)
+                existing = set(queryset.filter(user_id__in=updated).values_list('user_id', flat=True))
+                created.update({k: v for k, v in updated.items() if k not in existing})
+
+        if created:
+            queryset.bulk_create(
+                [model(user_id=user_id, **{field_name: value}) for user_id, value in created.items()],
+                batch_size=batch_size
+            )
+
+
+def queue_token_sync(changes, using=DEFAULT_DB_ALIAS):
+    """
+    Sync tokens as :func:`sync_tokens` does, unless inside :func:`coalesce_token_sync`, in which case hold the changes
+    until the end of its block.
+
+    :param changes: See :func:`sync_tokens`.
+    :type changes: iterable
+    :param using: The database to sync, defaults to the default database.
+    :type using: str, optional
+    """
+    pending = getattr(_pending_token_changes, using, None)
+    if pending is None:
+        sync_tokens(changes, using)
+        return
+
+    for user_id, field_name, saved, current in changes:
+        # Keep the value saved before the first change and the value set by the last
+        pending.setdefault((user_id, field_name), [saved, current])[1] = current
+
+
+def discard_token_sync(user_id, using=DEFAULT_DB_ALIAS):
+    """
+    Forget any changes to the tokens of the given user which are being held by :func:`coalesce_token_sync` (e.g.
+    because the user was deleted).
+
+    :param user_id: The ID of the user.
+    :type user_id: int
+    :param using: The database, defaults to the default database.
+    :type using: str, optional
+    """
+    pending = getattr(_pending_token_changes, using, None)
+    if pending is not None:
+        for key in [key for key in pending if key[0] == user_id]:
+            del pending[key]
+
+
+@contextmanager
+def coalesce_token_sync(using=DEFAULT_DB_ALIAS):
+    """
+    Return a context manager which runs its block in a transaction and holds back the token changes caused by saving
+    users inside it. When the block exits, the net change to each user's tokens is applied using :func:`sync_tokens`.
+
+    This turns saving many users into a handful of token queries and saving the same user several times into a single
+    change. Nested blocks are merged into the outermost block.
+
+    Tokens read inside the block may be out of date.
+
+    :param using: The database, defaults to the default database.
+    :type using: str, optional
+    """
+    if getattr(_pending_token_changes, using, None) is not None:
+        yield
+        return
+
+    pending = {}
+    with transaction.atomic(using=using):
+        setattr(_pending_token_changes, using, pending)
+        try:
+            yield
+        finally:
+            delattr(_pending_token_changes, using)
+        sync_tokens(((user_id, field_name, saved, current)
+                     for (user_id, field_name), (saved, current) in pending.items()), using)
+
+
+def purge_expired_tokens(using=DEFAULT_DB_ALIAS, batch_size=1000, dry_run=False):
+    """
+    Clear the expired passwords and elapsed timeouts of :class:`EmailToken` and :class:`PhoneToken` objects.
+
+    Neither has any effect once it has passed, so this doesn't change the outcome of any verification attempt. Failure
+    counts are kept. Tokens are updated ``batch_size`` at a time, each batch in its own short transaction, and are found
+    using partial indexes on ``expiration`` and ``timeout`` which only hold tokens that have one.
+
+    :param using: The database to purge, defaults to the default database.
+    :type using: str, optional
+    :param batch_size: The number of tokens to update per query, defaults to 1000.
+    :type batch_size: int, optional
+    :param dry_run: Count the tokens which would be purged instead of purging them, defaults to False.
+    :type dry_run: bool, optional
+    :return: The number of expired passwords and the number of elapsed timeouts cleared (or found, if ``dry_run`` is
+        True).
+    :rtype: tuple
+    """
+    now = timezone.now()
+    counts = []
+
+    for lookup, values in (
+        ({'expiration__lte': now}, {'password': None, 'expiration': None}),
+        ({'timeout__lte': now}, {'timeout': None}),
+    ):
+        count = 0
+        for model in _get_token_models().values():
+            queryset = model._default_manager.using(using).filter(**lookup)
+            if dry_run:
+                count += queryset.count()
+                continue
+
+            while True:
+                pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+                if pks:
+                    # Repeat the lookup in case a token was given a new password since we found it
+                    count += queryset.filter(pk__in=pks).update(**values)
+                if len(pks) < batch_size:
+                    break
+        counts.append(count)
+
+    return tuple(counts)
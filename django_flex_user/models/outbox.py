@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxMessage(models.Model):
+    """
+    A one-time password waiting to be delivered by the ``flexuser_delivery_worker`` management command.
+
+    Messages are written by :meth:`~django_flex_user.models.otp.SideChannelToken.queue_password` in the same transaction
+    as the password they deliver. They don't hold a copy of the password, the worker sends whatever password the token
+    holds when the message is delivered.
+
+    Deleting a token doesn't delete its messages: the foreign keys to tokens use ``on_delete=DO_NOTHING`` without a
+    database constraint, because cascading deletes would stop Django deleting tokens with a single query (see
+    :func:`~django_flex_user.models.otp.sync_tokens`). The worker skips messages whose token no longer exists.
+    """
+
+    # Lower values are delivered first
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_LOW = 2
+    PRIORITY_CHOICES = [
+        (PRIORITY_HIGH, _('high')),
+        (PRIORITY_NORMAL, _('normal')),
+        (PRIORITY_LOW, _('low')),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, _('pending')),
+        (STATUS_SENT, _('sent')),
+        # The token's password was used, replaced or expired (or the token was deleted) before it could be delivered
+        (STATUS_SKIPPED, _('skipped')),
+        # Delivery failed too many times (i.e. the message was dead-lettered)
+        (STATUS_DEAD, _('dead')),
+    ]
+
+    email_token = models.ForeignKey(
+        'EmailToken', null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    phone_token = models.ForeignKey(
+        'PhoneToken', null=True, blank=True, on_delete=models.DO_NOTHING, db_constraint=False
+    )
+    kwargs = models.JSONField(_('delivery function keyword arguments'), default=dict, blank=True)
+    priority = models.PositiveSmallIntegerField(_('priority'), choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL)
+    status = models.CharField(_('status'), max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(_('delivery attempts'), default=0)
+    # The time from which the message may be (re)delivered. It's pushed back while a worker holds the message and after
+    # each failed attempt.
+    available_at = models.DateTimeField(_('available at'), default=timezone.now)
+    claim = models.UUIDField(_('claim'), null=True, blank=True, editable=False)
+    last_error = models.TextField(_('last error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), default=timezone.now)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('outbox message')
+        verbose_name_plural = _('outbox messages')
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    Q(email_token__isnull=False, phone_token__isnull=True)
+                    | Q(email_token__isnull=True, phone_token__isnull=False)
+                ),
+                name='flexuser_outbox_one_token'
+            ),
+        ]
+        indexes = [
+            # Lets the worker find the next messages to deliver without scanning delivered ones
+            models.Index(
+                fields=['priority', 'available_at'], name='flexuser_outbox_pending_idx',
+                condition=Q(status='pending')
+            ),
+        ]
+
+    @property
+    def token(self):
+        return self.email_token if self.email_token_id is not None else self.phone_token
+
+    def get_retry_delay(self):
+        """
+        Return how long to wait before retrying delivery after the message's latest failed attempt. The delay doubles
+        with each attempt, starting from ``FLEX_USER_OTP_DELIVERY_RETRY_DELAY``, up to
+        ``FLEX_USER_OTP_DELIVERY_MAX_RETRY_DELAY``.
+
+        :rtype: ~datetime.timedelta
+        """
+        delay = getattr(settings, 'FLEX_USER_OTP_DELIVERY_RETRY_DELAY', timedelta(seconds=30))
+        max_delay = getattr(settings, 'FLEX_USER_OTP_DELIVERY_MAX_RETRY_DELAY', timedelta(hours=1))
+        return min(delay * 2 ** max(self.attempts - 1, 0), max_delay)
+
+    def __str__(self):
+        return '{token} ({status})'.format(token=self.token, status=self.get_status_display())
@@ -1,23 +1,98 @@
-from django.db import models
-from django.db.models.signals import pre_save, post_save
+import warnings
+from itertools import islice
+
+import django
+from django.db import models, transaction
+from django.db.models.functions import Upper
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
+from django.contrib.auth.hashers import identify_hasher
 from django.contrib.auth.models import PermissionsMixin
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError, NON_FIELD_ERRORS
 
+from asgiref.sync import sync_to_async
 from phonenumber_field.modelfields import PhoneNumberField
-from dirtyfields import DirtyFieldsMixin
 
 from django_flex_user.validators import FlexUserUnicodeUsernameValidator
 from django_flex_user.fields import CICharField
+from django_flex_user.identifiers import phone_lookup_value
+from django_flex_user.cache import IDENTITY_FIELDS, Identity, invalidate_identifiers
+from django_flex_user.hashers import aset_password, make_passwords
+from django_flex_user.models.otp import sync_tokens, queue_token_sync, discard_token_sync
 
 
 # Reference: https://docs.djangoproject.com/en/3.0/topics/auth/customizing/
 # Reference: https://simpleisbetterthancomplex.com/tutorial/2016/07/22/how-to-extend-django-user-model.html
 
-class FlexUserManager(BaseUserManager):
+class FlexUserQuerySet(models.QuerySet):
+    """
+    Our custom implementation of django.db.models.QuerySet for FlexUser.
+    """
+
+    def with_verification(self):
+        """
+        Annotate each user with the verification status of their email address and phone number.
+
+        The annotations, ``email_token_verified`` and ``phone_token_verified``, hold the ``verified`` flag of the user's
+        :class:`~django_flex_user.models.otp.EmailToken` and :class:`~django_flex_user.models.otp.PhoneToken`
+        respectively, or None if the user doesn't have one. They're computed by subqueries within the query which
+        fetches the users.
+
+        Unlike ``email_verified`` and ``phone_verified``, which are denormalized copies of these flags, the annotations
+        are read from the token tables. See :meth:`with_inconsistent_verification`.
+
+        :return: The annotated queryset.
+        :rtype: ~django_flex_user.models.user.FlexUserQuerySet
+        """
+        return self.annotate(**self._get_token_verified_subqueries('token_verified'))
+
+    def with_inconsistent_verification(self):
+        """
+        Filter users whose ``email_verified`` or ``phone_verified`` fields disagree with the ``verified`` flags of their
+        tokens (see :meth:`with_verification`).
+
+        :return: The filtered queryset.
+        :rtype: ~django_flex_user.models.user.FlexUserQuerySet
+        """
+        q = models.Q()
+        for field_name in ('email_verified', 'phone_verified'):
+            annotation = field_name.replace('_verified', '_token_verified')
+            # Spell out each combination of values because comparisons with NULL are never true in SQL
+            q |= models.Q(**{f'{field_name}__isnull': True, f'{annotation}__isnull': False})
+            for value in (True, False):
+                q |= models.Q(**{field_name: value}) & (
+                    models.Q(**{f'{annotation}__isnull': True}) | models.Q(**{annotation: not value})
+                )
+        return self.with_verification().filter(q)
+
+    def sync_verification(self):
+        """
+        Copy the ``verified`` flags of users' tokens to their ``email_verified`` and ``phone_verified`` fields using a
+        single ``UPDATE`` query.
+
+        :return: The number of users updated.
+        :rtype: int
+        """
+        return self.update(**self._get_token_verified_subqueries('verified'))
+
+    @staticmethod
+    def _get_token_verified_subqueries(suffix):
+        from django_flex_user.models.otp import EmailToken, PhoneToken
+
+        return {
+            f'email_{suffix}': models.Subquery(
+                EmailToken.objects.filter(user=models.OuterRef('pk')).order_by('pk').values('verified')[:1]
+            ),
+            f'phone_{suffix}': models.Subquery(
+                PhoneToken.objects.filter(user=models.OuterRef('pk')).order_by('pk').values('verified')[:1]
+            ),
+        }
+
+
+class FlexUserManager(BaseUserManager.from_queryset(FlexUserQuerySet)):
     """
     Our custom implementation of django.contrib.auth.models.UserManager.
     """
@@ -45,6 +120,9 @@ class FlexUserManager(BaseUserManager):
     def _create_user(self, username=None, email=None, phone=None, password=None, **extra_fields):
         user = self.model(username=username, email=email, phone=phone, **extra_fields)
         user.set_password(password)
+        return self._save_user(user)
+
+    def _save_user(self, user):
         user.full_clean()
         user.save(using=self._db)
         return user
@@ -80,6 +158,35 @@ class FlexUserManager(BaseUserManager):
         extra_fields.setdefault('is_superuser', False)
         return self._create_user(username, email, phone, password, **extra_fields)
 
+    async def acreate_user(self, username=None, email=None, phone=None, password=None, **extra_fields):
+        """
+        Asynchronous counterpart of :meth:`create_user`.
+
+        The password is hashed on the executor returned by :func:`django_flex_user.hashers.get_executor` and the user is
+        validated and saved in a thread.
+
+        :param username: The username for the user, defaults to None.
+        :type username: str, optional
+        :param email: The email address for the user, defaults to None.
+        :type email: str, optional
+        :param phone: The phone number for the user, defaults to None.
+        :type phone: str, optional
+        :param password: The password for the user, defaults to None.
+        :type password: str, optional
+        :param extra_fields: Additional model fields you wish to set for the user.
+        :type extra_fields: dict, optional
+        :raises ~django.core.exceptions.ValidationError: If any of the supplied parameters fails model field validation
+            (e.g. the supplied phone number is already in use by another user, the supplied username is invalid, etc.)
+        :return: The newly created user.
+        :rtype: ~django_flex_user.models.user.FlexUser
+        """
+
+        extra_fields.setdefault('is_staff', False)
+        extra_fields.setdefault('is_superuser', False)
+        user = self.model(username=username, email=email, phone=phone, **extra_fields)
+        await aset_password(user, password)
+        return await sync_to_async(self._save_user)(user)
+
     def create_superuser(self, username=None, email=None, phone=None, password=None, **extra_fields):
         """
         Create a super user. You must supply at least one of ``username``, ``email``, or ``phone``.
@@ -117,7 +224,314 @@ class FlexUserManager(BaseUserManager):
 
         return self._create_user(username, email, phone, password, **extra_fields)
 
+    def bulk_create_users(self, users, batch_size=500):
+        """
+        Create many users efficiently.
+
+        Users are validated and normalized in memory, checked for uniqueness using one query per batch, and inserted
+        along with their :class:`~django_flex_user.models.otp.EmailToken` and
+        :class:`~django_flex_user.models.otp.PhoneToken` objects using
+        :meth:`~django.db.models.query.QuerySet.bulk_create`.
+        Either all users are created or, if any user fails validation, none of them are.
+
+        .. warning::
+            Like :meth:`~django.db.models.query.QuerySet.bulk_create`, this method doesn't call ``save()`` and doesn't
+            send the ``pre_save`` and ``post_save`` signals.
+
+        :param users: The users to create. Each user is a dict of the parameters you would pass to :meth:`create_user`.
+        :type users: iterable
+        :param batch_size: The number of users to validate and insert at a time, defaults to 500.
+        :type batch_size: int, optional
+        :raises ~django.core.exceptions.ValidationError: If any of the supplied users fails validation. The error maps
+            the index of each invalid user to its error messages.
+        :return: The newly created users.
+        :rtype: list
+        """
+        users = iter(users)
+        created_users = []
+
+        with transaction.atomic(using=self.db):
+            while True:
+                batch = list(islice(users, batch_size))
+                if not batch:
+                    break
+
+                valid_users, errors = self.validate_users(batch)
+                if errors:
+                    offset = len(created_users)
+                    raise ValidationError({offset + index: error.messages for index, error in errors.items()})
+
+                created_users += self.bulk_insert_users(valid_users)
+
+        return created_users
+
+    def validate_users(self, users):
+        """
+        Validate and normalize users in memory, in preparation for :meth:`bulk_insert_users`.
+
+        In addition to the validation performed by :meth:`create_user`, each user is checked for uniqueness against the
+        other users in ``users``. Uniqueness against existing users is checked using a single query.
+
+        A user may supply ``password_hash`` in place of ``password`` to import a password that was hashed elsewhere
+        (e.g. by another Django project). The hash must be in a format recognized by one of :setting:`PASSWORD_HASHERS`.
+
+        :param users: The users to validate. Each user is a dict of the parameters you would pass to
+            :meth:`create_user`.
+        :type users: list
+        :return: A tuple of the unsaved, valid users and a dict which maps the index of each invalid user in ``users``
+            to a :class:`~django.core.exceptions.ValidationError`.
+        :rtype: tuple
+        """
+        candidates = {}
+        errors = {}
+
+        for index, fields in enumerate(users):
+            fields = dict(fields)
+            password = fields.pop('password', None)
+            password_hash = fields.pop('password_hash', None)
+            fields.setdefault('is_staff', False)
+            fields.setdefault('is_superuser', False)
+            try:
+                if password is not None and password_hash is not None:
+                    raise ValidationError('You may supply password or password_hash but not both.')
+                if password_hash is not None:
+                    try:
+                        identify_hasher(password_hash)
+                    except ValueError:
+                        raise ValidationError({'password': 'Unknown password hashing algorithm.'})
+
+                user = self.model(**fields)
+                # The password is hashed once the user is known to be valid
+                user.full_clean(exclude=['password'], validate_unique=False)
+            except (TypeError, ValueError) as e:
+                errors[index] = ValidationError(str(e))
+            except ValidationError as e:
+                errors[index] = e
+            else:
+                candidates[index] = (user, password, password_hash)
+
+        # Check uniqueness against the other users in the batch, then against existing users
+        seen = {field_name: set() for field_name in IDENTITY_FIELDS}
+        unique_keys = {}
+        for index, (user, *_extra) in list(candidates.items()):
+            keys = unique_keys[index] = self._get_unique_keys(user)
+            duplicates = {k: v for k, v in keys.items() if v in seen[k]}
+            if duplicates:
+                errors[index] = self._unique_error(duplicates)
+                del candidates[index]
+            else:
+                for k, v in keys.items():
+                    seen[k].add(v)
+
+        existing = self._get_existing_unique_keys(**seen)
+        for index in list(candidates):
+            duplicates = {k: v for k, v in unique_keys[index].items() if v in existing[k]}
+            if duplicates:
+                errors[index] = self._unique_error(duplicates)
+                del candidates[index]
+
+        # Hash passwords last so that we don't waste time hashing the passwords of invalid users
+        valid_users = [user for user, *_extra in candidates.values()]
+        encoded_passwords = make_passwords(
+            password for _user, password, _extra in candidates.values() if password is not None
+        )
+        for user, password, password_hash in candidates.values():
+            if password_hash is not None:
+                user.password = password_hash
+            elif password is not None:
+                user.password = next(encoded_passwords)
+            else:
+                user.set_unusable_password()
+
+        return valid_users, dict(sorted(errors.items()))
+
+    def bulk_insert_users(self, users, batch_size=None):
+        """
+        Insert users which have been prepared by :meth:`validate_users`, along with their
+        :class:`~django_flex_user.models.otp.EmailToken` and :class:`~django_flex_user.models.otp.PhoneToken` objects.
+
+        :param users: The unsaved users to insert.
+        :type users: list
+        :param batch_size: The number of objects to insert per query, defaults to None (i.e. as many as possible).
+        :type batch_size: int, optional
+        :return: The inserted users.
+        :rtype: list
+        """
+        for user in users:
+            # bulk_create doesn't send pre_save, so do what its receivers would have done
+            user.email_verified = None if user.email is None else False
+            user.phone_verified = None if user.phone is None else False
+
+        with transaction.atomic(using=self.db):
+            users = self.bulk_create(users, batch_size=batch_size)
+
+            if users and users[0].pk is None:
+                # The database doesn't return primary keys from bulk inserts, so look them up by natural key
+                self._set_primary_keys(users)
+
+            sync_tokens(
+                ((user.pk, k, None, getattr(user, k)) for user in users for k in ('email', 'phone')),
+                using=self.db, batch_size=batch_size
+            )
+
+        for user in users:
+            # bulk_create doesn't send post_save, so do what its receivers would have done
+            user._reset_saved_identifiers()
+            invalidate_identifiers((k, getattr(user, k)) for k in IDENTITY_FIELDS)
+
+        return users
+
+    def bulk_update_users(self, users, fields, batch_size=None):
+        """
+        Update the given fields of the given users using :meth:`~django.db.models.query.QuerySet.bulk_update`, keeping
+        their :class:`~django_flex_user.models.otp.EmailToken` and :class:`~django_flex_user.models.otp.PhoneToken`
+        objects in sync.
+
+        Unlike saving each user, this doesn't send the ``pre_save`` and ``post_save`` signals. Tokens are synced with a
+        handful of queries in total rather than a few per user (see :func:`~django_flex_user.models.otp.sync_tokens`).
+        The users aren't validated, so call :meth:`~django_flex_user.models.user.FlexUser.full_clean` on them first if
+        necessary.
+
+        :param users: The users to update. They must have been fetched from the database.
+        :type users: list
+        :param fields: The names of the fields to update.
+        :type fields: list
+        :param batch_size: The number of users to update per query, defaults to None (i.e. as many as possible).
+        :type batch_size: int, optional
+        :return: The number of rows matched.
+        :rtype: int
+        """
+        fields = list(fields)
+        identifier_changes = [user.get_identifier_changes(fields) for user in users]
+
+        token_changes = []
+        for user, changes in zip(users, identifier_changes):
+            for field_name in changes.keys() & {'email', 'phone'}:
+                # Do what my_pre__save_handler would have done
+                setattr(user, f'{field_name}_verified', None if getattr(user, field_name) is None else False)
+                token_changes.append((user.pk, field_name, changes[field_name], getattr(user, field_name)))
+        fields += [f'{k}_verified' for k in ('email', 'phone') if k in fields and f'{k}_verified' not in fields]
+
+        with transaction.atomic(using=self.db):
+            count = self.bulk_update(users, fields, batch_size=batch_size)
+            sync_tokens(token_changes, using=self.db, batch_size=batch_size)
+
+        for user, changes in zip(users, identifier_changes):
+            # Do what the post_save receivers would have done
+            user._reset_saved_identifiers(fields)
+            invalidate_identifiers(
+                [(k, getattr(user, k)) for k in changes] + [(k, v) for k, v in changes.items() if v is not None]
+            )
+
+        return count
+
+    def validate_identifiers_unique(self, username=None, email=None, phone=None, exclude=None):
+        """
+        Check that the supplied identifiers aren't in use by any user, using a single query.
+
+        This is the uniqueness check performed by :meth:`~django_flex_user.models.user.FlexUser.validate_unique` (and
+        therefore by :meth:`create_user`, model forms and the admin site) and by
+        :class:`~django_flex_user.serializers.FlexUserSerializer`.
+
+        :param username: The username to check, defaults to None. Usernames are compared case-insensitively.
+        :type username: str, optional
+        :param email: The email address to check, defaults to None.
+        :type email: str, optional
+        :param phone: The phone number to check, defaults to None.
+        :type phone: str, optional
+        :param exclude: The primary key of a user to ignore (i.e. the user the identifiers belong to), defaults to None.
+        :type exclude: int, optional
+        :raises ~django.core.exceptions.ValidationError: If any of the identifiers is in use. The error maps each
+            identifier in use to an error message.
+        """
+        keys = self._get_unique_keys_for(username, email, phone)
+        existing = self._get_existing_unique_keys(exclude=exclude, **{k: [v] for k, v in keys.items()})
+        duplicates = [k for k, v in keys.items() if v in existing[k]]
+        if duplicates:
+            raise self._unique_error(duplicates)
+
+    def _get_unique_keys(self, user):
+        return self._get_unique_keys_for(user.username, user.email, user.phone)
+
+    def _get_unique_keys_for(self, username=None, email=None, phone=None):
+        keys = {}
+        if username is not None:
+            # Usernames are case-insensitive. Their case is folded the way the database folds it.
+            keys['username'] = self.model._meta.get_field('username').fold_case(username)
+        if email is not None:
+            keys['email'] = email
+        if phone is not None:
+            keys['phone'] = str(self.model._meta.get_field('phone').get_prep_value(phone))
+        return keys
+
+    def _get_existing_unique_keys(self, username=(), email=(), phone=(), exclude=None):
+        existing = {field_name: set() for field_name in IDENTITY_FIELDS}
+        if not username and not email and not phone:
+            return existing
+
+        q = models.Q(username__in=username) | models.Q(email__in=email) | models.Q(phone__in=phone)
+        queryset = self.filter(q)
+        if exclude is not None:
+            queryset = queryset.exclude(pk=exclude)
+        for user in queryset.only(*IDENTITY_FIELDS):
+            for k, v in self._get_unique_keys(user).items():
+                existing[k].add(v)
+        return existing
+
+    def _unique_error(self, field_names):
+        return ValidationError({
+            field_name: ValidationError(self.model._meta.get_field(field_name).error_messages['unique'], code='unique')
+            for field_name in field_names
+        })
+
+    def _set_primary_keys(self, users):
+        q = models.Q()
+        for user in users:
+            for k, v in self._get_unique_keys(user).items():
+                q |= models.Q(**{k: v})
+
+        primary_keys = {}
+        for user in self.filter(q).only('pk', *IDENTITY_FIELDS):
+            for item in self._get_unique_keys(user).items():
+                primary_keys[item] = user.pk
+
+        for user in users:
+            user.pk = primary_keys[next(iter(self._get_unique_keys(user).items()))]
+            user._state.adding = False
+            user._state.db = self.db
+
     def get_by_natural_key(self, username=None, email=None, phone=None):
+        return self.get(**self._get_natural_key_lookup(username, email, phone))
+
+    async def aget_by_natural_key(self, username=None, email=None, phone=None):
+        """
+        Asynchronous counterpart of :meth:`get_by_natural_key`.
+        """
+        return await sync_to_async(self.get_by_natural_key)(username, email, phone)
+
+    def get_identity_by_natural_key(self, username=None, email=None, phone=None):
+        """
+        Return the identity of the user with the given natural key.
+
+        Unlike :meth:`get_by_natural_key`, this method fetches only the columns needed to authenticate the user (i.e.
+        ``id``, ``password`` and ``is_active``) and doesn't instantiate a user object. On PostgreSQL the lookup is
+        answered by a covering index without reading the table.
+
+        :param username: The user's username, defaults to None.
+        :type username: str, optional
+        :param email: The user's email address, defaults to None.
+        :type email: str, optional
+        :param phone: The user's phone number, defaults to None.
+        :type phone: str, optional
+        :raises ~django_flex_user.models.user.FlexUser.DoesNotExist: If no user has the given natural key.
+        :return: The user's identity.
+        :rtype: ~django_flex_user.cache.Identity
+        """
+        q = self._get_natural_key_lookup(username, email, phone)
+        return Identity(*self.filter(**q).values_list('pk', 'password', 'is_active').get())
+
+    @staticmethod
+    def _get_natural_key_lookup(username=None, email=None, phone=None):
         if username is None and email is None and phone is None:
             raise ValueError('You must supply at least one of username, email or phone number')
 
@@ -127,12 +541,11 @@ class FlexUserManager(BaseUserManager):
         if email is not None:
             q.update({'email': email})
         if phone is not None:
-            q.update({'phone': phone})
+            q.update({'phone': phone_lookup_value(phone)})
+        return q
 
-        return self.get(**q)
 
-
-class FlexUser(AbstractBaseUser, PermissionsMixin, DirtyFieldsMixin):
+class FlexUser(AbstractBaseUser, PermissionsMixin):
     """
     Our implementation django.contrib.auth.models.User.
 
@@ -240,6 +653,10 @@ class FlexUser(AbstractBaseUser, PermissionsMixin, DirtyFieldsMixin):
         ),
     )
     date_joined = models.DateTimeField(_('date joined'), default=timezone.now)
+    # Denormalized copies of the verified flags of the user's EmailToken and PhoneToken. None if the user doesn't have
+    # an email address or phone number respectively.
+    email_verified = models.BooleanField(_('email address verified'), null=True, editable=False)
+    phone_verified = models.BooleanField(_('phone number verified'), null=True, editable=False)
 
     # We remove these fields from our user model implementation
     # first_name = models.CharField(_('first name'), max_length=30, blank=True)
@@ -254,6 +671,15 @@ class FlexUser(AbstractBaseUser, PermissionsMixin, DirtyFieldsMixin):
     class Meta:
         verbose_name = _('user')
         verbose_name_plural = _('users')
+        # Enforces the case-insensitive uniqueness of usernames on databases other than PostgreSQL (where the username
+        # column is citext) and answers CICharField's case-insensitive lookups. Django 3.2 can't declare a constraint
+        # on an expression, so there migration 0007 creates the same index using SQL.
+        constraints = [
+            models.UniqueConstraint(Upper('username'), name='django_flex_user_flexuser_username_upper_uniq'),
+        ] if django.VERSION >= (4, 0) else []
+        # FlexUserManager.get_identity_by_natural_key is answered by index-only scans on PostgreSQL, using covering
+        # indexes which migration 0003 creates there alone. They aren't declared here because other databases don't
+        # support them.
 
     def clean(self):
         errors = {}
@@ -293,6 +719,103 @@ class FlexUser(AbstractBaseUser, PermissionsMixin, DirtyFieldsMixin):
         self.username = self.normalize_username(self.username)
         self.email = FlexUser.objects.normalize_email(self.email)
 
+    def validate_unique(self, exclude=None):
+        # Check username, email and phone for uniqueness using a single query rather than one query each
+        exclude = set(exclude or ())
+        errors = {}
+        try:
+            super().validate_unique(exclude=exclude | set(IDENTITY_FIELDS))
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        identifiers = {k: getattr(self, k) for k in IDENTITY_FIELDS if k not in exclude}
+        try:
+            type(self)._default_manager.validate_identifiers_unique(
+                **identifiers, exclude=None if self._state.adding else self.pk
+            )
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        if errors:
+            raise ValidationError(errors)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the saved values of the user's identifiers so that we can tell which of them changed when the user is
+        # saved. These are the only fields whose changes we act on, so we don't snapshot the others.
+        instance._saved_identifiers = {k: instance.__dict__[k] for k in IDENTITY_FIELDS if k in instance.__dict__}
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._reset_saved_identifiers(fields)
+
+    def _reset_saved_identifiers(self, field_names=None):
+        saved_identifiers = self.__dict__.setdefault('_saved_identifiers', {})
+        for k in IDENTITY_FIELDS:
+            if (field_names is None or k in field_names) and k in self.__dict__:
+                saved_identifiers[k] = self.__dict__[k]
+
+    def get_identifier_changes(self, field_names=None):
+        """
+        Return the user's identifiers (i.e. username, email and phone) whose values differ from their saved values.
+
+        Identifiers which were deferred when the user was loaded, and every identifier of a user which has never been
+        saved, are considered unchanged.
+
+        :param field_names: The identifiers to check, defaults to None (i.e. all of them).
+        :type field_names: iterable, optional
+        :return: A dict which maps the name of each changed identifier to its saved value.
+        :rtype: dict
+        """
+        saved_identifiers = self.__dict__.get('_saved_identifiers', {})
+        return {
+            k: saved_identifiers[k] for k in IDENTITY_FIELDS
+            if (field_names is None or k in field_names) and k in saved_identifiers
+            and self.__dict__.get(k) != saved_identifiers[k]
+        }
+
+    def _get_dirty_fields(self, verbose):
+        if self._state.adding:
+            # Like DirtyFieldsMixin, consider every identifier of a user which has never been saved dirty
+            changes = dict.fromkeys(IDENTITY_FIELDS)
+        else:
+            changes = self.get_identifier_changes()
+        if verbose:
+            return {k: {'saved': v, 'current': getattr(self, k)} for k, v in changes.items()}
+        if self._state.adding:
+            return {k: getattr(self, k) for k in changes}
+        return changes
+
+    def get_dirty_fields(self, check_relationship=False, check_m2m=None, verbose=False):
+        """
+        Deprecated, use :meth:`get_identifier_changes` instead.
+
+        Kept for compatibility with ``dirtyfields.DirtyFieldsMixin``, which this model no longer mixes in. Only the
+        user's identifiers (i.e. username, email and phone) are tracked, so other fields are never reported as dirty.
+        ``check_relationship`` and ``check_m2m`` are ignored.
+        """
+        warnings.warn(
+            'FlexUser.get_dirty_fields() is deprecated and only reports changes to username, email and phone. Use '
+            'FlexUser.get_identifier_changes() instead.',
+            DeprecationWarning, stacklevel=2
+        )
+        return self._get_dirty_fields(verbose)
+
+    def is_dirty(self, check_relationship=False, check_m2m=None):
+        """
+        Deprecated, use :meth:`get_identifier_changes` instead.
+
+        Kept for compatibility with ``dirtyfields.DirtyFieldsMixin``. See :meth:`get_dirty_fields`.
+        """
+        warnings.warn(
+            'FlexUser.is_dirty() is deprecated and only reports changes to username, email and phone. Use '
+            'FlexUser.get_identifier_changes() instead.',
+            DeprecationWarning, stacklevel=2
+        )
+        return bool(self._get_dirty_fields(verbose=False))
+
     def get_username(self):
         """Return the identifying username for this user"""
         return self.username or self.email or (str(self.phone) if self.phone else None) or str(self.id)
@@ -303,52 +826,59 @@ class FlexUser(AbstractBaseUser, PermissionsMixin, DirtyFieldsMixin):
 
 @receiver(pre_save, sender=FlexUser)
 def my_pre__save_handler(sender, **kwargs):
-    pass
+    user = kwargs['instance']
+
+    # Work out which identifiers are changing once, for the post_save receivers below
+    if user._state.adding:
+        user._identifier_changes = dict.fromkeys(IDENTITY_FIELDS)
+    else:
+        user._identifier_changes = user.get_identifier_changes(kwargs['update_fields'])
+
+    # A new or changed email address or phone number is unverified. See my_post_save_handler, which resets the
+    # corresponding token.
+    for field_name in user._identifier_changes.keys() & {'email', 'phone'}:
+        setattr(user, f'{field_name}_verified', None if getattr(user, field_name) is None else False)
 
 
 @receiver(post_save, sender=FlexUser)
-def my_post_save_handler(sender, **kwargs):
+def identity_cache_post_save_handler(sender, **kwargs):
     user = kwargs['instance']
 
-    if kwargs['created']:
-        if user.email is not None:
-            user.emailtoken_set.create(user_id=user.id, email=user.email)
-        if user.phone is not None:
-            user.phonetoken_set.create(user_id=user.id, phone=user.phone)
-    else:
-        dirty_fields = user.get_dirty_fields(verbose=True)
-
-        if 'email' in dirty_fields:
-            if dirty_fields['email']['current'] is None:
-                # If the new value for email is None, delete the token if it exists
-                user.emailtoken_set.filter(user_id=user.id).delete()
-            elif dirty_fields['email']['saved'] is None:
-                # If the old value for email is None and its new value is not None, create a new token
-                # todo: construct this instance manually?
-                user.emailtoken_set.create(user=user, email=dirty_fields['email']['current'])
-            else:
-                # Otherwise, update the existing token
-                email_token = user.emailtoken_set.get(user=user)
-                email_token.email = user.email
-                # Reset the password
-                email_token.verified = False
-                email_token.password = None
-                email_token.expiration = None
-                email_token.save(update_fields=['email', 'verified', 'password', 'expiration'])
-        if 'phone' in dirty_fields:
-            if dirty_fields['phone']['current'] is None:
-                # If the new value for phone is None, delete the token if it exists
-                user.phonetoken_set.filter(user_id=user.id).delete()
-            elif dirty_fields['phone']['saved'] is None:
-                # If the old value for phone is None and its new value is not None, create a new token
-                # todo: construct this instance manually?
-                user.phonetoken_set.create(user=user, phone=dirty_fields['phone']['current'])
-            else:
-                # Otherwise, update the existing token
-                phone_token = user.phonetoken_set.get(user=user)
-                phone_token.phone = user.phone
-                # Reset the password
-                phone_token.verified = False
-                phone_token.password = None
-                phone_token.expiration = None
-                phone_token.save(update_fields=['phone', 'verified', 'password', 'expiration'])
+    # Saves which can't change a cached identity (e.g. django.contrib.auth.login updating last_login) don't invalidate it
+    update_fields = kwargs['update_fields']
+    if update_fields is not None and update_fields.isdisjoint({*IDENTITY_FIELDS, 'password', 'is_active'}):
+        return
+
+    # Invalidate cache entries for the user's current identifiers as well as for any identifiers that were just replaced
+    identifiers = [(k, getattr(user, k)) for k in IDENTITY_FIELDS]
+    identifiers += [(k, v) for k, v in user._identifier_changes.items() if v is not None]
+
+    invalidate_identifiers(identifiers)
+
+
+@receiver(post_delete, sender=FlexUser)
+def identity_cache_post_delete_handler(sender, **kwargs):
+    user = kwargs['instance']
+    invalidate_identifiers((k, getattr(user, k)) for k in IDENTITY_FIELDS)
+    discard_token_sync(user.pk, using=kwargs['using'])
+
+
+@receiver(post_save, sender=FlexUser)
+def my_post_save_handler(sender, **kwargs):
+    user = kwargs['instance']
+    changes = {k: v for k, v in user._identifier_changes.items() if k in ('email', 'phone')}
+
+    # my_pre__save_handler resets email_verified and phone_verified when email and phone change. Persist them if the
+    # caller's update_fields left them out.
+    update_fields = kwargs['update_fields']
+    if update_fields is not None:
+        verified_fields = {
+            f'{k}_verified': getattr(user, f'{k}_verified') for k in changes if f'{k}_verified' not in update_fields
+        }
+        if verified_fields:
+            sender._default_manager.using(kwargs['using']).filter(pk=user.pk).update(**verified_fields)
+
+    # Create, update or delete the user's tokens to match. This is deferred if the save is inside coalesce_token_sync.
+    queue_token_sync(((user.pk, k, v, getattr(user, k)) for k, v in changes.items()), using=kwargs['using'])
+
+    user._reset_saved_identifiers(update_fields)
@@ -0,0 +1,248 @@
+import hashlib
+import logging
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from rest_framework.throttling import BaseThrottle
+
+from django_flex_user.identifiers import resolve_identifier
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the layout of cached entries changes so that entries written by older code are never read back
+RATE_LIMIT_CACHE_VERSION = 1
+
+# The rate of each scope unless overridden by FLEX_USER_RATE_LIMITS. A rate of None disables the scope.
+DEFAULT_RATE_LIMITS = {
+    # New one-time passwords per token, per email address or phone number and per client
+    'otp_generate_token': '5/15m',
+    'otp_generate_identifier': '10/h',
+    'otp_generate_client': '30/h',
+    # Token searches per (normalized) search term and per client
+    'otp_search_identifier': '10/m',
+    'otp_search_client': '30/m',
+}
+
+_PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+# Used when FLEX_USER_RATE_LIMIT_CACHE is None or the configured cache fails. It's local to the process, so clients
+# which spread their requests over several processes get more requests.
+_fallback_cache = LocMemCache('flex_user_ratelimit', {})
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, scope, retry_after):
+        self.scope = scope
+        # The number of whole seconds until the request would be allowed, suitable for a Retry-After header
+        self.retry_after = retry_after
+        super().__init__(f'Rate limit exceeded for {scope}, retry after {retry_after} seconds.')
+
+
+def parse_rate(rate):
+    """
+    Parse a rate of the form ``<number of requests>/<period>``, where the period is a number of seconds, minutes,
+    hours or days (e.g. ``'5/15m'`` or ``'100/day'``). The number of periods may be omitted, as in DRF's throttle rates.
+
+    :param rate: The rate, or None.
+    :type rate: str
+    :return: A tuple of the number of requests and the length of the window in seconds, or None if ``rate`` is None.
+    :rtype: None, tuple
+    """
+    if rate is None:
+        return None
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d*)\s*([smhd])[a-z]*\s*', rate)
+    if match is None:
+        raise ValueError('Invalid rate: {rate}'.format(rate=rate))
+    num_requests, num_periods, period = match.groups()
+    return int(num_requests), int(num_periods or 1) * _PERIODS[period]
+
+
+def get_rate(scope):
+    """
+    Return the rate of a scope, see ``FLEX_USER_RATE_LIMITS``.
+
+    :rtype: None, tuple
+    """
+    rates = getattr(settings, 'FLEX_USER_RATE_LIMITS', {})
+    return parse_rate(rates[scope] if scope in rates else DEFAULT_RATE_LIMITS.get(scope))
+
+
+def get_rate_limit_cache():
+    """
+    Return the cache configured by ``FLEX_USER_RATE_LIMIT_CACHE``, or the in-memory fallback if it's None.
+
+    :rtype: ~django.core.cache.backends.base.BaseCache
+    """
+    alias = getattr(settings, 'FLEX_USER_RATE_LIMIT_CACHE', 'default')
+    return caches[alias] if alias is not None else _fallback_cache
+
+
+def _make_key(scope, key, window_start):
+    digest = hashlib.sha256(str(key).encode('utf-8')).hexdigest()
+    return f'flex_user:ratelimit:{scope}:{digest}:{window_start}'
+
+
+def _count(cache, key, duration):
+    # add and incr are atomic on the cache backends Django ships with (and on django-redis), so concurrent requests
+    # each get a distinct count. Each fixed window must outlive the sliding window which follows it.
+    cache.add(key, 0, 2 * duration, version=RATE_LIMIT_CACHE_VERSION)
+    try:
+        return cache.incr(key, version=RATE_LIMIT_CACHE_VERSION)
+    except ValueError:
+        # The entry was evicted between add and incr
+        cache.set(key, 1, 2 * duration, version=RATE_LIMIT_CACHE_VERSION)
+        return 1
+
+
+def _uncount(cache, key):
+    try:
+        cache.decr(key, version=RATE_LIMIT_CACHE_VERSION)
+    except ValueError:
+        # The entry has been evicted, so there's nothing to take back
+        pass
+
+
+def _check_and_count(cache, limits, now):
+    windows = []
+    for scope, key, (num_requests, duration) in limits:
+        window_start = int(now // duration) * duration
+        windows.append((
+            scope, num_requests, duration, now - window_start,
+            _make_key(scope, key, window_start), _make_key(scope, key, window_start - duration)
+        ))
+
+    previous_counts = cache.get_many([window[5] for window in windows], version=RATE_LIMIT_CACHE_VERSION)
+
+    # The request is counted before it's checked, so that concurrent requests can't all read the same count and all
+    # be allowed
+    counted = []
+    exceeded = []
+    for scope, num_requests, duration, elapsed, current_key, previous_key in windows:
+        current = _count(cache, current_key, duration)
+        counted.append(current_key)
+        previous = previous_counts.get(previous_key, 0)
+        # The sliding window's count is estimated by weighting the previous fixed window by how much of it the sliding
+        # window still overlaps
+        if previous * (duration - elapsed) / duration + current > num_requests:
+            if current > num_requests or not previous:
+                retry_after = duration - elapsed
+            else:
+                # The time until enough of the previous window has slid out of view
+                retry_after = (duration - elapsed) - (num_requests - current) * duration / previous
+            exceeded.append(RateLimitExceeded(scope, max(math.ceil(retry_after), 1)))
+
+    if exceeded:
+        # Take the refused request back, so that it doesn't use up any of the limits
+        for key in counted:
+            _uncount(cache, key)
+        raise max(exceeded, key=lambda e: e.retry_after)
+
+
+def check_rate_limits(*limits):
+    """
+    Count a request against several rate limits, or raise :class:`RateLimitExceeded` without counting it if it
+    exceeds any of them.
+
+    Rates are enforced over a sliding window (i.e. the number of requests made during the window which ends now) which
+    is estimated from the counts of the current and previous fixed windows, so each limit costs two cache entries
+    regardless of its rate. The request is counted using the cache's atomic increment before it's checked, and the
+    count is taken back if the request is refused, so concurrent requests can't exceed a limit.
+
+    :param limits: Tuples of scope and key (e.g. ``('otp_generate_client', '203.0.113.1')``). Limits whose scope is
+        disabled or whose key is None are ignored.
+    :raises RateLimitExceeded: If the request exceeds any of the limits. ``retry_after`` is the longest wait.
+    """
+    limits = [(scope, key, get_rate(scope)) for scope, key in limits]
+    limits = [(scope, key, rate) for scope, key, rate in limits if key is not None and rate is not None]
+    if not limits:
+        return
+
+    now = time.time()
+    cache = get_rate_limit_cache()
+    try:
+        _check_and_count(cache, limits, now)
+    except RateLimitExceeded:
+        raise
+    except Exception:
+        if cache is _fallback_cache:
+            raise
+        # Don't let an unavailable cache take down the views it protects
+        logger.warning('The rate limit cache failed, falling back to an in-memory cache.', exc_info=True)
+        _check_and_count(_fallback_cache, limits, now)
+
+
+def get_client_ident(request):
+    """
+    Identify the client making a request by its IP address, honouring DRF's ``NUM_PROXIES`` setting.
+
+    :rtype: str
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def check_otp_generation(request, token):
+    """
+    Count a request for a new one-time password against the token, its email address or phone number and the client.
+
+    :param request: The request.
+    :type request: ~rest_framework.request.Request
+    :param token: The token.
+    :type token: ~django_flex_user.models.otp.SideChannelToken
+    :raises RateLimitExceeded: If the request exceeds any of the limits.
+    """
+    check_rate_limits(
+        ('otp_generate_token', f'{token._meta.label_lower}:{token.pk}'),
+        ('otp_generate_identifier', token.get_name().lower()),
+        ('otp_generate_client', get_client_ident(request)),
+    )
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    A DRF throttle which limits requests using :func:`check_rate_limits`. Set :attr:`scope` to one of the scopes of
+    ``FLEX_USER_RATE_LIMITS`` and override :meth:`get_key` to limit requests by something other than the client's IP
+    address.
+    """
+
+    scope = None
+
+    def __init__(self):
+        self.retry_after = None
+
+    def get_key(self, request, view):
+        """
+        Return the key to count the request against, or None to not limit it.
+        """
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        try:
+            check_rate_limits((self.scope, self.get_key(request, view)))
+        except RateLimitExceeded as e:
+            self.retry_after = e.retry_after
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class OTPSearchClientThrottle(SlidingWindowThrottle):
+    scope = 'otp_search_client'
+
+
+class OTPSearchIdentifierThrottle(SlidingWindowThrottle):
+    scope = 'otp_search_identifier'
+
+    def get_key(self, request, view):
+        search = request.query_params.get('search')
+        if not search:
+            return None
+        # Different spellings of the same identifier (e.g. "(202) 555-1234" and "+1 202-555-1234") share a limit
+        field_name, value = resolve_identifier(search)
+        return f'{field_name}:{value.lower()}'
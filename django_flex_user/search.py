@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast
+from django.urls import reverse
+
+from django_flex_user.cache import resolve_identity
+from django_flex_user.identifiers import resolve_identifier
+from django_flex_user.models.otp import EmailToken, PhoneToken
+
+# The kinds of token returned by search_tokens, along with the model, the name field and the view name of each
+TOKEN_KINDS = {
+    'email': (EmailToken, 'email', 'email-token'),
+    'phone': (PhoneToken, 'phone', 'phone-token'),
+}
+
+# A token found by search_tokens. name is the token's email address or phone number as stored in the database.
+TokenSearchResult = namedtuple('TokenSearchResult', ['kind', 'pk', 'name'])
+
+
+def search_tokens(search):
+    """
+    Find the one-time password tokens of the user identified by a search term (i.e. their username, email address or
+    phone number).
+
+    The search term is classified by :func:`~django_flex_user.identifiers.resolve_identifier` and resolved to a user
+    using the identity cache (see ``FLEX_USER_IDENTITY_CACHE``) or a single
+    indexed lookup, then the user's email and phone tokens are fetched using a single ``UNION`` query. A search
+    therefore takes at most two queries, and just one if the identity cache knows the user.
+
+    :param search: The search term.
+    :type search: str
+    :return: The tokens, ordered by kind then primary key.
+    :rtype: list[TokenSearchResult]
+    """
+    if not search:
+        return []
+
+    identity = resolve_identity(**dict([resolve_identifier(search)]))
+    if not identity:
+        return []
+
+    querysets = [
+        model.objects.filter(user_id=identity.pk).annotate(
+            kind=Value(kind, output_field=CharField()),
+            name=Cast(F(name_field), output_field=CharField())
+        ).values_list('kind', 'pk', 'name')
+        for kind, (model, name_field, _) in TOKEN_KINDS.items()
+    ]
+    rows = querysets[0].union(*querysets[1:], all=True).order_by('kind', 'pk')
+    return [TokenSearchResult(*row) for row in rows]
+
+
+def get_token_uri_templates(request):
+    """
+    Return the prefix and suffix of the absolute URI of a token of each kind, so that the URI of a token is
+    ``prefix + str(pk) + suffix``. URIs are reversed once per request rather than once per token.
+
+    :rtype: dict
+    """
+    sentinel = 'flex-user-token-pk'
+    templates = {}
+    for kind, (_, _, view_name) in TOKEN_KINDS.items():
+        prefix, suffix = request.build_absolute_uri(reverse(view_name, args=(sentinel,))).split(sentinel)
+        templates[kind] = (prefix, suffix)
+    return templates
@@ -1,6 +1,8 @@
 from django.core import exceptions
 from django.core.validators import EmailValidator
-from django.contrib.auth import get_user_model, authenticate, password_validation, update_session_auth_hash
+from django.contrib.auth import get_user_model, password_validation, update_session_auth_hash
+
+from asgiref.sync import sync_to_async
 
 from rest_framework import serializers
 from rest_framework.fields import empty
@@ -12,6 +14,9 @@ from social_django.models import UserSocialAuth
 
 from django_flex_user.models.user import FlexUserUnicodeUsernameValidator
 from django_flex_user.models.otp import EmailToken, PhoneToken
+from django_flex_user.backends import aauthenticate_user, authenticate_user
+from django_flex_user.hashers import aset_password
+from django_flex_user.search import TOKEN_KINDS
 
 UserModel = get_user_model()
 
@@ -20,73 +25,45 @@ UserModel = get_user_model()
 # https://stackoverflow.com/questions/27591574/order-of-serializer-validation-in-django-rest-framework
 
 class FlexUserSerializer(serializers.ModelSerializer):
-    email_verified = serializers.SerializerMethodField('get_email_verified')
-    phone_verified = serializers.SerializerMethodField('get_phone_verified')
-
-    @staticmethod
-    def get_email_verified(obj):
-        email_token = obj.emailtoken_set.first()
-        return email_token.verified if email_token else None
-
-    @staticmethod
-    def get_phone_verified(obj):
-        phone_token = obj.phonetoken_set.first()
-        return phone_token.verified if phone_token else None
-
     def validate_username(self, value):
         """
-        Normalize username and check it for uniqueness.
+        Normalize username.
 
         :param value:
         :return:
         """
-        value = self.Meta.model.normalize_username(value)
-
-        if value is None:
-            return value
-
-        query_set = self.Meta.model.objects.all()
-        query_set = query_set.filter(username=value)
-        query_set = query_set.exclude(pk=self.instance.pk) if self.instance else query_set
-        if query_set.exists():
-            raise serializers.ValidationError(
-                self.Meta.model._meta.get_field('username').error_messages['unique']
-            )
-        return value
+        return self.Meta.model.normalize_username(value)
 
     def validate_email(self, value):
         """
-        Normalize email and check it for uniqueness.
+        Normalize email.
 
         :param value:
         :return:
         """
-        value = self.Meta.model.objects.normalize_email(value)
-
-        if value is None:
-            return value
-
-        query_set = self.Meta.model.objects.all()
-        query_set = query_set.filter(email=value)
-        query_set = query_set.exclude(pk=self.instance.pk) if self.instance else query_set
-        if query_set.exists():
-            raise serializers.ValidationError(
-                self.Meta.model._meta.get_field('email').error_messages['unique']
-            )
-        return value
+        return self.Meta.model.objects.normalize_email(value)
 
     def validate(self, attrs):
         # note eben: This method runs only if all field level validation passes
 
         # https://github.com/encode/django-rest-framework/issues/5521
 
-        # Extract username, email and phone from supplied instance and merge it with attrs
-        instance = self.instance if self.instance else self.Meta.model()
-        serializer = FlexUserSerializer(instance=instance)
-        data = {**serializer.data, **attrs}
+        # Extract username, email and phone from supplied instance and merge it with attrs. We read them straight from
+        # the instance rather than serializing it, which would run every field's to_representation.
+        data = {k: getattr(self.instance, k) if self.instance else None for k in ('username', 'email', 'phone')}
+        data.update(attrs)
 
         errors = {}
 
+        # Check the supplied username, email and phone for uniqueness using a single query
+        try:
+            self.Meta.model.objects.validate_identifiers_unique(
+                **{k: attrs[k] for k in ('username', 'email', 'phone') if k in attrs},
+                exclude=self.instance.pk if self.instance else None
+            )
+        except exceptions.ValidationError as e:
+            errors.update(e.message_dict)
+
         # Check that the caller has supplied at least one of username, email or phone
         if data.get('username') is None and data.get('email') is None and data.get('phone') is None:
             errors[api_settings.NON_FIELD_ERRORS_KEY] = \
@@ -103,8 +80,7 @@ class FlexUserSerializer(serializers.ModelSerializer):
                 # note eben: Be aware that there may be issues if a password validator expects the user instance to have
                 # a valid id and/or have been persisted to the database. For example, issues may occur in a password
                 # validator that checks for password reuse.
-                filter_keys = ('email_verified', 'phone_verified', 'password')
-                temp_user = self.Meta.model(**{k: v for k, v in data.items() if k not in filter_keys})
+                temp_user = self.Meta.model(**{k: v for k, v in data.items() if k != 'password'})
                 temp_user.set_unusable_password()
                 password_validation.validate_password(attrs['password'], temp_user)
             except exceptions.ValidationError as e:
@@ -140,6 +116,43 @@ class FlexUserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+    async def asave(self, **kwargs):
+        """
+        Asynchronous counterpart of :meth:`save`.
+
+        Passwords are hashed on the executor returned by :func:`django_flex_user.hashers.get_executor` and database
+        queries run in a thread.
+        """
+        validated_data = {**self.validated_data, **kwargs}
+
+        if self.instance is not None:
+            self.instance = await self.aupdate(self.instance, validated_data)
+        else:
+            self.instance = await self.acreate(validated_data)
+
+        return self.instance
+
+    async def acreate(self, validated_data):
+        password = validated_data.pop('password')
+        user = self.Meta.model(**validated_data)
+        await aset_password(user, password)
+        await sync_to_async(user.save)()
+        return user
+
+    async def aupdate(self, instance, validated_data):
+        for attr, value in validated_data.items():
+            if attr == 'password':
+                await aset_password(instance, value)
+                # Prevent the user from being signed out of their current session upon password change.
+                # https://docs.djangoproject.com/en/3.0/topics/auth/default/#session-invalidation-on-password-change
+                request = self.context.get('request')
+                if request and request.session.session_key:
+                    await sync_to_async(update_session_auth_hash)(request, instance)
+            else:
+                setattr(instance, attr, value)
+        await sync_to_async(instance.save)()
+        return instance
+
     class Meta:
         model = UserModel
         fields = ['username', 'email', 'email_verified', 'phone', 'phone_verified', 'password']
@@ -153,7 +166,8 @@ class FlexUserSerializer(serializers.ModelSerializer):
                 'validators': [EmailValidator()]  # Remove Unique validator
             },
             'phone': {
-                'allow_blank': False
+                'allow_blank': False,
+                'validators': [validate_international_phonenumber]  # Remove Unique validator
             },
             'password': {
                 'max_length': None,  # todo: redundant, this is the default value
@@ -177,7 +191,7 @@ class AuthenticationSerializer(serializers.Serializer):
         max_length=254,
         required=False
     )
-    email_verified = serializers.SerializerMethodField('get_email_verified')
+    email_verified = serializers.BooleanField(allow_null=True, read_only=True)
     phone = serializers.CharField(
         allow_blank=False,
         allow_null=True,
@@ -185,7 +199,7 @@ class AuthenticationSerializer(serializers.Serializer):
         required=False,
         validators=[validate_international_phonenumber]
     )
-    phone_verified = serializers.SerializerMethodField('get_phone_verified')
+    phone_verified = serializers.BooleanField(allow_null=True, read_only=True)
     password = serializers.CharField(
         allow_blank=False,
         allow_null=False,
@@ -195,16 +209,6 @@ class AuthenticationSerializer(serializers.Serializer):
         write_only=True
     )
 
-    @staticmethod
-    def get_email_verified(obj):
-        email_token = obj.emailtoken_set.first()
-        return email_token.verified if email_token else None
-
-    @staticmethod
-    def get_phone_verified(obj):
-        phone_token = obj.phonetoken_set.first()
-        return phone_token.verified if phone_token else None
-
     @staticmethod
     def _english_join(items):
         return ', '.join(
@@ -228,6 +232,8 @@ class AuthenticationSerializer(serializers.Serializer):
 
         super(AuthenticationSerializer, self).__init__(instance, data, **kwargs)
         self.user = None
+        self._candidate = None
+        self._defer_authentication = False
 
     def validate(self, attrs):
         # Check that the caller has supplied at least one of username, email or phone
@@ -241,7 +247,7 @@ class AuthenticationSerializer(serializers.Serializer):
             )
 
         # Check that the supplied username, email and phone match an existing user
-        query = {k: v for k, v in attrs.items() if k is not 'password' and v is not None}
+        query = {k: v for k, v in attrs.items() if k != 'password' and v is not None}
         try:
             user = UserModel.objects.get(**query)
         except UserModel.DoesNotExist:
@@ -262,18 +268,51 @@ class AuthenticationSerializer(serializers.Serializer):
                 {'password': "You can't sign in using this method. Try signing in using Facebook or Google."}
             )
 
-        # Check that the supplied password is correct
-        self.user = authenticate(self.context.get('request'), **attrs)
+        # Check that the supplied password is correct. We hand the user to the authentication backend so that it
+        # doesn't fetch them again.
+        self._candidate = user
+        if not self._defer_authentication:
+            self._authenticated(attrs, authenticate_user(self.context.get('request'), user, **attrs))
+
+        return attrs
 
-        if self.user is None:
+    def _authenticated(self, attrs, user):
+        if user is None:
             raise serializers.ValidationError({'password': 'The password you entered is invalid.'})
 
+        self.user = user
+
         # Populate the serializer with the authenticated user's username, email and phone
         attrs['username'] = self.user.username
         attrs['email'] = self.user.email
         attrs['phone'] = self.user.phone
 
-        return attrs
+    async def ais_valid(self, raise_exception=False):
+        """
+        Asynchronous counterpart of :meth:`is_valid`.
+
+        Validation runs in a thread via :func:`~asgiref.sync.sync_to_async`, except for the password check which is
+        performed by :func:`django_flex_user.backends.aauthenticate_user`.
+        """
+        self._defer_authentication = True
+        try:
+            valid = await sync_to_async(self.is_valid)()
+        finally:
+            self._defer_authentication = False
+
+        if valid:
+            user = await aauthenticate_user(self.context.get('request'), self._candidate, **self._validated_data)
+            try:
+                self._authenticated(self._validated_data, user)
+            except serializers.ValidationError as exc:
+                self._validated_data = {}
+                self._errors = serializers.as_serializer_error(exc)
+                valid = False
+
+        if not valid and raise_exception:
+            raise serializers.ValidationError(self.errors)
+
+        return valid
 
     def create(self, validated_data):
         return self.user
@@ -335,3 +374,19 @@ class PhoneTokenSerializer(serializers.HyperlinkedModelSerializer):
     class Meta:
         model = PhoneToken
         fields = ['name', 'uri']
+
+
+class TokenSearchResultSerializer(serializers.BaseSerializer):
+    """
+    Serializes the tokens found by :func:`django_flex_user.search.search_tokens` like :class:`EmailTokenSerializer`
+    and :class:`PhoneTokenSerializer` but without fetching or reversing anything per token. The serializer's context
+    must hold the ``uri_templates`` returned by :func:`django_flex_user.search.get_token_uri_templates`.
+    """
+
+    def to_representation(self, instance):
+        model, name_field, _ = TOKEN_KINDS[instance.kind]
+        prefix, suffix = self.context['uri_templates'][instance.kind]
+        return {
+            'name': model(**{name_field: instance.name}).get_obscured_name(),
+            'uri': f'{prefix}{instance.pk}{suffix}',
+        }
@@ -0,0 +1,88 @@
+from django.test import TestCase
+
+
+class TestAAuthenticate(TestCase):
+    """
+    This class is designed to test django_flex_user.backends.aauthenticate and the asynchronous methods of
+    django_flex_user.models.FlexUserManager
+    """
+
+    async def test_acreate_user(self):
+        from django_flex_user.models.user import FlexUser
+        from django.core.exceptions import ValidationError
+
+        user = await FlexUser.objects.acreate_user(username='validUsername', password='validPassword')
+        self.assertIsNotNone(user.id)
+        self.assertTrue(user.check_password('validPassword'))
+        self.assertIs(user.is_staff, False)
+        self.assertIs(user.is_superuser, False)
+
+        user = await FlexUser.objects.acreate_user(email='validEmail@example.com')
+        self.assertFalse(user.has_usable_password())
+
+        with self.assertRaises(ValidationError):
+            await FlexUser.objects.acreate_user(username='VALIDUSERNAME')
+
+        with self.assertRaises(ValidationError):
+            await FlexUser.objects.acreate_user()
+
+    async def test_aget_by_natural_key(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = await FlexUser.objects.acreate_user(username='validUsername', phone='+12025551234')
+
+        self.assertEqual(await FlexUser.objects.aget_by_natural_key(username='validUsername'), user)
+        self.assertEqual(await FlexUser.objects.aget_by_natural_key(phone='+12025551234'), user)
+
+        with self.assertRaises(FlexUser.DoesNotExist):
+            await FlexUser.objects.aget_by_natural_key(username='validUsername2')
+
+        with self.assertRaises(ValueError):
+            await FlexUser.objects.aget_by_natural_key()
+
+    async def test_aauthenticate(self):
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.backends import aauthenticate
+
+        user = await FlexUser.objects.acreate_user(username='validUsername', email='validEmail@example.com',
+                                                   password='validPassword')
+        inactive_user = await FlexUser.objects.acreate_user(username='inactiveUsername', password='validPassword',
+                                                            is_active=False)
+
+        authenticated_user = await aauthenticate(username='validUsername', password='validPassword')
+        self.assertEqual(authenticated_user, user)
+        self.assertEqual(authenticated_user.backend, 'django_flex_user.backends.FlexUserModelBackend')
+
+        self.assertEqual(await aauthenticate(email='validEmail@example.com', password='validPassword'), user)
+        self.assertEqual(await aauthenticate(username='VALIDUSERNAME', password='validPassword'), user)
+
+        self.assertIsNone(await aauthenticate(username='validUsername', password='invalidPassword'))
+        self.assertIsNone(await aauthenticate(username='validUsername', password=None))
+        self.assertIsNone(await aauthenticate(username='validUsername2', password='validPassword'))
+        self.assertIsNone(await aauthenticate(username=inactive_user.username, password='validPassword'))
+
+        with self.assertRaises(ValueError):
+            await aauthenticate(password='validPassword')
+
+        self.assertEqual(await aauthenticate(user=user, password='validPassword'), user)
+        self.assertIsNone(await aauthenticate(user=user, password='invalidPassword'))
+        self.assertIsNone(await aauthenticate(user=inactive_user, password='validPassword'))
+
+    async def test_aauthenticate_login_failed_signal(self):
+        from django.contrib.auth.signals import user_login_failed
+
+        from django_flex_user.backends import aauthenticate
+
+        failures = []
+
+        def receiver(sender, credentials=None, **kwargs):
+            failures.append(credentials)
+
+        user_login_failed.connect(receiver)
+        try:
+            self.assertIsNone(await aauthenticate(username='validUsername', password='invalidPassword'))
+        finally:
+            user_login_failed.disconnect(receiver)
+
+        # Sensitive credentials are scrubbed the same way django.contrib.auth.authenticate scrubs them
+        self.assertEqual(failures, [{'username': 'validUsername', 'password': '********************'}])
@@ -147,6 +147,25 @@ class TestAuthenticate(TestCase):
         self.assertIsNone(authenticate(username='validUsername', password=''))
         self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
 
+    def test_authenticate_with_user(self):
+        from django_flex_user.models.user import FlexUser
+        from django.contrib.auth import authenticate
+
+        user = FlexUser.objects.create_user(username='validUsername', password='validPassword')
+        inactive_user = FlexUser.objects.create_user(username='inactiveUsername', password='validPassword',
+                                                     is_active=False)
+        passwordless_user = FlexUser.objects.create_user(username='passwordlessUsername')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(authenticate(user=user, password='validPassword'), user)
+            self.assertIsNone(authenticate(user=user, password='invalidPassword'))
+            self.assertIsNone(authenticate(user=user, password=None))
+            self.assertIsNone(authenticate(user=inactive_user, password='validPassword'))
+            self.assertIsNone(authenticate(user=passwordless_user, password=''))
+
+        # The supplied user takes precedence over the supplied identifiers
+        self.assertIsNone(authenticate(user=inactive_user, username='validUsername', password='validPassword'))
+
     def test_authenticate_username_case_insensitivity(self):
         from django_flex_user.models.user import FlexUser
         from django.contrib.auth import authenticate
@@ -201,3 +220,24 @@ class TestAuthenticate(TestCase):
             password='validPassword'
         )
         self.assertEqual(user1, user2)
+
+    def test_authenticate_query_count(self):
+        """
+        django_flex_user.backends.FlexUserModelBackend.authenticate fetches only the user's identity until the password
+        has been verified.
+
+        :return:
+        """
+        from django_flex_user.models.user import FlexUser
+        from django.contrib.auth import authenticate
+
+        user = FlexUser.objects.create_user(username='validUsername', password='validPassword')
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(username='validUsername2', password='validPassword'))
+
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(username='validUsername', password='invalidPassword'))
+
+        with self.assertNumQueries(2):
+            self.assertEqual(authenticate(username='validUsername', password='validPassword'), user)
@@ -0,0 +1,123 @@
+from django.test import TestCase, override_settings
+
+
+@override_settings(FLEX_USER_IDENTITY_CACHE='default')
+class TestIdentityCache(TestCase):
+    """
+    This class is designed to test django_flex_user.backends.FlexUserModelBackend.authenticate when the identity cache
+    is enabled
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django_flex_user.models.user import FlexUser
+
+        cache.clear()
+        self.user = FlexUser.objects.create_user(
+            username='validUsername',
+            email='validEmail@example.com',
+            phone='+12025551234',
+            password='validPassword'
+        )
+
+    def test_authenticate_populates_cache(self):
+        from django.contrib.auth import authenticate
+
+        for credentials in ({'username': 'validUsername'},
+                            {'email': 'validEmail@example.com'},
+                            {'phone': '+12025551234'}):
+            with self.subTest(**credentials):
+                # The first call populates the cache
+                self.assertEqual(authenticate(**credentials, password='validPassword'), self.user)
+
+                # Subsequent failed attempts are answered from the cache alone
+                with self.assertNumQueries(0):
+                    self.assertIsNone(authenticate(**credentials, password='invalidPassword'))
+
+                # Subsequent successful attempts load the user by primary key
+                with self.assertNumQueries(1):
+                    self.assertEqual(authenticate(**credentials, password='validPassword'), self.user)
+
+    def test_authenticate_username_case_insensitivity(self):
+        from django.contrib.auth import authenticate
+
+        self.assertEqual(authenticate(username='validUsername', password='validPassword'), self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(authenticate(username='VALIDUSERNAME', password='validPassword'), self.user)
+
+    def test_authenticate_nonexistent_user(self):
+        from django.contrib.auth import authenticate
+        from django_flex_user.models.user import FlexUser
+
+        self.assertIsNone(authenticate(username='validUsername2', password='validPassword'))
+
+        # Misses are cached too
+        with self.assertNumQueries(0):
+            self.assertIsNone(authenticate(username='validUsername2', password='validPassword'))
+
+        # Creating a user invalidates the negative entry
+        user = FlexUser.objects.create_user(username='validUsername2', password='validPassword')
+        self.assertEqual(authenticate(username='validUsername2', password='validPassword'), user)
+
+    def test_authenticate_after_password_change(self):
+        from django.contrib.auth import authenticate
+
+        self.assertEqual(authenticate(username='validUsername', password='validPassword'), self.user)
+
+        self.user.set_password('validPassword2')
+        self.user.save()
+
+        self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
+        self.assertEqual(authenticate(username='validUsername', password='validPassword2'), self.user)
+
+    def test_authenticate_after_deactivation(self):
+        from django.contrib.auth import authenticate
+
+        self.assertEqual(authenticate(username='validUsername', password='validPassword'), self.user)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
+
+    def test_authenticate_after_identifier_change(self):
+        from django.contrib.auth import authenticate
+
+        self.assertEqual(authenticate(email='validEmail@example.com', password='validPassword'), self.user)
+
+        self.user.email = 'validEmail2@example.com'
+        self.user.save()
+
+        self.assertIsNone(authenticate(email='validEmail@example.com', password='validPassword'))
+        self.assertEqual(authenticate(email='validEmail2@example.com', password='validPassword'), self.user)
+
+    def test_authenticate_after_delete(self):
+        from django.contrib.auth import authenticate
+
+        self.assertEqual(authenticate(username='validUsername', password='validPassword'), self.user)
+
+        self.user.delete()
+
+        self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
+
+    def test_authenticate_with_stale_cache(self):
+        from django.contrib.auth import authenticate
+        from django.contrib.auth.hashers import make_password
+        from django_flex_user.models.otp import EmailToken, PhoneToken
+        from django_flex_user.models.user import FlexUser
+
+        self.assertEqual(authenticate(username='validUsername', password='validPassword'), self.user)
+
+        # QuerySet.update doesn't send signals, so the cache isn't invalidated. Authentication must fail closed.
+        FlexUser.objects.filter(pk=self.user.pk).update(password=make_password('validPassword2'))
+        self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
+
+        # The same goes for a user who was deactivated
+        FlexUser.objects.filter(pk=self.user.pk).update(password=self.user.password, is_active=False)
+        self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
+
+        # And for a user who was deleted without sending signals
+        for model in (EmailToken, PhoneToken, FlexUser):
+            queryset = model.objects.filter(pk=self.user.pk) if model is FlexUser else model.objects.filter(user=self.user)
+            queryset._raw_delete(queryset.db)
+        self.assertIsNone(authenticate(username='validUsername', password='validPassword'))
@@ -0,0 +1,181 @@
+from datetime import timedelta
+
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+
+_sent = []
+
+
+def _send_password(otp_token, **kwargs):
+    _sent.append((otp_token.get_name(), otp_token.password, kwargs))
+
+
+def _fail(otp_token, **kwargs):
+    from django_flex_user.models.otp import TransmissionError
+
+    raise TransmissionError('The provider is unavailable.')
+
+
+class _CountingEmailBackend(EmailBackend):
+    instances = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        type(self).instances += 1
+
+
+@override_settings(
+    FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.management.test_flexuser_delivery_worker._send_password',
+    FLEX_USER_OTP_SMS_FUNCTION='django_flex_user.tests.management.test_flexuser_delivery_worker._send_password',
+)
+class TestFlexUserDeliveryWorker(TestCase):
+    """
+    This class is designed to test the flexuser_delivery_worker management command and django_flex_user.delivery
+    """
+
+    def setUp(self):
+        from django_flex_user.models.user import FlexUser
+
+        _sent.clear()
+        user = FlexUser.objects.create_user(email='validEmail@example.com', phone='+12025551234')
+        self.email_token = user.emailtoken_set.get()
+        self.phone_token = user.phonetoken_set.get()
+
+    def _run_worker(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        stdout = StringIO()
+        call_command('flexuser_delivery_worker', once=True, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_deliver(self):
+        from django_flex_user.delivery import queue_new_password
+        from django_flex_user.models.outbox import OutboxMessage
+
+        queue_new_password(self.phone_token, priority=OutboxMessage.PRIORITY_LOW)
+        queue_new_password(self.email_token)
+        self.email_token.queue_password(priority=OutboxMessage.PRIORITY_LOW, subject='Welcome')
+        self.assertEqual(_sent, [])
+
+        output = self._run_worker(concurrency=2)
+        self.assertIn('Sent 2, skipped 0, retrying 0 and dead-lettered 0 messages in total.', output)
+        # The earlier message for the email token was superseded
+        self.assertCountEqual(_sent, [
+            ('+12025551234', self.phone_token.password, {}),
+            ('validEmail@example.com', self.email_token.password, {'subject': 'Welcome'}),
+        ])
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list('status', flat=True)),
+            [OutboxMessage.STATUS_SENT, OutboxMessage.STATUS_SENT, OutboxMessage.STATUS_SKIPPED]
+        )
+
+        # Nothing is left to deliver
+        self.assertIn('Sent 0, skipped 0, retrying 0 and dead-lettered 0 messages in total.', self._run_worker())
+
+    def test_priority_lanes(self):
+        from django_flex_user.models.outbox import OutboxMessage
+
+        self.email_token.generate_password()
+        self.email_token.queue_password(priority=OutboxMessage.PRIORITY_HIGH)
+        self.phone_token.generate_password()
+        self.phone_token.queue_password(priority=OutboxMessage.PRIORITY_LOW)
+
+        self._run_worker(priorities=['high'])
+        self.assertEqual([name for name, _, _ in _sent], ['validEmail@example.com'])
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING).count(), 1)
+
+    def test_skip(self):
+        from django_flex_user.delivery import queue_new_password
+        from django_flex_user.models.otp import PhoneToken
+
+        queue_new_password(self.email_token)
+        queue_new_password(self.phone_token)
+        # The password was used before the message was delivered
+        self.assertTrue(self.email_token.check_password(self.email_token.password))
+        PhoneToken.objects.all().delete()
+
+        self.assertIn('Sent 0, skipped 2, retrying 0 and dead-lettered 0 messages in total.', self._run_worker())
+        self.assertEqual(_sent, [])
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.management.test_flexuser_delivery_worker._fail',
+        FLEX_USER_OTP_DELIVERY_MAX_ATTEMPTS=3,
+        FLEX_USER_OTP_DELIVERY_RETRY_DELAY=timedelta(seconds=10),
+    )
+    def test_retry(self):
+        from freezegun import freeze_time
+        from django.utils import timezone
+        from django_flex_user.delivery import queue_new_password
+        from django_flex_user.models.outbox import OutboxMessage
+
+        with freeze_time() as frozen_datetime:
+            message = queue_new_password(self.email_token)
+
+            for attempt, delay in ((1, 10), (2, 20)):
+                self.assertIn('retrying 1 and dead-lettered 0', self._run_worker())
+                message.refresh_from_db()
+                self.assertEqual(message.status, OutboxMessage.STATUS_PENDING)
+                self.assertEqual(message.attempts, attempt)
+                self.assertEqual(message.available_at, timezone.now() + timedelta(seconds=delay))
+                self.assertEqual(message.last_error, 'TransmissionError: The provider is unavailable.')
+
+                # The message isn't retried until its delay is over
+                self.assertIn('Sent 0, skipped 0, retrying 0', self._run_worker())
+                frozen_datetime.tick(timedelta(seconds=delay))
+
+            self.assertIn('retrying 0 and dead-lettered 1', self._run_worker())
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboxMessage.STATUS_DEAD)
+            self.assertEqual(message.attempts, 3)
+
+    @override_settings(FLEX_USER_OTP_EMAIL_FUNCTION=None)
+    def test_not_configured(self):
+        from django_flex_user.delivery import queue_new_password
+        from django_flex_user.models.outbox import OutboxMessage
+
+        message = queue_new_password(self.email_token)
+        self.assertIn('dead-lettered 1', self._run_worker())
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.STATUS_DEAD)
+        self.assertEqual(message.attempts, 1)
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_BACKEND='django_flex_user.delivery_backends.SMTPDeliveryBackend',
+        FLEX_USER_OTP_EMAIL_BACKEND_OPTIONS={
+            'backend': 'django_flex_user.tests.management.test_flexuser_delivery_worker._CountingEmailBackend'
+        }
+    )
+    def test_batch(self):
+        from django.core import mail
+        from django_flex_user.models.user import FlexUser
+
+        for i in range(3):
+            user = FlexUser.objects.create_user(email=f'user{i}@example.com')
+            email_token = user.emailtoken_set.get()
+            email_token.generate_password()
+            email_token.save()
+            email_token.queue_password()
+
+        _CountingEmailBackend.instances = 0
+        output = self._run_worker(concurrency=1, batch_window=0.01, poll_interval=0.001)
+        self.assertEqual(output.count('Sent 3, skipped 0, retrying 0 and dead-lettered 0 messages'), 2)
+        # The messages were sent over one connection
+        self.assertEqual(_CountingEmailBackend.instances, 1)
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox), ['user0@example.com', 'user1@example.com', 'user2@example.com']
+        )
+
+    def test_invalid_options(self):
+        from django.core.management import call_command, CommandError
+
+        with self.assertRaises(CommandError):
+            call_command('flexuser_delivery_worker', once=True, batch_window=-1)
+
+    def test_lease(self):
+        from django_flex_user.delivery import claim_messages, queue_new_password
+
+        queue_new_password(self.email_token)
+        self.assertEqual(len(claim_messages()), 1)
+        # The message is hidden from other workers until the lease expires
+        self.assertEqual(claim_messages(), [])
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+
+class TestFlexUserExport(TestCase):
+    """
+    This class is designed to test the flexuser_export management command
+    """
+
+    def setUp(self):
+        from django_flex_user.models.user import FlexUser
+
+        self.user1 = FlexUser.objects.create_user(username='validUsername1')
+        self.user2 = FlexUser.objects.create_user(email='validEmail2@example.com', phone='+12025550002')
+        self.user3 = FlexUser.objects.create_user(phone='+12025550003')
+
+        phone_token = self.user2.phonetoken_set.get()
+        phone_token.verified = True
+        phone_token.save()
+
+    def _export(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        stdout = StringIO()
+        call_command('flexuser_export', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_export_csv(self):
+        import csv
+
+        rows = list(csv.DictReader(self._export(chunk_size=2).splitlines()))
+
+        self.assertEqual([row['id'] for row in rows], [str(self.user1.id), str(self.user2.id), str(self.user3.id)])
+        self.assertEqual(
+            [(row['username'], row['email'], row['email_verified'], row['phone'], row['phone_verified']) for row in rows],
+            [
+                ('validUsername1', '', '', '', ''),
+                ('', 'validEmail2@example.com', 'False', '+12025550002', 'True'),
+                ('', '', '', '+12025550003', 'False'),
+            ]
+        )
+
+    def test_export_jsonl(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'users.jsonl')
+            self._export(format='jsonl', output=path)
+            with open(path, encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]['email'], 'validEmail2@example.com')
+        self.assertIs(rows[1]['email_verified'], False)
+        self.assertEqual(rows[1]['phone'], '+12025550002')
+        self.assertIs(rows[1]['phone_verified'], True)
+        self.assertIsNone(rows[0]['email_verified'])
+        self.assertEqual(rows[0]['date_joined'], self.user1.date_joined.isoformat())
+
+    def test_export_query_count(self):
+        from django_flex_user.export import iter_users
+
+        # One query per page, plus one to find that there are no more pages
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(iter_users(chunk_size=3))), 3)
+        with self.assertNumQueries(2):
+            self.assertEqual(len(list(iter_users(chunk_size=2))), 3)
@@ -0,0 +1,232 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase
+
+
+class TestFlexUserImport(TestCase):
+    """
+    This class is designed to test the flexuser_import management command
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        return path
+
+    def _import(self, path, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        stdout = StringIO()
+        call_command('flexuser_import', path, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def _read_errors(self, path):
+        with open(path + '.errors.jsonl', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_import_csv(self):
+        from django.contrib.auth.hashers import make_password
+        from django_flex_user.models.user import FlexUser
+
+        password_hash = make_password('validPassword')
+        path = self._write(
+            'users.csv',
+            'username,email,phone,password\n'
+            f'validUsername1,,,{password_hash}\n'
+            ',validEmail2@EXAMPLE.com,,\n'
+            ',,+12025550003,\n'
+            'validUsername4,validEmail4@example.com,+12025550004,\n'
+        )
+
+        self._import(path)
+
+        self.assertEqual(FlexUser.objects.count(), 4)
+        user = FlexUser.objects.get(username='validUsername1')
+        self.assertEqual(user.password, password_hash)
+        self.assertTrue(user.check_password('validPassword'))
+        user = FlexUser.objects.get(email='validEmail2@example.com')
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(user.emailtoken_set.get().email, 'validEmail2@example.com')
+        user = FlexUser.objects.get(phone='+12025550003')
+        self.assertEqual(user.phonetoken_set.get().phone, '+12025550003')
+        self.assertEqual(self._read_errors(path), [])
+
+    def test_import_raw_passwords(self):
+        from django_flex_user.models.user import FlexUser
+
+        path = self._write(
+            'users.csv',
+            'username,password\n'
+            'validUsername1,validPassword1\n'
+            'validUsername2,\n'
+        )
+
+        self._import(path, raw_passwords=True)
+
+        self.assertTrue(FlexUser.objects.get(username='validUsername1').check_password('validPassword1'))
+        self.assertFalse(FlexUser.objects.get(username='validUsername2').has_usable_password())
+
+    def test_import_jsonl(self):
+        from django_flex_user.models.user import FlexUser
+
+        path = self._write(
+            'users.jsonl',
+            '{"username": "validUsername1"}\n'
+            '\n'
+            '{"email": "validEmail2@example.com", "phone": null}\n'
+            '{"phone": "+12025550003"}\n'
+        )
+
+        self._import(path)
+
+        self.assertEqual(
+            list(FlexUser.objects.order_by('id').values_list('username', 'email', 'phone')),
+            [('validUsername1', None, None), (None, 'validEmail2@example.com', None), (None, None, '+12025550003')]
+        )
+
+    def test_import_invalid_rows(self):
+        from django_flex_user.models.user import FlexUser
+
+        FlexUser.objects.create_user(username='existingUsername')
+
+        path = self._write(
+            'users.jsonl',
+            '{"username": "validUsername1"}\n'
+            '{}\n'
+            'not json\n'
+            '{"username": "validUsername2", "unknownField": 1}\n'
+            '{"username": "EXISTINGUSERNAME"}\n'
+            '{"username": "validUsername3", "password": "invalidHash"}\n'
+            '{"username": "VALIDUSERNAME1"}\n'
+            '{"username": "validUsername4"}\n'
+        )
+
+        output = self._import(path, batch_size=3)
+
+        self.assertEqual(
+            sorted(FlexUser.objects.values_list('username', flat=True)),
+            ['existingUsername', 'validUsername1', 'validUsername4']
+        )
+        errors = self._read_errors(path)
+        self.assertEqual([error['line'] for error in errors], [2, 3, 4, 5, 6, 7])
+        self.assertEqual(errors[3]['record'], {'username': 'EXISTINGUSERNAME'})
+        self.assertEqual(errors[3]['errors'], {'username': ['A user with that username already exists.']})
+        self.assertEqual(errors[4]['errors'], {'password': ['Unknown password hashing algorithm.']})
+        self.assertIn('6 rows failed validation', output)
+
+    def test_import_resume(self):
+        from unittest import mock
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.management.commands.flexuser_import import Command
+
+        path = self._write(
+            'users.csv',
+            'username,email\n'
+            'validUsername1,validEmail1@example.com\n'
+            '"validUsername2","validEmail2\n@example.com"\n'
+            'validUsername3,validEmail3@example.com\n'
+            'validUsername4,validEmail4@example.com\n'
+            'validUsername5,\n'
+        )
+
+        # Simulate a failure while importing the second batch
+        import_batch = Command._import_batch
+        calls = []
+
+        def failing_import_batch(self, *args, **kwargs):
+            calls.append(None)
+            if len(calls) == 2:
+                raise RuntimeError
+            return import_batch(self, *args, **kwargs)
+
+        with mock.patch.object(Command, '_import_batch', failing_import_batch):
+            with self.assertRaises(RuntimeError):
+                self._import(path, batch_size=2)
+
+        self.assertEqual(
+            sorted(FlexUser.objects.values_list('username', flat=True)),
+            ['validUsername1']
+        )
+
+        output = self._import(path, batch_size=2)
+        self.assertIn('Resuming from line 4', output)
+
+        self.assertEqual(
+            sorted(FlexUser.objects.values_list('username', flat=True)),
+            ['validUsername1', 'validUsername3', 'validUsername4', 'validUsername5']
+        )
+        # The row spanning lines 3 and 4 contains an invalid email address
+        self.assertEqual([error['line'] for error in self._read_errors(path)], [4])
+
+        # Importing a file which has been imported in full does nothing
+        self._import(path, batch_size=2)
+        self.assertEqual(FlexUser.objects.count(), 4)
+
+        # Unless we restart
+        self._import(path, batch_size=2, restart=True)
+        self.assertEqual(len(self._read_errors(path)), 5)
+
+    def test_import_resume_after_insert(self):
+        from unittest import mock
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.management.commands.flexuser_import import Command
+
+        path = self._write(
+            'users.csv',
+            'username,email\n'
+            'validUsername1,validEmail1@example.com\n'
+            'validUsername2,validEmail2@example.com\n'
+            'validUsername3,validEmail3@example.com\n'
+            'validUsername4,validEmail4@example.com\n'
+            'validUsername5,validEmail5@example.com\n'
+        )
+
+        # Simulate a failure after the second batch was inserted but before its progress was recorded
+        write_checkpoint = Command._write_checkpoint
+        calls = []
+
+        def failing_write_checkpoint(checkpoint_path, offset, line, pending=None):
+            if pending is None:
+                calls.append(None)
+                if len(calls) == 2:
+                    raise RuntimeError
+            return write_checkpoint(checkpoint_path, offset, line, pending)
+
+        with mock.patch.object(Command, '_write_checkpoint', staticmethod(failing_write_checkpoint)):
+            with self.assertRaises(RuntimeError):
+                self._import(path, batch_size=2)
+
+        self.assertEqual(FlexUser.objects.count(), 4)
+
+        output = self._import(path, batch_size=2)
+        self.assertIn('Resuming from line 3', output)
+        self.assertIn('Imported 3 users', output)
+
+        # The rows of the second batch weren't reported as duplicates of themselves
+        self.assertEqual(
+            sorted(FlexUser.objects.values_list('username', flat=True)),
+            ['validUsername1', 'validUsername2', 'validUsername3', 'validUsername4', 'validUsername5']
+        )
+        self.assertEqual(self._read_errors(path), [])
+
+        # Conflicts outside the pending batch are still reported
+        self._import(path, batch_size=2, restart=True)
+        self.assertEqual(len(self._read_errors(path)), 5)
+
+    def test_import_unknown_columns(self):
+        from django.core.management import CommandError
+
+        path = self._write('users.csv', 'username,first_name\nvalidUsername1,Valid\n')
+        with self.assertRaises(CommandError):
+            self._import(path)
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.test import TestCase
+
+
+class TestFlexUserPurgeExpiredOTPs(TestCase):
+    """
+    This class is designed to test the flexuser_purge_expired_otps management command and
+    django_flex_user.models.otp.purge_expired_tokens
+    """
+
+    def _purge(self, **options):
+        from io import StringIO
+        from django.core.management import call_command
+
+        stdout = StringIO()
+        call_command('flexuser_purge_expired_otps', stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_purge(self):
+        from freezegun import freeze_time
+        from django.utils import timezone
+        from django_flex_user.models.otp import EmailToken, PhoneToken
+        from django_flex_user.models.user import FlexUser
+
+        for i in range(5):
+            FlexUser.objects.create_user(email=f'validEmail{i}@example.com', phone=f'+1202555000{i}')
+
+        now = timezone.now()
+        with freeze_time(now - timedelta(hours=1)):
+            for token in EmailToken.objects.order_by('pk')[:3]:
+                token.generate_password()
+            for token in PhoneToken.objects.order_by('pk')[:2]:
+                token.generate_password()
+                self.assertFalse(token.check_password('invalidPassword'))
+        with freeze_time(now):
+            fresh_token = EmailToken.objects.order_by('pk').last()
+            fresh_token.generate_password()
+
+            self.assertIn('Found 5 expired passwords and 2 elapsed timeouts.', self._purge(dry_run=True))
+            self.assertEqual(EmailToken.objects.filter(password__isnull=False).count(), 4)
+
+            self.assertIn('Cleared 5 expired passwords and 2 elapsed timeouts.', self._purge(batch_size=2))
+
+        self.assertEqual(list(EmailToken.objects.filter(password__isnull=False)), [fresh_token])
+        self.assertFalse(EmailToken.objects.filter(expiration__lte=now).exists())
+        self.assertFalse(PhoneToken.objects.filter(password__isnull=False).exists())
+        self.assertFalse(PhoneToken.objects.filter(timeout__isnull=False).exists())
+
+        # Failure counts are kept
+        self.assertEqual(PhoneToken.objects.filter(failure_count=1).count(), 2)
+
+        with freeze_time(now):
+            self.assertIn('Cleared 0 expired passwords and 0 elapsed timeouts.', self._purge())
@@ -0,0 +1,124 @@
+from django.test import TestCase
+
+
+class TestBulkCreateUsers(TestCase):
+    """
+    This class is designed to test django_flex_user.models.FlexUserManager.bulk_create_users
+    """
+
+    def test_bulk_create_users(self):
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.models.otp import EmailToken, PhoneToken
+
+        users = FlexUser.objects.bulk_create_users([
+            {'username': 'validUsername1', 'password': 'validPassword'},
+            {'email': 'validEmail2@bücher.example'},
+            {'phone': '+12025550003', 'password': 'validPassword'},
+            {'username': 'validUsername4', 'email': 'validEmail4@example.com', 'phone': '+12025550004'},
+        ])
+
+        self.assertEqual(len(users), 4)
+        self.assertTrue(all(user.pk is not None for user in users))
+        self.assertEqual(FlexUser.objects.count(), 4)
+
+        user = FlexUser.objects.get(username='validUsername1')
+        self.assertTrue(user.check_password('validPassword'))
+        self.assertIs(user.is_staff, False)
+        self.assertIs(user.is_superuser, False)
+        self.assertIsNone(user.emailtoken_set.first())
+        self.assertIsNone(user.phonetoken_set.first())
+
+        # Email addresses are normalized
+        user = FlexUser.objects.get(email='validEmail2@xn--bcher-kva.example')
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(user.emailtoken_set.get().email, 'validEmail2@xn--bcher-kva.example')
+
+        user = FlexUser.objects.get(phone='+12025550003')
+        self.assertEqual(user.phonetoken_set.get().phone, '+12025550003')
+
+        user = FlexUser.objects.get(username='validUsername4')
+        self.assertEqual(user.emailtoken_set.get().email, 'validEmail4@example.com')
+        self.assertEqual(user.phonetoken_set.get().phone, '+12025550004')
+
+        self.assertEqual(EmailToken.objects.count(), 2)
+        self.assertEqual(PhoneToken.objects.count(), 2)
+
+    def test_bulk_create_users_query_count(self):
+        from django_flex_user.models.user import FlexUser
+
+        users = [
+            {'username': f'validUsername{i}', 'email': f'validEmail{i}@example.com', 'phone': f'+1202555{i:04d}'}
+            for i in range(50)
+        ]
+
+        # One uniqueness check, one insert for each of the user, email token and phone token tables, plus a savepoint
+        # and its release for each of the two atomic blocks
+        with self.assertNumQueries(8):
+            FlexUser.objects.bulk_create_users(users)
+
+        self.assertEqual(FlexUser.objects.count(), 50)
+
+    def test_bulk_create_users_batch_size(self):
+        from django_flex_user.models.user import FlexUser
+
+        users = FlexUser.objects.bulk_create_users(
+            ({'username': f'validUsername{i}'} for i in range(10)),
+            batch_size=3
+        )
+        self.assertEqual([user.username for user in users], [f'validUsername{i}' for i in range(10)])
+        self.assertEqual(FlexUser.objects.count(), 10)
+
+    def test_bulk_create_users_invalid(self):
+        from django_flex_user.models.user import FlexUser
+        from django.core.exceptions import ValidationError
+
+        FlexUser.objects.create_user(username='existingUsername', email='existingEmail@example.com')
+
+        with self.assertRaises(ValidationError) as cm:
+            FlexUser.objects.bulk_create_users([
+                {'username': 'validUsername1'},
+                {},  # Missing identifier
+                {'username': 'invalidUsername+'},  # Invalid username
+                {'email': ''},  # Blank email
+                {'username': 'VALIDUSERNAME1'},  # Duplicate within the batch (usernames are case-insensitive)
+                {'username': 'EXISTINGUSERNAME'},  # Duplicate of an existing user
+                {'email': 'existingEmail@example.com'},  # Duplicate of an existing user
+                {'username': 'validUsername2', 'unknownField': 1},  # Unknown field
+            ], batch_size=4)
+
+        self.assertEqual(list(cm.exception.message_dict.keys()), [1, 2, 3])
+
+        # Nothing is created if any user is invalid
+        self.assertEqual(FlexUser.objects.count(), 1)
+
+    def test_validate_users(self):
+        from django_flex_user.models.user import FlexUser
+
+        FlexUser.objects.create_user(username='existingUsername', email='existingEmail@example.com',
+                                     phone='+12025550000')
+
+        users, errors = FlexUser.objects.validate_users([
+            {'username': 'validUsername1', 'password': 'validPassword'},
+            {},
+            {'username': 'VALIDUSERNAME1'},
+            {'username': 'EXISTINGUSERNAME'},
+            {'email': 'existingEmail@EXAMPLE.com'},
+            {'phone': '+12025550000'},
+            {'username': 'validUsername2', 'unknownField': 1},
+        ])
+
+        self.assertEqual([user.username for user in users], ['validUsername1'])
+        self.assertTrue(users[0].check_password('validPassword'))
+        self.assertIsNone(users[0].pk)
+
+        self.assertEqual(list(errors.keys()), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(errors[2].message_dict, {'username': ['A user with that username already exists.']})
+        self.assertEqual(errors[3].message_dict, {'username': ['A user with that username already exists.']})
+        self.assertEqual(errors[4].message_dict, {'email': ['A user with that email address already exists.']})
+        self.assertEqual(errors[5].message_dict, {'phone': ['A user with that phone number already exists.']})
+
+    def test_username_in_lookup_case_insensitivity(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(username='validUsername')
+        self.assertEqual(list(FlexUser.objects.filter(username__in=['VALIDUSERNAME', 'otherUsername'])), [user])
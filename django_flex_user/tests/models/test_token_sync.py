@@ -0,0 +1,135 @@
+from django.test import TestCase
+
+
+class TestTokenSync(TestCase):
+    """
+    This class is designed to test django_flex_user.models.otp.sync_tokens,
+    django_flex_user.models.otp.coalesce_token_sync and django_flex_user.models.user.FlexUserManager.bulk_update_users
+    """
+
+    def _get_tokens(self):
+        from django_flex_user.models.otp import EmailToken, PhoneToken
+
+        return (
+            sorted(EmailToken.objects.values_list('user_id', 'email', 'verified')),
+            sorted((user_id, str(phone), verified) for user_id, phone, verified in
+                   PhoneToken.objects.values_list('user_id', 'phone', 'verified'))
+        )
+
+    def test_save_query_count(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com', phone='+12025551234')
+        user.emailtoken_set.update(verified=True, password='password')
+
+        # One query to update the user and one to update and reset their token
+        user.email = 'validEmail2@example.com'
+        with self.assertNumQueries(2):
+            user.save(update_fields=['email', 'email_verified'])
+
+        token = user.emailtoken_set.get()
+        self.assertEqual(token.email, 'validEmail2@example.com')
+        self.assertIs(token.verified, False)
+        self.assertIsNone(token.password)
+
+        # Saving fields other than the user's identifiers doesn't touch their tokens
+        with self.assertNumQueries(1):
+            user.save(update_fields=['last_login'])
+
+    def test_save_missing_token(self):
+        from django_flex_user.models.otp import EmailToken
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com')
+        EmailToken.objects.all().delete()
+
+        # A missing token is recreated
+        user.email = 'validEmail2@example.com'
+        user.save()
+        self.assertEqual(self._get_tokens(), ([(user.pk, 'validEmail2@example.com', False)], []))
+
+    def test_coalesce_token_sync(self):
+        from django_flex_user.models.otp import coalesce_token_sync
+        from django_flex_user.models.user import FlexUser
+
+        user1 = FlexUser.objects.create_user(email='validEmail1@example.com', phone='+12025551234')
+        user2 = FlexUser.objects.create_user(email='validEmail2@example.com')
+        user3 = FlexUser.objects.create_user(username='validUsername3')
+
+        with coalesce_token_sync():
+            user1.email = 'validEmail4@example.com'
+            user1.save()
+            user1.email = 'validEmail5@example.com'
+            user1.phone = None
+            user1.save()
+            user2.email = 'validEmail6@example.com'
+            user2.save()
+            user3.phone = '+12025555678'
+            user3.save()
+            user4 = FlexUser.objects.create_user(email='validEmail7@example.com')
+            user5 = FlexUser.objects.create_user(email='validEmail8@example.com')
+            user5.delete()
+
+            # Tokens are synced when the block exits
+            self.assertEqual(self._get_tokens(), (
+                [(user1.pk, 'validEmail1@example.com', False), (user2.pk, 'validEmail2@example.com', False)],
+                [(user1.pk, '+12025551234', False)]
+            ))
+
+        self.assertEqual(self._get_tokens(), (
+            [
+                (user1.pk, 'validEmail5@example.com', False),
+                (user2.pk, 'validEmail6@example.com', False),
+                (user4.pk, 'validEmail7@example.com', False)
+            ],
+            [(user3.pk, '+12025555678', False)]
+        ))
+
+    def test_coalesce_token_sync_exception(self):
+        from django_flex_user.models.otp import coalesce_token_sync
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com')
+
+        with self.assertRaises(RuntimeError), coalesce_token_sync():
+            user.email = 'validEmail2@example.com'
+            user.save()
+            raise RuntimeError
+
+        # The block is rolled back
+        self.assertEqual(FlexUser.objects.get().email, 'validEmail@example.com')
+        self.assertEqual(self._get_tokens(), ([(user.pk, 'validEmail@example.com', False)], []))
+
+    def test_bulk_update_users(self):
+        from django_flex_user.models.otp import EmailToken
+        from django_flex_user.models.user import FlexUser
+
+        for i in range(5):
+            FlexUser.objects.create_user(email=f'validEmail{i}@example.com', phone=f'+1202555123{i}')
+        FlexUser.objects.create_user(username='validUsername')
+        EmailToken.objects.update(verified=True)
+        FlexUser.objects.update(email_verified=True)
+
+        users = list(FlexUser.objects.order_by('pk'))
+        for user in users[:4]:
+            user.email = user.email.replace('validEmail', 'validEmail1')
+        users[4].phone = None
+        users[5].email = 'validEmail@example.com'
+
+        # One query to update the users, one to update email tokens, one to create one and one to delete a phone token,
+        # inside a savepoint
+        with self.assertNumQueries(6):
+            self.assertEqual(FlexUser.objects.bulk_update_users(users, ['email', 'phone']), 6)
+
+        self.assertEqual(self._get_tokens(), (
+            [(user.pk, user.email, user is users[4]) for user in users if user.email is not None],
+            [(user.pk, str(user.phone), False) for user in users if user.phone is not None]
+        ))
+        self.assertEqual(
+            list(FlexUser.objects.order_by('pk').values_list('email_verified', 'phone_verified')),
+            [(False, False)] * 4 + [(True, None), (False, None)]
+        )
+        self.assertFalse(FlexUser.objects.with_inconsistent_verification().exists())
+
+        # The users' saved state is reset
+        self.assertFalse(any(user.get_identifier_changes() for user in users))
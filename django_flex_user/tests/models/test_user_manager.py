@@ -320,3 +320,26 @@ class TestUserManager(TestCase):
         self.assertEqual(email, 'validEmail@xn--exmple-4nf.com')
 
         self.assertNotEqual(FlexUserManager.normalize_email(latin_a), FlexUserManager.normalize_email(cyrillic_a))
+
+    def test_get_identity_by_natural_key(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(username='validUsername', email='validEmail@example.com',
+                                            phone='+12025551234', password='validPassword')
+
+        for natural_key in ({'username': 'validUsername'},
+                            {'username': 'VALIDUSERNAME'},
+                            {'email': 'validEmail@example.com'},
+                            {'phone': '+12025551234'},
+                            {'username': 'validUsername', 'email': 'validEmail@example.com'}):
+            with self.subTest(**natural_key), self.assertNumQueries(1):
+                identity = FlexUser.objects.get_identity_by_natural_key(**natural_key)
+                self.assertEqual(identity.pk, user.pk)
+                self.assertEqual(identity.password, user.password)
+                self.assertIs(identity.is_active, True)
+
+        self.assertRaises(ValueError, FlexUser.objects.get_identity_by_natural_key)
+        self.assertRaises(FlexUser.DoesNotExist, FlexUser.objects.get_identity_by_natural_key,
+                          username='validUsername2')
+        self.assertRaises(FlexUser.DoesNotExist, FlexUser.objects.get_identity_by_natural_key,
+                          username='validUsername', email='validEmail2@example.com')
@@ -167,6 +167,53 @@ class TestUserModel(TestCase):
         user2.set_unusable_password()
         self.assertRaises(ValidationError, user2.full_clean)
 
+    def test_full_clean_duplicate_identifiers(self):
+        from django_flex_user.models.user import FlexUser
+        from django.core.exceptions import ValidationError
+
+        user1 = FlexUser.objects.create_user(username='validUsername', email='validEmail@example.com',
+                                             phone='+12025551234')
+
+        # username, email and phone are checked for uniqueness using a single query
+        user2 = FlexUser(username='VALIDUSERNAME', email='validEmail@example.com', phone='+12025551234')
+        user2.set_unusable_password()
+        with self.assertNumQueries(1), self.assertRaises(ValidationError) as cm:
+            user2.full_clean()
+        self.assertEqual(
+            cm.exception.message_dict,
+            {
+                'username': ['A user with that username already exists.'],
+                'email': ['A user with that email address already exists.'],
+                'phone': ['A user with that phone number already exists.'],
+            }
+        )
+
+        # A user doesn't conflict with itself
+        with self.assertNumQueries(1):
+            user1.full_clean()
+
+        # Excluded fields aren't checked
+        with self.assertNumQueries(1), self.assertRaises(ValidationError) as cm:
+            user2.full_clean(exclude=['username', 'phone'])
+        self.assertEqual(list(cm.exception.message_dict), ['email'])
+
+    def test_model_form_duplicate_identifiers(self):
+        from django import forms
+        from django_flex_user.models.user import FlexUser
+
+        class FlexUserForm(forms.ModelForm):
+            class Meta:
+                model = FlexUser
+                fields = ('username', 'email', 'phone')
+
+        FlexUser.objects.create_user(username='validUsername', email='validEmail@example.com')
+
+        form = FlexUserForm(data={'username': 'validUsername', 'email': 'validEmail@example.com', 'phone': ''})
+        with self.assertNumQueries(1):
+            self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors['username'], ['A user with that username already exists.'])
+        self.assertEqual(form.errors['email'], ['A user with that email address already exists.'])
+
     def test_full_clean_and_save_ambiguous_username(self):
         """
         Verify that an email address or phone number cannot form a valid username.
@@ -460,3 +507,59 @@ class TestUserModel(TestCase):
         self.assertIsNone(phone_token.timeout)
         self.assertEqual(phone_token.failure_count, 0)
         self.assertIsNone(phone_token.expiration)
+
+    def test_get_identifier_changes(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser(username='validUsername', email='validEmail@example.com')
+        user.set_unusable_password()
+        self.assertEqual(user.get_identifier_changes(), {})
+        user.save()
+        self.assertEqual(user.get_identifier_changes(), {})
+
+        user = FlexUser.objects.get(pk=user.pk)
+        user.email = 'validEmail2@example.com'
+        user.phone = '+12025551234'
+        user.is_staff = True
+        self.assertEqual(user.get_identifier_changes(), {'email': 'validEmail@example.com', 'phone': None})
+        self.assertEqual(user.get_identifier_changes(['phone']), {'phone': None})
+
+        user.save(update_fields=['email'])
+        self.assertEqual(user.get_identifier_changes(), {'phone': None})
+
+        user.refresh_from_db()
+        self.assertEqual(user.get_identifier_changes(), {})
+
+        # Deferred identifiers are unchanged until they're loaded
+        user = FlexUser.objects.only('pk').get(pk=user.pk)
+        self.assertEqual(user.get_identifier_changes(), {})
+        self.assertEqual(user.email, 'validEmail2@example.com')
+        user.email = 'validEmail3@example.com'
+        self.assertEqual(user.get_identifier_changes(), {'email': 'validEmail2@example.com'})
+
+    def test_get_dirty_fields(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser(username='validUsername')
+        user.set_unusable_password()
+        with self.assertWarns(DeprecationWarning):
+            self.assertTrue(user.is_dirty())
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(user.get_dirty_fields(), {'username': 'validUsername', 'email': None, 'phone': None})
+        user.save()
+
+        user = FlexUser.objects.get(pk=user.pk)
+        with self.assertWarns(DeprecationWarning):
+            self.assertFalse(user.is_dirty())
+
+        # Only identifiers are tracked
+        user.email = 'validEmail@example.com'
+        user.is_staff = True
+        with self.assertWarns(DeprecationWarning):
+            self.assertTrue(user.is_dirty())
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(user.get_dirty_fields(), {'email': None})
+        with self.assertWarns(DeprecationWarning):
+            self.assertEqual(
+                user.get_dirty_fields(verbose=True), {'email': {'saved': None, 'current': 'validEmail@example.com'}}
+            )
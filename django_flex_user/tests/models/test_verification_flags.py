@@ -0,0 +1,116 @@
+from django.test import TestCase
+
+
+class TestVerificationFlags(TestCase):
+    """
+    This class is designed to test django_flex_user.models.user.FlexUser.email_verified and
+    django_flex_user.models.user.FlexUser.phone_verified
+    """
+
+    def _verify(self, token):
+        token.generate_password()
+        self.assertTrue(token.check_password(token.password))
+
+    def test_create(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(username='validUsername')
+        self.assertIsNone(user.email_verified)
+        self.assertIsNone(user.phone_verified)
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com', phone='+12025551234')
+        user.refresh_from_db()
+        self.assertIs(user.email_verified, False)
+        self.assertIs(user.phone_verified, False)
+
+        users = FlexUser.objects.bulk_create_users([{'email': 'validEmail2@example.com'}])
+        self.assertEqual(FlexUser.objects.filter(pk=users[0].pk).values_list('email_verified', 'phone_verified').get(),
+                         (False, None))
+
+    def test_check_password(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com', phone='+12025551234')
+
+        email_token = user.emailtoken_set.get()
+        self._verify(email_token)
+        # The user instance cached by the token is updated too
+        self.assertIs(email_token.user.email_verified, True)
+
+        user.refresh_from_db()
+        self.assertIs(user.email_verified, True)
+        self.assertIs(user.phone_verified, False)
+
+        self._verify(user.phonetoken_set.get())
+        user.refresh_from_db()
+        self.assertIs(user.phone_verified, True)
+
+    def test_change_email(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com')
+        self._verify(user.emailtoken_set.get())
+        user.refresh_from_db()
+
+        # Saving an unrelated change leaves the flag alone
+        user.username = 'validUsername'
+        user.save()
+        user.refresh_from_db()
+        self.assertIs(user.email_verified, True)
+
+        user.email = 'validEmail2@example.com'
+        user.save()
+        user.refresh_from_db()
+        self.assertIs(user.email_verified, False)
+        self.assertIs(user.emailtoken_set.get().verified, False)
+
+        user.email = None
+        user.save()
+        user.refresh_from_db()
+        self.assertIsNone(user.email_verified)
+
+    def test_change_phone_with_update_fields(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(phone='+12025551234')
+        self._verify(user.phonetoken_set.get())
+        user.refresh_from_db()
+
+        user.phone = '+12025555678'
+        user.save(update_fields=['phone'])
+        user.refresh_from_db()
+        self.assertIs(user.phone_verified, False)
+
+    def test_repair_verification(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django_flex_user.models.user import FlexUser
+
+        user1 = FlexUser.objects.create_user(email='validEmail1@example.com', phone='+12025551234')
+        user2 = FlexUser.objects.create_user(username='validUsername2')
+        user3 = FlexUser.objects.create_user(email='validEmail3@example.com')
+        self.assertFalse(FlexUser.objects.with_inconsistent_verification().exists())
+
+        # QuerySet.update doesn't send signals, so the flags drift
+        user1.emailtoken_set.update(verified=True)
+        FlexUser.objects.filter(pk=user2.pk).update(email_verified=False)
+        FlexUser.objects.filter(pk=user3.pk).update(email_verified=None)
+
+        self.assertEqual(
+            list(FlexUser.objects.with_inconsistent_verification().order_by('pk').values_list('pk', flat=True)),
+            [user1.pk, user2.pk, user3.pk]
+        )
+
+        stdout = StringIO()
+        call_command('flexuser_repair_verification', dry_run=True, stdout=stdout)
+        self.assertIn('Found 3 inconsistent users.', stdout.getvalue())
+
+        stdout = StringIO()
+        call_command('flexuser_repair_verification', batch_size=2, stdout=stdout)
+        self.assertIn('Repaired 3 inconsistent users.', stdout.getvalue())
+
+        self.assertFalse(FlexUser.objects.with_inconsistent_verification().exists())
+        self.assertEqual(
+            list(FlexUser.objects.order_by('pk').values_list('email_verified', 'phone_verified')),
+            [(True, False), (None, None), (False, None)]
+        )
@@ -528,3 +528,87 @@ class TestUserSerializer(TestCase):
         # Check email_verified and phone_verified
         self.assertTrue(serializer.data['phone_verified'])
         self.assertIsNone(serializer.data['email_verified'])
+
+    def test_serialize_many(self):
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.serializers import FlexUserSerializer
+
+        FlexUser.objects.create_user(username='validUsername', password='validPassword')
+        FlexUser.objects.create_user(email='validEmail@example.com', password='validPassword')
+        user = FlexUser.objects.create_user(phone='+12025551234', password='validPassword')
+        phone_token = user.phonetoken_set.get()
+        phone_token.verified = True
+        phone_token.save()
+
+        expected = [(None, None), (False, None), (None, True)]
+
+        # email_verified and phone_verified are read from the user model
+        with self.assertNumQueries(1):
+            data = FlexUserSerializer(FlexUser.objects.order_by('id'), many=True).data
+        self.assertEqual([(d['email_verified'], d['phone_verified']) for d in data], expected)
+
+    def test_create_query_count(self):
+        from django_flex_user.serializers import FlexUserSerializer
+
+        serializer = FlexUserSerializer(data={'username': 'validUsername',
+                                              'email': 'validEmail@example.com',
+                                              'phone': '+12025551234',
+                                              'password': 'validPassword'})
+
+        # A single uniqueness check for username, email and phone
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+
+    def test_create_duplicate_identifiers(self):
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.serializers import FlexUserSerializer
+
+        FlexUser.objects.create_user(username='validUsername', email='validEmail@example.com', phone='+12025551234')
+
+        serializer = FlexUserSerializer(data={'username': 'VALIDUSERNAME',
+                                              'email': 'validEmail@example.com',
+                                              'phone': '+12025551234',
+                                              'password': 'validPassword'})
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            serializer.errors,
+            {
+                'username': ['A user with that username already exists.'],
+                'email': ['A user with that email address already exists.'],
+                'phone': ['A user with that phone number already exists.'],
+            }
+        )
+
+    def test_update_query_count(self):
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.serializers import FlexUserSerializer
+
+        user = FlexUser.objects.create_user(username='validUsername', email='validEmail@example.com',
+                                            phone='+12025551234', password='validPassword')
+
+        # Merging the user's existing username, email and phone costs nothing
+        serializer = FlexUserSerializer(user, data={'password': 'validPassword2'}, partial=True)
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid())
+
+        serializer = FlexUserSerializer(user, data={'email': 'validEmail2@example.com'}, partial=True)
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+
+    def test_validate_password_similarity(self):
+        from django.test import override_settings
+        from django_flex_user.models.user import FlexUser
+        from django_flex_user.serializers import FlexUserSerializer
+
+        validators = [{'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'}]
+        with override_settings(AUTH_PASSWORD_VALIDATORS=validators):
+            # The password is checked against the user's existing username, email and phone
+            user = FlexUser.objects.create_user(username='validUsername', password='validPassword')
+            serializer = FlexUserSerializer(user, data={'password': 'validUsername'}, partial=True)
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('password', serializer.errors)
+
+            serializer = FlexUserSerializer(data={'username': 'validUsername2', 'password': 'validUsername2'})
+            self.assertFalse(serializer.is_valid())
+            self.assertIn('password', serializer.errors)
@@ -0,0 +1,230 @@
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+
+_sent = []
+
+
+def _send_password(otp_token, **kwargs):
+    _sent.append((otp_token.get_name(), kwargs))
+
+
+class _DisconnectingEmailBackend(EmailBackend):
+    # Behaves like a connection which the mail server dropped while it was idle
+    opened = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_open = False
+
+    def open(self):
+        if not self.is_open:
+            type(self).opened += 1
+            self.is_open = True
+            self.disconnected = type(self).opened == 1
+
+    def close(self):
+        self.is_open = False
+
+    def send_messages(self, messages):
+        import smtplib
+
+        if self.disconnected:
+            raise smtplib.SMTPServerDisconnected('Connection unexpectedly closed')
+        return super().send_messages(messages)
+
+
+class _RefusingEmailBackend(EmailBackend):
+    # Behaves like a mail server which refuses some recipients
+    def send_messages(self, messages):
+        import smtplib
+
+        for message in messages:
+            if message.to == ['refused@example.com']:
+                raise smtplib.SMTPRecipientsRefused({'refused@example.com': (550, b'No such user')})
+        return super().send_messages(messages)
+
+
+class TestDeliveryBackends(TestCase):
+    """
+    This class is designed to test django_flex_user.delivery_backends
+    """
+
+    def setUp(self):
+        from django_flex_user.models.user import FlexUser
+
+        _sent.clear()
+        user = FlexUser.objects.create_user(email='validEmail@example.com', phone='+12025551234')
+        self.email_token = user.emailtoken_set.get()
+        self.email_token.generate_password()
+        self.phone_token = user.phonetoken_set.get()
+        self.phone_token.generate_password()
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.test_delivery_backends._send_password'
+    )
+    def test_function_adapter(self):
+        from django_flex_user.delivery_backends import FunctionDeliveryBackend, get_delivery_backend
+
+        backend = get_delivery_backend('email')
+        self.assertIsInstance(backend, FunctionDeliveryBackend)
+        self.assertEqual(backend.function, _send_password)
+        # The backend is created once
+        self.assertIs(get_delivery_backend('email'), backend)
+
+        self.email_token.send_password(foo='bar')
+        self.assertEqual(_sent, [('validEmail@example.com', {'foo': 'bar'})])
+
+        # The backend is created again when its settings change
+        with override_settings(FLEX_USER_OTP_EMAIL_FUNCTION=None):
+            self.assertIsNone(get_delivery_backend('email'))
+            with self.assertRaises(NotImplementedError):
+                self.email_token.send_password()
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_BACKEND='django_flex_user.delivery_backends.SMTPDeliveryBackend',
+        FLEX_USER_OTP_EMAIL_BACKEND_OPTIONS={'from_email': 'noreply@example.com', 'pool_size': 1}
+    )
+    def test_smtp_backend(self):
+        from unittest import mock
+        from django.core import mail
+        from django_flex_user.delivery_backends import SMTPDeliveryBackend, get_delivery_backend
+
+        backend = get_delivery_backend('email')
+        self.assertIsInstance(backend, SMTPDeliveryBackend)
+
+        with mock.patch.object(backend, 'open_connection', wraps=backend.open_connection) as open_connection:
+            self.email_token.send_password()
+            self.email_token.send_password()
+        # The connection was reused by the second send
+        self.assertEqual(open_connection.call_count, 1)
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['validEmail@example.com'])
+        self.assertEqual(mail.outbox[0].from_email, 'noreply@example.com')
+        self.assertEqual(mail.outbox[0].body, f'Your verification code is {self.email_token.password}')
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_BACKEND='django_flex_user.delivery_backends.SMTPDeliveryBackend',
+        FLEX_USER_OTP_EMAIL_BACKEND_OPTIONS={
+            'backend': 'django_flex_user.tests.test_delivery_backends._DisconnectingEmailBackend'
+        }
+    )
+    def test_smtp_backend_reconnect(self):
+        from django.core import mail
+
+        _DisconnectingEmailBackend.opened = 0
+        self.email_token.send_password()
+        self.assertEqual(_DisconnectingEmailBackend.opened, 2)
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_BACKEND='django_flex_user.delivery_backends.SMTPDeliveryBackend',
+        FLEX_USER_OTP_EMAIL_BACKEND_OPTIONS={
+            'backend': 'django_flex_user.tests.test_delivery_backends._RefusingEmailBackend'
+        }
+    )
+    def test_smtp_backend_send_many(self):
+        from unittest import mock
+        from django.core import mail
+        from django_flex_user.delivery_backends import get_delivery_backend
+        from django_flex_user.models.otp import EmailToken, TransmissionError
+
+        refused = EmailToken(email='refused@example.com', password='password')
+        backend = get_delivery_backend('email')
+        with mock.patch.object(backend, 'open_connection', wraps=backend.open_connection) as open_connection:
+            errors = backend.send_many([(self.email_token, {}), (refused, {}), (self.email_token, {})])
+        # The messages were sent over one connection and the refused message didn't stop the rest
+        self.assertEqual(open_connection.call_count, 1)
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], TransmissionError)
+        self.assertIsNone(errors[2])
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_http_backend_send_many(self):
+        from unittest import mock
+        import requests
+        from django_flex_user.delivery_backends import HTTPDeliveryBackend
+        from django_flex_user.models.otp import PhoneToken, TransmissionError
+
+        class Backend(HTTPDeliveryBackend):
+            bulk_size = 2
+
+            def get_bulk_request(self, items):
+                return {
+                    'method': 'POST', 'url': 'https://sms.example.com/bulk',
+                    'json': [{'to': token.get_name()} for token, kwargs in items],
+                }
+
+            def check_bulk_response(self, response, items):
+                return [None if result['ok'] else TransmissionError(result['error']) for result in response.json()]
+
+        def respond(method, url, json, timeout):
+            response = requests.Response()
+            response.status_code = 200
+            response._content = requests.compat.json.dumps(
+                [{'ok': True} if item['to'] != '+12025550000' else {'ok': False, 'error': 'Unknown number'}
+                 for item in json]
+            ).encode()
+            return response
+
+        unknown = PhoneToken(phone='+12025550000', password='123456')
+        backend = Backend()
+        with mock.patch('requests.Session.request', side_effect=respond) as request:
+            errors = backend.send_many([(self.phone_token, {}), (unknown, {}), (self.phone_token, {})])
+        # Three passwords were sent using two requests
+        self.assertEqual(request.call_count, 2)
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], TransmissionError)
+        self.assertEqual(str(errors[1]), 'Unknown number')
+        self.assertIsNone(errors[2])
+
+        with mock.patch('requests.Session.request', side_effect=requests.ConnectionError):
+            errors = backend.send_many([(self.phone_token, {}), (self.phone_token, {})])
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(all(isinstance(error, TransmissionError) for error in errors))
+
+    def test_http_backend(self):
+        from unittest import mock
+        import requests
+        from django_flex_user.delivery_backends import HTTPDeliveryBackend
+        from django_flex_user.models.otp import TransmissionError
+
+        class Backend(HTTPDeliveryBackend):
+            def get_request(self, token, **kwargs):
+                return {'method': 'POST', 'url': 'https://sms.example.com/', 'data': {'to': token.get_name()}}
+
+        backend = Backend(timeout=5, headers={'Authorization': 'Bearer token'})
+
+        response = requests.Response()
+        response.status_code = 200
+        with mock.patch('requests.Session.request', return_value=response) as request:
+            backend.send(self.phone_token)
+            backend.send(self.phone_token)
+        request.assert_called_with(
+            method='POST', url='https://sms.example.com/', data={'to': '+12025551234'}, timeout=5
+        )
+        # Both sends used the same session
+        self.assertEqual(backend._pool.qsize(), 1)
+        self.assertEqual(backend._pool.queue[0].headers['Authorization'], 'Bearer token')
+
+        response.status_code = 503
+        with mock.patch('requests.Session.request', return_value=response):
+            with self.assertRaises(TransmissionError):
+                backend.send(self.phone_token)
+
+        with mock.patch('requests.Session.request', side_effect=requests.ConnectTimeout):
+            with self.assertRaises(TransmissionError):
+                backend.send(self.phone_token)
+
+        backend.close()
+
+    def test_check_delivery_settings(self):
+        from django.core import checks
+
+        self.assertEqual(checks.run_checks(), [])
+
+        with override_settings(
+            FLEX_USER_OTP_EMAIL_BACKEND='django_flex_user.delivery_backends.SMTPDeliveryBackend',
+            FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.test_delivery_backends._send_password'
+        ):
+            self.assertEqual([error.id for error in checks.run_checks()], ['django_flex_user.W001'])
@@ -0,0 +1,91 @@
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+
+
+class TestCICharField(TestCase):
+    """
+    This class is designed to test the case-insensitive lookups of django_flex_user.fields.CICharField on databases
+    other than PostgreSQL
+    """
+
+    def setUp(self):
+        from django_flex_user.models.user import FlexUser
+
+        if connection.vendor == 'postgresql':
+            self.skipTest('PostgreSQL uses citext')
+        self.user = FlexUser.objects.create_user(username='validUsername')
+
+    def test_lookups(self):
+        from django_flex_user.models.user import FlexUser
+
+        self.assertEqual(FlexUser.objects.get(username='VALIDusername'), self.user)
+        self.assertEqual(FlexUser.objects.get(username__in=['VALIDusername', 'other']), self.user)
+        self.assertFalse(FlexUser.objects.filter(username='validUsernam').exists())
+        # Unlike LIKE, the comparison has no wildcards
+        self.assertFalse(FlexUser.objects.filter(username='valid_sername').exists())
+        self.assertFalse(FlexUser.objects.filter(username='valid%').exists())
+        # Looking up None still means IS NULL
+        self.assertFalse(FlexUser.objects.filter(username=None).exists())
+
+    @skipUnlessDBFeature('supports_expression_indexes')
+    def test_unique_index(self):
+        from django.db import IntegrityError, transaction
+        from django_flex_user.models.user import FlexUser
+
+        other = FlexUser.objects.create_user(email='validEmail@example.com')
+        # The database rejects usernames which differ only by case, even when model validation is bypassed
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FlexUser.objects.filter(pk=other.pk).update(username='VALIDUSERNAME')
+
+    @skipUnlessDBFeature('supports_expression_indexes')
+    def test_query_plan(self):
+        from django_flex_user.models.user import FlexUser
+
+        if connection.vendor != 'sqlite':
+            self.skipTest('The query plan is only checked on SQLite')
+
+        for queryset in (FlexUser.objects.filter(username='VALIDusername'),
+                         FlexUser.objects.filter(username__in=['VALIDusername', 'other'])):
+            plan = queryset.explain()
+            with self.subTest(query=str(queryset.query)):
+                self.assertIn('django_flex_user_flexuser_username_upper_uniq', plan)
+
+    def test_fold_case(self):
+        from django.core.exceptions import ValidationError
+        from django_flex_user.models.user import FlexUser
+
+        fold_case = FlexUser._meta.get_field('username').fold_case
+        self.assertEqual(fold_case('validUsername'), fold_case('VALIDUSERNAME'))
+
+        # Uniqueness checks made in Python agree with the database, including about non-ASCII usernames
+        FlexUser.objects.create_user(username='ÉMILIE')
+        exists = FlexUser.objects.filter(username='émilie').exists()
+        self.assertEqual(fold_case('ÉMILIE') == fold_case('émilie'), exists)
+        if exists:
+            with self.assertRaises(ValidationError):
+                FlexUser.objects.validate_identifiers_unique(username='émilie')
+        else:
+            FlexUser.objects.validate_identifiers_unique(username='émilie')
+
+    @skipUnlessDBFeature('supports_expression_indexes')
+    def test_migration_reports_duplicates(self):
+        import importlib
+        from types import SimpleNamespace
+        from django.apps import apps
+        from django_flex_user.models.user import FlexUser
+
+        migration = importlib.import_module('django_flex_user.migrations.0007_flexuser_username_upper_index')
+        schema_editor = SimpleNamespace(connection=connection)
+
+        migration.check_duplicate_usernames(apps, schema_editor)
+
+        # Simulate a database from before the index existed
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(migration.INDEX_NAME)}')
+        other = FlexUser.objects.create_user(email='validEmail@example.com')
+        FlexUser.objects.filter(pk=other.pk).update(username='VALIDUSERNAME')
+
+        with self.assertRaisesMessage(
+            RuntimeError, f"'validUsername' (id {self.user.pk}), 'VALIDUSERNAME' (id {other.pk})"
+        ):
+            migration.check_duplicate_usernames(apps, schema_editor)
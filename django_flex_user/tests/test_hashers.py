@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase, override_settings
+
+
+class TestMakePasswords(SimpleTestCase):
+    """
+    This class is designed to test django_flex_user.hashers.make_passwords
+    """
+
+    def _test_make_passwords(self):
+        from django.contrib.auth.hashers import check_password, is_password_usable
+        from django_flex_user.hashers import make_passwords
+
+        passwords = ['validPassword{i}'.format(i=i) for i in range(50)] + [None]
+
+        encoded = list(make_passwords(iter(passwords), max_pending=2))
+
+        self.assertEqual(len(encoded), len(passwords))
+        for password, encoded_password in zip(passwords[:-1], encoded):
+            self.assertTrue(check_password(password, encoded_password))
+        self.assertFalse(is_password_usable(encoded[-1]))
+
+        # Salts are unique
+        self.assertEqual(len(set(encoded)), len(encoded))
+
+        self.assertEqual(list(make_passwords([])), [])
+
+        with self.assertRaises(TypeError):
+            list(make_passwords(['validPassword'] * 20 + [1]))
+
+    @override_settings(FLEX_USER_HASHING_PROCESSES=2)
+    def test_make_passwords(self):
+        self._test_make_passwords()
+
+    @override_settings(FLEX_USER_HASHING_PROCESSES=0)
+    def test_make_passwords_in_process(self):
+        from django_flex_user.hashers import get_process_executor
+
+        self.assertIsNone(get_process_executor())
+        self._test_make_passwords()
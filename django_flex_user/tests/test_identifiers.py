@@ -0,0 +1,145 @@
+from django.test import TestCase, override_settings
+
+
+class TestIdentifierResolver(TestCase):
+    """
+    This class is designed to test django_flex_user.identifiers
+    """
+
+    def setUp(self):
+        from django_flex_user.identifiers import identifier_resolver
+
+        identifier_resolver.clear_cache()
+
+    def test_resolve(self):
+        from django_flex_user.identifiers import resolve_identifier
+
+        cases = (
+            ('validUsername', ('username', 'validUsername')),
+            ('valid.user-name_1', ('username', 'valid.user-name_1')),
+            # NFKC normalization
+            ('ｖａｌｉｄＵｓｅｒｎａｍｅ', ('username', 'validUsername')),
+            ('ÉMILIE', ('username', 'ÉMILIE')),
+            ('validEmail@EXAMPLE.com', ('email', 'validEmail@example.com')),
+            ('+12025551234', ('phone', '+12025551234')),
+            ('(202) 555-1234', ('phone', '+12025551234')),
+            ('202-555-1234', ('phone', '+12025551234')),
+            # Invalid phone numbers are left alone
+            ('555', ('phone', '555')),
+            ('1invalid', ('phone', '1invalid')),
+            ('', ('phone', '')),
+        )
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(tuple(resolve_identifier(value)), expected)
+
+    def test_ascii_fast_path(self):
+        from django.core.exceptions import ValidationError
+        from django_flex_user.identifiers import identifier_resolver
+        from django_flex_user.validators import FlexUserUnicodeUsernameValidator
+
+        validator = FlexUserUnicodeUsernameValidator()
+        samples = ['a', 'Z9', 'user.name', 'user-name_', '_user', '.user', '-user', '9user', 'user name', 'user+tag',
+                   'user@example.com', '+12025551234', 'user!', 'user\n', '\nuser', 'üser']
+        samples += [chr(c) + 'x' for c in range(128)] + ['x' + chr(c) for c in range(128)]
+        for value in samples:
+            with self.subTest(value=value):
+                try:
+                    validator(value)
+                except ValidationError:
+                    expected = False
+                else:
+                    expected = True
+                self.assertEqual(identifier_resolver.is_username(value), expected)
+
+    def test_cache(self):
+        from django_flex_user.identifiers import IdentifierResolver, MAX_CACHED_LENGTH
+
+        resolver = IdentifierResolver(cache_size=2)
+        resolver.resolve('validUsername')
+        resolver.resolve('validUsername')
+        self.assertEqual(resolver.cache_info().hits, 1)
+
+        resolver.resolve('validEmail@example.com')
+        resolver.resolve('+12025551234')
+        # The least recently used entry was evicted
+        self.assertEqual(resolver.cache_info().currsize, 2)
+        resolver.resolve('validUsername')
+        self.assertEqual(resolver.cache_info().misses, 4)
+
+        # Long identifiers aren't cached
+        resolver.resolve('a' * (MAX_CACHED_LENGTH + 1))
+        self.assertEqual(resolver.cache_info().misses, 4)
+
+    def test_setting_changed(self):
+        from django_flex_user.identifiers import resolve_identifier
+
+        self.assertEqual(resolve_identifier('020 7946 0000').value, '020 7946 0000')
+        with override_settings(PHONENUMBER_DEFAULT_REGION='GB'):
+            self.assertEqual(resolve_identifier('020 7946 0000').value, '+442079460000')
+        self.assertEqual(resolve_identifier('020 7946 0000').value, '020 7946 0000')
+
+
+class TestPhoneNumbers(TestCase):
+    """
+    This class is designed to test the phone number helpers of django_flex_user.identifiers
+    """
+
+    def setUp(self):
+        from django_flex_user.identifiers import _parse_phone_cached
+
+        _parse_phone_cached.cache_clear()
+
+    def test_to_e164(self):
+        from phonenumber_field.phonenumber import PhoneNumber
+        from django_flex_user.identifiers import _parse_phone_cached, to_e164
+
+        for value in ('+12015550123', '(201) 555-0123', '+1 201-555-0123', '201.555.0123', 'tel:+1-201-555-0123'):
+            with self.subTest(value=value):
+                self.assertEqual(to_e164(value), '+12015550123')
+        self.assertEqual(to_e164('020 7946 0000', region='GB'), '+442079460000')
+        # Parsed phone numbers (e.g. the value of a PhoneNumberField) are accepted too
+        self.assertEqual(to_e164(PhoneNumber.from_string('(201) 555-0123')), '+12015550123')
+        self.assertIsNone(to_e164(PhoneNumber.from_string('555')))
+        for value in ('', '555', 'invalid', '+1 000-000-0000'):
+            with self.subTest(value=value):
+                self.assertIsNone(to_e164(value))
+
+        misses = _parse_phone_cached.cache_info().misses
+        to_e164('(201) 555-0123')
+        self.assertEqual(_parse_phone_cached.cache_info().misses, misses)
+
+    def test_parse_phones(self):
+        from unittest import mock
+        from django_flex_user import identifiers
+
+        values = ['(201) 555-0123', 'invalid', '(201) 555-0123', '+12025551234']
+        with mock.patch.object(identifiers, '_parse_phone', wraps=identifiers._parse_phone) as parse_phone:
+            results = identifiers.parse_phones(values)
+        self.assertEqual(results, ['+12015550123', None, '+12015550123', '+12025551234'])
+        # Each distinct phone number was parsed once, without filling the shared cache
+        self.assertEqual(parse_phone.call_count, 3)
+        self.assertEqual(identifiers._parse_phone_cached.cache_info().currsize, 0)
+
+        self.assertEqual(identifiers.parse_phones(['020 7946 0000'], region='GB'), ['+442079460000'])
+
+    def test_phone_lookup_value(self):
+        from unittest import mock
+        from phonenumber_field.modelfields import PhoneNumberField
+        from django_flex_user.identifiers import phone_lookup_value
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(phone='+12015550123')
+
+        with mock.patch.object(PhoneNumberField, 'get_prep_value') as get_prep_value:
+            self.assertEqual(FlexUser.objects.get(phone=phone_lookup_value('(201) 555-0123')), user)
+            self.assertEqual(FlexUser.objects.get_by_natural_key(phone='+1 201-555-0123'), user)
+        # The phone number was parsed once rather than by the field each time the query was built
+        get_prep_value.assert_not_called()
+
+        # Invalid phone numbers are prepared by the field as usual
+        self.assertEqual(phone_lookup_value('invalid'), 'invalid')
+        self.assertFalse(FlexUser.objects.filter(phone=phone_lookup_value('invalid')).exists())
+
+        with override_settings(PHONENUMBER_DB_FORMAT='INTERNATIONAL'):
+            self.assertEqual(phone_lookup_value('(201) 555-0123'), '(201) 555-0123')
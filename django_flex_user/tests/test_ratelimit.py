@@ -0,0 +1,179 @@
+from django.test import TestCase, override_settings
+
+from rest_framework.test import APITestCase
+
+
+def _send_password(*args, **kwargs):
+    pass
+
+
+class TestRateLimits(TestCase):
+    """
+    This class is designed to test django_flex_user.ratelimit
+    """
+
+    def setUp(self):
+        from django.core.cache import caches
+        from django_flex_user.ratelimit import _fallback_cache
+
+        caches['default'].clear()
+        _fallback_cache.clear()
+
+    def test_parse_rate(self):
+        from django_flex_user.ratelimit import parse_rate
+
+        self.assertIsNone(parse_rate(None))
+        self.assertEqual(parse_rate('5/s'), (5, 1))
+        self.assertEqual(parse_rate('5/15m'), (5, 15 * 60))
+        self.assertEqual(parse_rate('10/hour'), (10, 60 * 60))
+        self.assertEqual(parse_rate('100/2d'), (100, 2 * 24 * 60 * 60))
+        for rate in ('', '5', '5/', 'five/m', '5/15w'):
+            with self.subTest(rate=rate), self.assertRaises(ValueError):
+                parse_rate(rate)
+
+    @override_settings(FLEX_USER_RATE_LIMITS={'test': '2/m'})
+    def test_sliding_window(self):
+        from datetime import timedelta
+        from freezegun import freeze_time
+        from django_flex_user.ratelimit import RateLimitExceeded, check_rate_limits
+
+        with freeze_time('2021-01-01 00:00:00') as frozen_datetime:
+            check_rate_limits(('test', 'a'))
+            check_rate_limits(('test', 'a'))
+            with self.assertRaises(RateLimitExceeded) as cm:
+                check_rate_limits(('test', 'a'))
+            self.assertEqual(cm.exception.scope, 'test')
+            self.assertEqual(cm.exception.retry_after, 60)
+            # Keys are limited independently
+            check_rate_limits(('test', 'b'))
+
+            # Halfway through the next window, half of the previous window's requests still count
+            frozen_datetime.tick(timedelta(seconds=90))
+            check_rate_limits(('test', 'a'))
+            with self.assertRaises(RateLimitExceeded) as cm:
+                check_rate_limits(('test', 'a'))
+            self.assertEqual(cm.exception.retry_after, 30)
+
+            frozen_datetime.tick(timedelta(seconds=30))
+            check_rate_limits(('test', 'a'))
+
+    @override_settings(FLEX_USER_RATE_LIMITS={'short': '1/m', 'long': '2/h', 'disabled': None})
+    def test_multiple_limits(self):
+        from freezegun import freeze_time
+        from django_flex_user.ratelimit import RateLimitExceeded, check_rate_limits
+
+        with freeze_time('2021-01-01 00:00:00'):
+            check_rate_limits(('short', 'a'), ('long', 'a'), ('disabled', 'a'), ('short', None))
+            with self.assertRaises(RateLimitExceeded) as cm:
+                check_rate_limits(('short', 'a'), ('long', 'a'))
+            self.assertEqual(cm.exception.scope, 'short')
+            # The refused request wasn't counted against the other limit
+            check_rate_limits(('long', 'a'))
+            with self.assertRaises(RateLimitExceeded) as cm:
+                check_rate_limits(('long', 'a'))
+            self.assertEqual(cm.exception.retry_after, 60 * 60)
+
+    @override_settings(FLEX_USER_RATE_LIMITS={'test': '2/m'})
+    def test_concurrent_requests(self):
+        from unittest import mock
+        from django.core.cache import caches
+        from freezegun import freeze_time
+        from django_flex_user.ratelimit import RATE_LIMIT_CACHE_VERSION, RateLimitExceeded, _make_key, \
+            check_rate_limits
+
+        cache = caches['default']
+        with freeze_time('2021-01-01 00:00:00') as frozen_datetime:
+            # Concurrent requests all read the counts before any of them is counted. The limit holds because each
+            # request is counted by an atomic increment before it's checked.
+            with mock.patch.object(cache, 'get_many', return_value={}):
+                check_rate_limits(('test', 'a'))
+                check_rate_limits(('test', 'a'))
+                for _ in range(3):
+                    with self.assertRaises(RateLimitExceeded):
+                        check_rate_limits(('test', 'a'))
+
+            # The refused requests were taken back
+            key = _make_key('test', 'a', int(frozen_datetime().timestamp()))
+            self.assertEqual(cache.get(key, version=RATE_LIMIT_CACHE_VERSION), 2)
+
+    @override_settings(FLEX_USER_RATE_LIMITS={'test': '1/m'})
+    def test_fallback(self):
+        from unittest import mock
+        from django.core.cache import caches
+        from django_flex_user.ratelimit import RateLimitExceeded, check_rate_limits
+
+        with mock.patch.object(caches['default'], 'get_many', side_effect=ConnectionError), \
+                self.assertLogs('django_flex_user.ratelimit', 'WARNING'):
+            check_rate_limits(('test', 'a'))
+            with self.assertRaises(RateLimitExceeded):
+                check_rate_limits(('test', 'a'))
+
+        with override_settings(FLEX_USER_RATE_LIMIT_CACHE=None):
+            with self.assertRaises(RateLimitExceeded):
+                check_rate_limits(('test', 'a'))
+
+
+class TestRateLimitedViews(APITestCase):
+    """
+    This class is designed to test the rate limits of django_flex_user.views.OTPTokens and
+    django_flex_user.views.EmailToken
+    """
+
+    def setUp(self):
+        from django.core.cache import caches
+        from django_flex_user.models.user import FlexUser
+
+        caches['default'].clear()
+        self.user = FlexUser.objects.create_user(email='validEmail@example.com', phone='+12025551234')
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.test_ratelimit._send_password',
+        FLEX_USER_RATE_LIMITS={'otp_generate_token': '2/h'}
+    )
+    def test_otp_generation(self):
+        from freezegun import freeze_time
+
+        email_token = self.user.emailtoken_set.get()
+        path = f'/api/accounts/otp-tokens/email/{email_token.id}'
+
+        with freeze_time('2021-01-01 00:00:00'):
+            for _ in range(2):
+                self.assertEqual(self.client.get(path).status_code, 204)
+
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response['Retry-After'], str(60 * 60))
+
+        # The limit is per token
+        phone_token = self.user.phonetoken_set.get()
+        with override_settings(
+            FLEX_USER_OTP_SMS_FUNCTION='django_flex_user.tests.test_ratelimit._send_password'
+        ):
+            self.assertEqual(self.client.get(f'/api/accounts/otp-tokens/phone/{phone_token.id}').status_code, 204)
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.test_ratelimit._send_password',
+        FLEX_USER_RATE_LIMITS={'otp_generate_client': '1/h'}
+    )
+    def test_otp_generation_per_client(self):
+        email_token = self.user.emailtoken_set.get()
+        path = f'/api/accounts/otp-tokens/email/{email_token.id}'
+
+        self.assertEqual(self.client.get(path, REMOTE_ADDR='203.0.113.1').status_code, 204)
+        self.assertEqual(self.client.get(path, REMOTE_ADDR='203.0.113.1').status_code, 429)
+        self.assertEqual(self.client.get(path, REMOTE_ADDR='203.0.113.2').status_code, 204)
+
+    @override_settings(FLEX_USER_RATE_LIMITS={'otp_search_identifier': '2/m'})
+    def test_otp_search(self):
+        path = '/api/accounts/otp-tokens/'
+
+        for _ in range(2):
+            self.assertEqual(self.client.get(path, {'search': 'validEmail@example.com'}).status_code, 200)
+        response = self.client.get(path, {'search': 'VALIDEMAIL@example.com'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+        self.assertEqual(self.client.get(path, {'search': '+12025551234'}).status_code, 200)
+        # Different spellings of the same phone number share a limit
+        self.assertEqual(self.client.get(path, {'search': '(202) 555-1234'}).status_code, 200)
+        self.assertEqual(self.client.get(path, {'search': '+1 202-555-1234'}).status_code, 429)
@@ -0,0 +1,167 @@
+from django.test import TestCase, override_settings
+
+
+@override_settings(FLEX_USER_OTP_THROTTLE_STORE='django_flex_user.throttling.CacheThrottleStore')
+class TestCacheThrottleStore(TestCase):
+    """
+    This class is designed to test django_flex_user.throttling.CacheThrottleStore
+    """
+
+    def setUp(self):
+        from django.core.cache import cache
+        from django_flex_user.models.user import FlexUser
+
+        cache.clear()
+        user = FlexUser.objects.create_user(email='validEmail@example.com')
+        self.otp_token = user.emailtoken_set.get()
+
+    def test_check_password(self):
+        from datetime import timedelta
+        from freezegun import freeze_time
+        from django.utils import timezone
+        from django_flex_user.models.otp import EmailToken, TimeoutError
+
+        with freeze_time() as frozen_datetime:
+            self.otp_token.generate_password()
+
+            # Failed attempts don't write to the database
+            with self.assertNumQueries(0):
+                self.assertFalse(self.otp_token.check_password('invalidPassword'))
+            self.assertEqual(self.otp_token.timeout, timezone.now() + timedelta(seconds=1))
+            self.assertEqual(self.otp_token.failure_count, 1)
+
+            # The throttle state is shared by every instance of the token
+            otp_token = EmailToken.objects.get(pk=self.otp_token.pk)
+            self.assertIsNone(otp_token.timeout)
+            with self.assertRaises(TimeoutError) as cm:
+                otp_token.check_password(otp_token.password)
+            self.assertEqual(cm.exception.verification_failure_count, 1)
+            self.assertEqual(cm.exception.retry_after, 1)
+
+            frozen_datetime.tick(timedelta(seconds=1))
+            self.assertFalse(otp_token.check_password('invalidPassword'))
+            self.assertEqual(otp_token.timeout, timezone.now() + timedelta(seconds=2))
+            self.assertEqual(otp_token.failure_count, 2)
+
+            frozen_datetime.tick(timedelta(seconds=2))
+            self.assertTrue(otp_token.check_password(otp_token.password))
+            self.assertIsNone(otp_token.timeout)
+            self.assertEqual(otp_token.failure_count, 0)
+
+            # A successful attempt resets the throttle state
+            self.otp_token.refresh_from_db()
+            self.assertTrue(self.otp_token.verified)
+            self.assertFalse(self.otp_token.check_password('invalidPassword'))
+            self.assertEqual(self.otp_token.failure_count, 1)
+
+    def test_generate_password(self):
+        from freezegun import freeze_time
+
+        with freeze_time():
+            self.otp_token.generate_password()
+            self.assertFalse(self.otp_token.check_password('invalidPassword'))
+
+            # Generating a new password resets the throttle state
+            self.otp_token.generate_password()
+            self.assertTrue(self.otp_token.check_password(self.otp_token.password))
+
+    def test_retry_after(self):
+        from freezegun import freeze_time
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        path = '/api/accounts/otp-tokens/email/{id}'.format(id=self.otp_token.id)
+
+        with freeze_time() as frozen_datetime:
+            self.otp_token.generate_password()
+            for i in range(3):
+                response = client.post(path, data={'password': 'invalidPassword'}, format='json')
+                self.assertEqual(response.status_code, 401)
+
+                response = client.post(path, data={'password': 'invalidPassword'}, format='json')
+                self.assertEqual(response.status_code, 429)
+                self.assertEqual(response['Retry-After'], str(2 ** i))
+
+                frozen_datetime.tick(2 ** i)
+
+
+class TestDatabaseThrottleStore(TestCase):
+    """
+    This class is designed to test django_flex_user.throttling.DatabaseThrottleStore and
+    django_flex_user.models.otp.SideChannelToken.check_password
+    """
+
+    def setUp(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(email='validEmail@example.com')
+        self.otp_token = user.emailtoken_set.get()
+
+    def test_check_password_query_count(self):
+        from django_flex_user.models.otp import EmailToken, TimeoutError
+
+        self.otp_token.generate_password()
+
+        # A failed attempt is recorded using a single statement, then the new throttle state is read back
+        otp_token = EmailToken.objects.get(pk=self.otp_token.pk)
+        with self.assertNumQueries(2):
+            self.assertFalse(otp_token.check_password('invalidPassword'))
+        self.assertEqual(otp_token.failure_count, 1)
+
+        # An attempt which gets past a stale timeout is refused by the database, which takes another query to report
+        otp_token.timeout = None
+        with self.assertNumQueries(2), self.assertRaises(TimeoutError):
+            otp_token.check_password('invalidPassword')
+        self.assertEqual(EmailToken.objects.get(pk=otp_token.pk).failure_count, 1)
+
+    def test_check_password_concurrent_failure(self):
+        from django_flex_user.models.otp import EmailToken, TimeoutError
+
+        self.otp_token.generate_password()
+        otp_token1 = EmailToken.objects.get(pk=self.otp_token.pk)
+        otp_token2 = EmailToken.objects.get(pk=self.otp_token.pk)
+
+        self.assertFalse(otp_token1.check_password('invalidPassword'))
+
+        # otp_token2 doesn't know that the token is timed out, but the database does
+        with self.assertRaises(TimeoutError):
+            otp_token2.check_password(otp_token2.password)
+        self.assertEqual(otp_token2.failure_count, 1)
+
+        otp_token = EmailToken.objects.get(pk=self.otp_token.pk)
+        self.assertFalse(otp_token.verified)
+        self.assertEqual(otp_token.failure_count, 1)
+
+    def test_check_password_concurrent_generate_password(self):
+        from datetime import timedelta
+        from freezegun import freeze_time
+        from django_flex_user.models.otp import EmailToken
+
+        with freeze_time() as frozen_datetime:
+            self.otp_token.generate_password()
+            otp_token = EmailToken.objects.get(pk=self.otp_token.pk)
+            self.otp_token.generate_password()
+
+            # otp_token holds the old password, which is no longer valid
+            self.assertFalse(otp_token.check_password(otp_token.password))
+            self.assertFalse(otp_token.verified)
+
+            self.otp_token.refresh_from_db()
+            self.assertFalse(self.otp_token.verified)
+            self.assertEqual(self.otp_token.failure_count, 1)
+
+            frozen_datetime.tick(timedelta(seconds=1))
+            self.assertTrue(self.otp_token.check_password(self.otp_token.password))
+        self.otp_token.user.refresh_from_db()
+        self.assertIs(self.otp_token.user.email_verified, True)
+
+    def test_check_password_records_failure(self):
+        from datetime import timedelta
+        from freezegun import freeze_time
+        from django.utils import timezone
+
+        with freeze_time():
+            self.otp_token.generate_password()
+            self.assertFalse(self.otp_token.check_password('invalidPassword'))
+            self.assertEqual(self.otp_token.failure_count, 1)
+            self.assertEqual(self.otp_token.timeout, timezone.now() + timedelta(seconds=1))
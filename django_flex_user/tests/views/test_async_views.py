@@ -0,0 +1,193 @@
+from django.test import TestCase, override_settings
+from django.urls import include, path
+
+urlpatterns = [
+    path('api/accounts/', include('django_flex_user.async_urls')),
+]
+
+
+def _send_password(*args):
+    pass
+
+
+@override_settings(ROOT_URLCONF='django_flex_user.tests.views.test_async_views')
+class TestAsyncViews(TestCase):
+    """
+    This class is designed to test the views in django_flex_user.async_views
+    """
+
+    def setUp(self):
+        from django_flex_user.models.user import FlexUser
+
+        self.user = FlexUser.objects.create_user(
+            username='validUsername',
+            email='validEmail@example.com',
+            phone='+12025551234',
+            password='validPassword'
+        )
+
+    async def test_sessions(self):
+        response = await self.async_client.post(
+            '/api/accounts/sessions/',
+            {'username': 'validUsername', 'password': 'validPassword'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json(),
+            {
+                'username': 'validUsername',
+                'email': 'validEmail@example.com',
+                'email_verified': False,
+                'phone': '+12025551234',
+                'phone_verified': False
+            }
+        )
+
+        response = await self.async_client.get('/api/accounts/users/user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'validUsername')
+
+        response = await self.async_client.delete('/api/accounts/sessions/')
+        self.assertEqual(response.status_code, 204)
+
+        response = await self.async_client.get('/api/accounts/users/user/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'])
+    async def test_sessions_other_backend(self):
+        response = await self.async_client.post(
+            '/api/accounts/sessions/',
+            {'username': 'validUsername', 'password': 'validPassword'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+
+        response = await self.async_client.get('/api/accounts/users/user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'validUsername')
+
+    async def test_sessions_invalid_password(self):
+        from django.contrib.auth.signals import user_login_failed
+
+        failures = []
+
+        def receiver(sender, credentials=None, **kwargs):
+            failures.append(credentials)
+
+        user_login_failed.connect(receiver)
+        try:
+            response = await self.async_client.post(
+                '/api/accounts/sessions/',
+                {'username': 'validUsername', 'password': 'invalidPassword'},
+                content_type='application/json'
+            )
+        finally:
+            user_login_failed.disconnect(receiver)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'password': ['The password you entered is invalid.']})
+        # The failed attempt is reported without the user object
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]['username'], 'validUsername')
+        self.assertEqual(failures[0]['password'], '********************')
+        self.assertNotIn('user', failures[0])
+
+    async def test_sessions_nonexistent_user(self):
+        response = await self.async_client.post(
+            '/api/accounts/sessions/',
+            {'username': 'validUsername2', 'password': 'validPassword'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'username': ["Couldn't find a user with that username."]})
+
+    async def test_flex_users(self):
+        from asgiref.sync import sync_to_async
+        from django.contrib.auth import authenticate
+
+        response = await self.async_client.post(
+            '/api/accounts/users/',
+            {'username': 'validUsername2', 'password': 'validPassword2'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json(),
+            {
+                'username': 'validUsername2',
+                'email': None,
+                'email_verified': None,
+                'phone': None,
+                'phone_verified': None
+            }
+        )
+
+        user = await sync_to_async(authenticate)(username='validUsername2', password='validPassword2')
+        self.assertIsNotNone(user)
+
+        response = await self.async_client.patch(
+            '/api/accounts/users/user/',
+            {'password': 'validPassword3'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # The user should remain signed in after changing their password
+        response = await self.async_client.get('/api/accounts/users/user/')
+        self.assertEqual(response.status_code, 200)
+
+        user = await sync_to_async(authenticate)(username='validUsername2', password='validPassword3')
+        self.assertIsNotNone(user)
+
+    async def test_flex_users_invalid(self):
+        response = await self.async_client.post(
+            '/api/accounts/users/',
+            {'username': 'validUsername', 'password': 'validPassword2'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'username': ['A user with that username already exists.']})
+
+    @override_settings(
+        FLEX_USER_OTP_EMAIL_FUNCTION='django_flex_user.tests.views.test_async_views._send_password'
+    )
+    async def test_email_token(self):
+        from asgiref.sync import sync_to_async
+
+        otp_token = await sync_to_async(self.user.emailtoken_set.first)()
+
+        response = await self.async_client.get(f'/api/accounts/otp-tokens/email/{otp_token.id}')
+        self.assertEqual(response.status_code, 204)
+
+        await sync_to_async(otp_token.refresh_from_db)()
+
+        response = await self.async_client.post(
+            f'/api/accounts/otp-tokens/email/{otp_token.id}',
+            {'password': 'invalidPassword'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            f'/api/accounts/otp-tokens/email/{otp_token.id}',
+            {'password': otp_token.password},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 429)
+
+    @override_settings(FLEX_USER_OTP_EMAIL_FUNCTION=None, FLEX_USER_OTP_DELIVERY_QUEUE=True)
+    async def test_email_token_queued(self):
+        from asgiref.sync import sync_to_async
+        from django_flex_user.models.outbox import OutboxMessage
+
+        otp_token = await sync_to_async(self.user.emailtoken_set.first)()
+
+        response = await self.async_client.get(f'/api/accounts/otp-tokens/email/{otp_token.id}')
+        self.assertEqual(response.status_code, 202)
+
+        message = await sync_to_async(OutboxMessage.objects.get)()
+        self.assertEqual(message.email_token_id, otp_token.id)
+
+    async def test_method_not_allowed(self):
+        response = await self.async_client.put('/api/accounts/sessions/')
+        self.assertEqual(response.status_code, 405)
@@ -1,3 +1,5 @@
+from django.test import override_settings
+
 from rest_framework.test import APITestCase
 from rest_framework import status
 
@@ -77,6 +79,37 @@ class TestOTPTokensRetrieve(APITestCase):
                         }
                     )
 
+    def test_method_get_query_count(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        for value, expect_match in self._search_values:
+            with self.subTest(search_value=value):
+                # The search term is resolved to a user using one query, then the user's tokens are fetched using one
+                # UNION query
+                with self.assertNumQueries(0 if not value else 2 if expect_match else 1):
+                    response = self.client.get(self._REST_ENDPOINT_PATH, {'search': value})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(response.data['email']), int(expect_match))
+                self.assertEqual(len(response.data['phone']), int(expect_match))
+
+    @override_settings(FLEX_USER_IDENTITY_CACHE='default')
+    def test_method_get_identity_cache(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        for expected_queries in (2, 1):
+            with self.assertNumQueries(expected_queries):
+                response = self.client.get(self._REST_ENDPOINT_PATH, {'search': 'validEmail1@example.com'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['email'][0]['name'], 'va*********@ex*****.***')
+
+        # Searches for identifiers which don't belong to any user are cached too
+        for expected_queries in (1, 0):
+            with self.assertNumQueries(expected_queries):
+                response = self.client.get(self._REST_ENDPOINT_PATH, {'search': 'validEmail3@example.com'})
+            self.assertEqual(response.data, {'email': [], 'phone': []})
+
     def test_method_post(self):
         response = self.client.post(self._REST_ENDPOINT_PATH)
         self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -51,6 +51,21 @@ class TestEmailTokenRetrieveUpdate(APITestCase):
             self.assertEqual(self.otp_token.failure_count, 0)
             self.assertEqual(self.otp_token.expiration, timezone.now() + timedelta(minutes=15))
 
+    @override_settings(FLEX_USER_OTP_EMAIL_FUNCTION=None, FLEX_USER_OTP_DELIVERY_QUEUE=True)
+    def test_method_get_queued(self):
+        from django_flex_user.models.outbox import OutboxMessage
+
+        # The password is queued for delivery rather than sent, so no delivery function is called
+        response = self.client.get(self._REST_ENDPOINT_PATH)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.otp_token.refresh_from_db()
+        self.assertIsNotNone(self.otp_token.password)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.token, self.otp_token)
+        self.assertEqual(message.priority, OutboxMessage.PRIORITY_HIGH)
+        self.assertEqual(message.status, OutboxMessage.STATUS_PENDING)
+
     # Method POST, format application/json, generate password then check password
 
     @override_settings(FLEX_USER_OTP_TTL=timedelta(minutes=15))
@@ -212,6 +227,7 @@ class TestEmailTokenRetrieveUpdate(APITestCase):
                     response = self.client.post(self._REST_ENDPOINT_PATH, data={'password': 'invalidPassword'},
                                                 format='json')
                     self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+                    self.assertEqual(response['Retry-After'], str(2 ** i - j))
                     # Try to verify a valid password.
                     response = self.client.post(self._REST_ENDPOINT_PATH, data={'password': self.otp_token.password},
                                                 format='json')
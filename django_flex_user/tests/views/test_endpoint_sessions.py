@@ -0,0 +1,111 @@
+from django.contrib.auth.backends import ModelBackend
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+
+class _ModelBackend(ModelBackend):
+    pass
+
+
+class TestSessions(APITestCase):
+    """
+    This class is designed to test django_flex_user.views.Sessions
+    """
+    _REST_ENDPOINT_PATH = '/api/accounts/sessions/'
+
+    def test_method_post(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(username='validUsername', password='validPassword')
+
+        response = self.client.post(self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'validPassword'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['username'], 'validUsername')
+        self.assertEqual(int(self.client.session['_auth_user_id']), user.id)
+
+    @override_settings(AUTHENTICATION_BACKENDS=['django_flex_user.tests.views.test_endpoint_sessions._ModelBackend'])
+    def test_method_post_other_backend(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(username='validUsername', password='validPassword')
+
+        # Backends other than FlexUserModelBackend are passed the credentials
+        response = self.client.post(
+            self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'validPassword'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(int(self.client.session['_auth_user_id']), user.id)
+        self.assertEqual(
+            self.client.session['_auth_user_backend'],
+            'django_flex_user.tests.views.test_endpoint_sessions._ModelBackend'
+        )
+
+        self.client.logout()
+        response = self.client.post(
+            self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'invalidPassword'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'password': ['The password you entered is invalid.']})
+
+    def test_method_post_query_count(self):
+        """
+        Signing in fetches the user once. The remaining queries belong to django.contrib.auth.login, which updates the
+        user's last login time, and to the database session backend (an existence check for the new session key, an
+        insert and an update, each of the latter two inside a savepoint).
+        """
+        from django_flex_user.models.user import FlexUser
+
+        FlexUser.objects.create_user(username='validUsername', password='validPassword')
+
+        with self.assertNumQueries(9):
+            response = self.client.post(
+                self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'validPassword'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_method_post_invalid_password(self):
+        from django_flex_user.models.user import FlexUser
+
+        FlexUser.objects.create_user(username='validUsername', password='validPassword')
+
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'invalidPassword'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'password': ['The password you entered is invalid.']})
+
+    def test_method_post_invalid_password_signal(self):
+        from django.contrib.auth.signals import user_login_failed
+
+        from django_flex_user.models.user import FlexUser
+
+        FlexUser.objects.create_user(username='validUsername', password='validPassword')
+
+        failures = []
+
+        def receiver(sender, credentials=None, **kwargs):
+            failures.append(credentials)
+
+        user_login_failed.connect(receiver)
+        try:
+            response = self.client.post(
+                self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'invalidPassword'}
+            )
+        finally:
+            user_login_failed.disconnect(receiver)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # The failed attempt is reported without the user object and with the password scrubbed
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0]['username'], 'validUsername')
+        self.assertEqual(failures[0]['password'], '********************')
+        self.assertNotIn('user', failures[0])
+
+    def test_method_post_nonexistent_user(self):
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                self._REST_ENDPOINT_PATH, {'username': 'validUsername', 'password': 'validPassword'}
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'username': ["Couldn't find a user with that username."]})
@@ -0,0 +1,56 @@
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+
+class TestFlexUsersExport(APITestCase):
+    """
+    This class is designed to test django_flex_user.views.FlexUsersExport
+    """
+    _REST_ENDPOINT_PATH = '/api/accounts/users/export/'
+
+    def test_method_get_unauthenticated(self):
+        response = self.client.get(self._REST_ENDPOINT_PATH)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_method_get_not_staff(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_user(username='validUsername', password='validPassword')
+        self.client.force_authenticate(user)
+
+        response = self.client.get(self._REST_ENDPOINT_PATH)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_method_get(self):
+        import csv
+        import json
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_superuser(username='validUsername', password='validPassword')
+        FlexUser.objects.create_user(email='validEmail@example.com')
+        self.client.force_authenticate(user)
+
+        response = self.client.get(self._REST_ENDPOINT_PATH)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(b''.join(response.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual([row['username'] for row in rows], ['validUsername', ''])
+        self.assertEqual([row['email_verified'] for row in rows], ['', 'False'])
+
+        response = self.client.get(self._REST_ENDPOINT_PATH, {'export_format': 'jsonl'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode('utf-8').splitlines()]
+        self.assertEqual([row['email'] for row in rows], [None, 'validEmail@example.com'])
+
+        response = self.client.get(self._REST_ENDPOINT_PATH, {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_method_post(self):
+        from django_flex_user.models.user import FlexUser
+
+        user = FlexUser.objects.create_superuser(username='validUsername', password='validPassword')
+        self.client.force_authenticate(user)
+
+        response = self.client.post(self._REST_ENDPOINT_PATH)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
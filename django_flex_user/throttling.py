@@ -0,0 +1,163 @@
+import importlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+# Bump this whenever the layout of cached entries changes so that entries written by older code are never read back
+THROTTLE_CACHE_VERSION = 1
+
+# Timeouts double with each failed attempt up to 2 ^ MAX_TIMEOUT_EXPONENT seconds (about 194 days) and stay there
+MAX_TIMEOUT_EXPONENT = 24
+
+
+def get_timeout_delay(failure_count):
+    """
+    Return the number of seconds for which a token is timed out after its ``failure_count``-th failed attempt.
+
+    :param failure_count: The number of consecutive failed attempts, including the latest one.
+    :type failure_count: int
+    :rtype: int
+    """
+    return 2 ** min(failure_count - 1, MAX_TIMEOUT_EXPONENT)
+
+
+def get_throttle_store():
+    """
+    Return an instance of the throttle store configured by ``FLEX_USER_OTP_THROTTLE_STORE``.
+
+    :return: The throttle store.
+    :rtype: BaseThrottleStore
+    """
+    name = getattr(settings, 'FLEX_USER_OTP_THROTTLE_STORE', 'django_flex_user.throttling.DatabaseThrottleStore')
+    module_name, class_name = name.rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class BaseThrottleStore:
+    """
+    Stores the number of consecutive failed verification attempts made against a one-time password token and the time
+    before which the next attempt will be refused.
+
+    Each method updates the token's ``timeout`` and ``failure_count`` attributes to match the store, but whether they
+    are saved to the database is up to the store.
+    """
+
+    def check(self, token):
+        """
+        Raise :class:`~django_flex_user.models.otp.TimeoutError` if the token is timed out.
+
+        :param token: The token.
+        :type token: ~django_flex_user.models.otp.Token
+        :raises ~django_flex_user.models.otp.TimeoutError: If the token is timed out.
+        """
+        raise NotImplementedError
+
+    def record_failure(self, token):
+        """
+        Record a failed verification attempt and time the token out for 2 ^ (number of previous failures) seconds.
+
+        :param token: The token.
+        :type token: ~django_flex_user.models.otp.Token
+        """
+        raise NotImplementedError
+
+    def reset(self, token):
+        """
+        Clear the token's failed verification attempts (e.g. because it was verified or a new password was generated).
+        The token is saved by the caller afterwards.
+
+        :param token: The token.
+        :type token: ~django_flex_user.models.otp.Token
+        """
+        raise NotImplementedError
+
+
+class DatabaseThrottleStore(BaseThrottleStore):
+    """
+    Stores throttle state in the token's ``timeout`` and ``failure_count`` fields.
+
+    Each failed attempt is recorded using a single conditional ``UPDATE`` which increments ``failure_count`` and
+    computes ``timeout`` in the database, so concurrent attempts (e.g. made against different servers) are all counted
+    and an attempt which arrives while the token is timed out is refused rather than counted. The new values are read
+    back in the same transaction.
+    """
+
+    def check(self, token):
+        token._is_timed_out()
+
+    def record_failure(self, token):
+        now = timezone.now()
+        delays = [When(failure_count=i, then=Value(now + timedelta(seconds=get_timeout_delay(i + 1))))
+                  for i in range(MAX_TIMEOUT_EXPONENT + 1)]
+        manager = type(token)._base_manager.using(token._state.db)
+        queryset = manager.filter(Q(timeout__isnull=True) | Q(timeout__lte=now), pk=token.pk)
+
+        # The UPDATE locks the row until the transaction ends, so the values read back are the ones it wrote
+        with transaction.atomic(using=token._state.db, savepoint=False):
+            updated = queryset.update(
+                failure_count=F('failure_count') + 1,
+                timeout=Case(
+                    *delays,
+                    default=Value(now + timedelta(seconds=2 ** MAX_TIMEOUT_EXPONENT)),
+                    output_field=DateTimeField()
+                ),
+            )
+            token.timeout, token.failure_count = manager.values_list('timeout', 'failure_count').get(pk=token.pk)
+
+        if not updated:
+            # A concurrent attempt timed the token out after we checked it
+            token._is_timed_out()
+
+    def reset(self, token):
+        token._reset_timeout()
+
+
+class CacheThrottleStore(BaseThrottleStore):
+    """
+    Stores throttle state in the cache configured by ``FLEX_USER_OTP_THROTTLE_CACHE``. Failed attempts are counted
+    using the cache's atomic increment and don't write to the database at all.
+
+    The cache must be shared by every process serving requests (e.g. Redis or Memcached) or attempts made against
+    different processes won't be counted together.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'FLEX_USER_OTP_THROTTLE_CACHE', 'default')]
+        # Failed attempts are forgotten if no further attempts are made for this many seconds
+        self.timeout = getattr(settings, 'FLEX_USER_OTP_THROTTLE_CACHE_TIMEOUT', 24 * 60 * 60)
+
+    @staticmethod
+    def _make_keys(token):
+        prefix = f'flex_user:throttle:{token._meta.label_lower}:{token.pk}'
+        return f'{prefix}:failure_count', f'{prefix}:timeout'
+
+    def check(self, token):
+        failure_count_key, timeout_key = self._make_keys(token)
+        entries = self.cache.get_many([failure_count_key, timeout_key], version=THROTTLE_CACHE_VERSION)
+        token.failure_count = entries.get(failure_count_key, 0)
+        token.timeout = entries.get(timeout_key)
+        token._is_timed_out()
+
+    def record_failure(self, token):
+        failure_count_key, timeout_key = self._make_keys(token)
+        self.cache.add(failure_count_key, 0, self.timeout, version=THROTTLE_CACHE_VERSION)
+        try:
+            failure_count = self.cache.incr(failure_count_key, version=THROTTLE_CACHE_VERSION)
+        except ValueError:
+            # The entry was evicted between add and incr
+            failure_count = 1
+            self.cache.set(failure_count_key, failure_count, self.timeout, version=THROTTLE_CACHE_VERSION)
+        self.cache.touch(failure_count_key, self.timeout, version=THROTTLE_CACHE_VERSION)
+
+        delay = get_timeout_delay(failure_count)
+        token.failure_count = failure_count
+        token.timeout = timezone.now() + timedelta(seconds=delay)
+        self.cache.set(timeout_key, token.timeout, delay, version=THROTTLE_CACHE_VERSION)
+
+    def reset(self, token):
+        self.cache.delete_many(self._make_keys(token), version=THROTTLE_CACHE_VERSION)
+        token._reset_timeout()
@@ -1,26 +1,28 @@
 from django.contrib.auth import get_user_model, login, logout
+from django.http import StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie, csrf_protect
-from django.core.exceptions import ValidationError
 
 from rest_framework import status, generics
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.authentication import SessionAuthentication
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from drf_multiple_model.views import ObjectMultipleModelAPIView
-
 from social_django.models import UserSocialAuth
 
 from django_flex_user.models.otp import EmailToken, PhoneToken, TransmissionError, TimeoutError
-from django_flex_user.validators import FlexUserUnicodeUsernameValidator
+from django_flex_user.delivery import is_delivery_queued, queue_new_password
+from django_flex_user.export import EXPORT_FORMATS, EXPORT_CONTENT_TYPES, iter_export
+from django_flex_user.ratelimit import RateLimitExceeded, OTPSearchClientThrottle, OTPSearchIdentifierThrottle, \
+    check_otp_generation
+from django_flex_user.search import TOKEN_KINDS, get_token_uri_templates, search_tokens
 
 from django_flex_user.serializers import FlexUserSerializer, AuthenticationSerializer, UserSocialAuthSerializer, \
-    OTPSerializer, EmailTokenSerializer, PhoneTokenSerializer
+    OTPSerializer, TokenSearchResultSerializer
 
 UserModel = get_user_model()
 
@@ -76,6 +78,26 @@ class FlexUser(generics.GenericAPIView):
     #     return self.patch(request)
 
 
+class FlexUsersExport(generics.GenericAPIView):
+    queryset = UserModel.objects.all()
+    authentication_classes = [SessionAuthentication, JWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        # Note that we can't call this query parameter "format" because djangorestframework reserves it
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'export_format': [f'Must be one of: {", ".join(EXPORT_FORMATS)}.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        response = StreamingHttpResponse(
+            iter_export(export_format, self.get_queryset()),
+            content_type=EXPORT_CONTENT_TYPES[export_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="users.{export_format}"'
+        return response
+
+
 class OAuthProviders(generics.GenericAPIView):
     serializer_class = UserSocialAuthSerializer
     authentication_classes = [SessionAuthentication]
@@ -109,45 +131,20 @@ class Sessions(generics.GenericAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-def my_filter(queryset, request, *args, **kwargs):
-    my_filter.username_validator = FlexUserUnicodeUsernameValidator()
-
-    q = request.query_params.get('search')
-
-    if not q:
-        return queryset.model.objects.none()
-
-    try:
-        my_filter.username_validator(q)
-    except ValidationError:
-        if '@' in q:
-            s = {'user__email': UserModel.objects.normalize_email(q)}
-        else:
-            s = {'user__phone': q}
-    else:
-        s = {'user__username': UserModel.normalize_username(q)}
-
-    return queryset.filter(**s)
-
-
-class OTPTokens(ObjectMultipleModelAPIView):
+class OTPTokens(generics.GenericAPIView):
     authentication_classes = [SessionAuthentication]
     permission_classes = [AllowAny]
+    throttle_classes = [OTPSearchClientThrottle, OTPSearchIdentifierThrottle]
+    serializer_class = TokenSearchResultSerializer
 
-    querylist = (
-        {
-            'queryset': EmailToken.objects.all(),
-            'serializer_class': EmailTokenSerializer,
-            'filter_fn': my_filter,
-            'label': 'email'
-        },
-        {
-            'queryset': PhoneToken.objects.all(),
-            'serializer_class': PhoneTokenSerializer,
-            'filter_fn': my_filter,
-            'label': 'phone'
-        },
-    )
+    def get(self, request):
+        tokens = search_tokens(request.query_params.get('search'))
+        context = {**self.get_serializer_context(), 'uri_templates': get_token_uri_templates(request)}
+        serializer = self.get_serializer_class()(tokens, many=True, context=context)
+        data = {kind: [] for kind in TOKEN_KINDS}
+        for token, token_data in zip(tokens, serializer.data):
+            data[token.kind].append(token_data)
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class EmailToken(generics.GenericAPIView):
@@ -158,6 +155,16 @@ class EmailToken(generics.GenericAPIView):
 
     def get(self, request, pk):
         email_token = self.get_object()
+        try:
+            check_otp_generation(request, email_token)
+        except RateLimitExceeded as e:
+            return Response(status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
+
+        if is_delivery_queued():
+            # Leave delivery to the flexuser_delivery_worker management command
+            queue_new_password(email_token)
+            return Response(status=status.HTTP_202_ACCEPTED)
+
         email_token.generate_password()
         try:
             email_token.send_password()
@@ -172,8 +179,8 @@ class EmailToken(generics.GenericAPIView):
         if serializer.is_valid():
             try:
                 success = email_token.check_password(serializer.validated_data['password'])
-            except TimeoutError:
-                return Response(status=status.HTTP_429_TOO_MANY_REQUESTS)
+            except TimeoutError as e:
+                return Response(status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(e.retry_after)})
             else:
                 if success:
                     jwt = RefreshToken.for_user(email_token.user)
@@ -0,0 +1 @@
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -4,51 +4,72 @@ try:
 except ModuleNotFoundError:
     import json
 
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, send_mail
 from django.urls import reverse
 from smtplib import SMTPException
-# noinspection PyPackageRequirements
-import requests
 import base64
 
+from django_flex_user.delivery_backends import HTTPDeliveryBackend, SMTPDeliveryBackend
 from django_flex_user.models.otp import TransmissionError
 
 
-def email_otp(email_token, **kwargs):
-    request = kwargs.get('request')
-    view_name = kwargs.get('view_name')
+class EmailOTPBackend(SMTPDeliveryBackend):
+    subject = '[django-flex-user] Verify your account'
 
-    if request and view_name:
-        password = base64.urlsafe_b64encode(email_token.password.encode("utf-8")).decode("ascii")
-        uri = request.build_absolute_uri(reverse(view_name, args=('email', email_token.id, password,)))
-    else:
-        raise ValueError('Missing kwargs')
+    def get_message(self, email_token, **kwargs):
+        request = kwargs.get('request')
+        view_name = kwargs.get('view_name')
 
-    try:
-        send_mail(
-            '[django-flex-user] Verify your account',
+        if request and view_name:
+            password = base64.urlsafe_b64encode(email_token.password.encode("utf-8")).decode("ascii")
+            uri = request.build_absolute_uri(reverse(view_name, args=('email', email_token.id, password,)))
+        else:
+            raise ValueError('Missing kwargs')
+
+        return EmailMessage(
+            self.subject,
             f'Click the link below to verify your django-flex-user account:\n\n{uri}',
-            None,
+            self.from_email,
             (email_token.email,)
         )
-    except (SMTPException, ValueError) as e:
-        raise TransmissionError from e
+
+
+class TextbeltBackend(HTTPDeliveryBackend):
+    def get_request(self, phone_token, **kwargs):
+        # note eben: This API key only allows us to send one free message a day
+        return {
+            'method': 'POST',
+            'url': 'https://textbelt.com/text',
+            'data': {
+                'phone': phone_token.phone.as_e164,
+                'message': f'Your django-flex-user verification code:\n\n{phone_token.password}',
+                'key': 'textbelt',
+            },
+        }
+
+    def check_response(self, resp):
+        try:
+            j = resp.json()
+        except (json.JSONDecodeError, ValueError) as e:
+            raise TransmissionError from e
+        else:
+            if not j.get('success'):
+                raise TransmissionError(j.get('error'))
+
+
+# The delivery functions below send over these backends so that connections to the mail server and to Textbelt are
+# reused (with a timeout) rather than opened for every password. They can also be configured directly, see
+# FLEX_USER_OTP_EMAIL_BACKEND and FLEX_USER_OTP_SMS_BACKEND.
+_email_backend = EmailOTPBackend()
+_sms_backend = TextbeltBackend()
+
+
+def email_otp(email_token, **kwargs):
+    _email_backend.send(email_token, **kwargs)
 
 
 def sms_otp(phone_token, **kwargs):
-    # note eben: This API key only allows us to send one free message a day
-    resp = requests.post('https://textbelt.com/text', {
-        'phone': phone_token.phone.as_e164,
-        'message': f'Your django-flex-user verification code:\n\n{phone_token.password}',
-        'key': 'textbelt',
-    })
-    try:
-        j = resp.json()
-    except (json.JSONDecodeError, ValueError) as e:
-        raise TransmissionError from e
-    else:
-        if not j.get('success'):
-            raise TransmissionError(j.get('error'))
+    _sms_backend.send(phone_token, **kwargs)
 
 
 def email_validation_link(strategy, backend, code, partial_token):
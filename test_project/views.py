@@ -9,11 +9,11 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.tokens import default_token_generator
 from django.http import Http404, HttpResponseRedirect, HttpResponseServerError
 from django.urls import reverse
-from django.core.exceptions import ValidationError, PermissionDenied
+from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
 
 from django_flex_user.models.otp import EmailToken, PhoneToken, TransmissionError
-from django_flex_user.validators import FlexUserUnicodeUsernameValidator
+from django_flex_user.identifiers import phone_lookup_value, resolve_identifier
 from django_flex_user.forms import FlexUserAuthenticationForm
 
 UserModel = get_user_model()
@@ -207,19 +207,8 @@ def forgot_password(request):
         if form.is_valid():
             user_identifier = form.cleaned_data['user_identifier']
 
-            q = {}
-            try:
-                # See if value is a username
-                username_validator = FlexUserUnicodeUsernameValidator()
-                username_validator(user_identifier)
-            except ValidationError:
-                # See if value is an email address or phone number
-                if '@' in user_identifier:
-                    q = {'user__email': UserModel.objects.normalize_email(user_identifier)}
-                else:
-                    q = {'user__phone': user_identifier}
-            else:
-                q = {'user__username': UserModel.normalize_username(user_identifier)}
+            field_name, value = resolve_identifier(user_identifier)
+            q = {f'user__{field_name}': phone_lookup_value(value) if field_name == 'phone' else value}
 
             search_results_email_tokens = EmailToken.objects.filter(**q)
             search_results_phone_tokens = PhoneToken.objects.filter(**q)